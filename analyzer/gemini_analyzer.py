@@ -9,8 +9,20 @@ import json
 import asyncio
 import logging
 import re
+import time
 from datetime import datetime
 
+from analyzer.llm_client import MODEL_NAME, get_llm_client
+from analyzer.llm_cache import JSON_CALL_TYPES, CachedResponse, get_llm_cache
+from analyzer.llm_usage import CACHE, record_budget, record_call, usage_scope
+from analyzer.prompt_budget import PromptBudget, truncate_to_tokens
+from analyzer.rate_limiter import get_rate_limiter
+from analyzer.schemas import extract_json, structured_output_kwargs
+from analyzer.sentiment import get_sentiment_engine
+from utils.config import Config
+from utils.latency_tracker import get_latency_tracker
+from utils.retry import get_retry_policy
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,24 +36,69 @@ class GeminiAnalyzer:
         
         genai.configure(api_key=api_key)
         # Yeni model adını kullan
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.llm = get_llm_client(MODEL_NAME)
+        self.model = self.llm.model
+        self.llm_cache = get_llm_cache()
+        self.rate_limiter = get_rate_limiter()
+        self.latency = get_latency_tracker()
+        config = Config()
+        self.retry_policy = get_retry_policy(
+            'llm',
+            max_retries=config.llm_max_retries,
+            base_delay=config.retry_base_delay,
+            max_delay=config.retry_max_delay
+        )
+        self.config = config
+    
+    async def _generate(self, prompt: str, call_type: str):
+        """Gemini çağrısı - timeout geçmiş gecikmelerden türetilir, geçici hatalar yeniden denenir;
+        aynı prompt'un yanıtı önbellekteyse model çağrılmaz"""
+        started = time.monotonic()
+        cache_key = None
+        if self.llm_cache is not None:
+            cache_key, cached = self.llm_cache.lookup(MODEL_NAME, call_type, prompt)
+            if cached is not None:
+                response = CachedResponse(cached)
+                record_call(call_type, prompt, response, time.monotonic() - started, source=CACHE)
+                return response
+        
+        # JSON çağrılarında model düz metin yerine JSON MIME tipiyle yanıt verir
+        output_kwargs = structured_output_kwargs() if call_type in JSON_CALL_TYPES else {}
+        
+        async def call():
+            # Gecikme örneği istemcide, slot alındıktan sonra ölçülür
+            return await self.llm.generate(
+                prompt, timeout=self.latency.timeout('llm', call_type), call_type=call_type, **output_kwargs
+            )
+        
+        async def attempt():
+            if self.rate_limiter is None:
+                return await call()
+            return await self.rate_limiter.run(prompt, call)
+        
+        response = await self.retry_policy.run(attempt, label=call_type)
+        record_call(call_type, prompt, response, time.monotonic() - started)
+        if cache_key is not None:
+            self.llm_cache.store(cache_key, response, model=MODEL_NAME, call_type=call_type)
+        return response
     
     async def analyze_products(self, products_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Çoklu ürün analizi"""
         try:
             logger.info(f"Analiz başlatılıyor: {len(products_data)} ürün")
             
-            # Her ürün için ayrı analiz
-            product_analyses = []
-            for product in products_data:
-                analysis = await self._analyze_single_product(product)
-                product_analyses.append(analysis)
-            
-            # Genel karşılaştırma analizi
-            comparison_analysis = await self._compare_products(products_data)
-            
-            # Satış önerileri
-            sales_recommendations = await self._generate_sales_recommendations(products_data, product_analyses)
+            with usage_scope() as llm_usage:
+                # Her ürün için ayrı analiz
+                product_analyses = []
+                for product in products_data:
+                    analysis = await self._analyze_single_product(product)
+                    product_analyses.append(analysis)
+                
+                # Genel karşılaştırma analizi
+                comparison_analysis = await self._compare_products(products_data)
+                
+                # Satış önerileri
+                sales_recommendations = await self._generate_sales_recommendations(products_data, product_analyses)
             
             # Sonuçları birleştir
             final_analysis = {
@@ -50,7 +107,8 @@ class GeminiAnalyzer:
                 'product_analyses': product_analyses,
                 'comparison_analysis': comparison_analysis,
                 'sales_recommendations': sales_recommendations,
-                'summary': await self._generate_summary(products_data, product_analyses)
+                'summary': await self._generate_summary(products_data, product_analyses),
+                'llm_usage': llm_usage.to_dict()
             }
             
             logger.info("Analiz tamamlandı")
@@ -104,13 +162,9 @@ class GeminiAnalyzer:
             }
         
         try:
-            # Yorumları tek bir string'e birleştir (daha fazla veri ile)
-            reviews_text = ""
-            for i, review in enumerate(reviews[:30]):  # İlk 30 yorumu analiz et
-                reviews_text += f"Yorum {i+1} (Rating: {review.get('rating', 'N/A')}): {review['text']}\n\n"
-            
             # Daha detaylı ve spesifik prompt
-            prompt = f"""
+            def build_prompt(reviews_text: str) -> str:
+                return f"""
             Aşağıdaki {len(reviews)} ürün yorumunu detaylı olarak analiz et ve e-ticaret satıcısı perspektifinden değerlendir:
 
             YORUMLAR:
@@ -161,11 +215,21 @@ class GeminiAnalyzer:
             }}
             """
             
-            response = await asyncio.to_thread(self.model.generate_content, prompt)
+            # Yorumlar sabit sayı yerine yorum analizi bütçesine sığdığı kadar eklenir
+            budget = PromptBudget(self.config.prompt_budget('reviews'))
+            budget.reserve(build_prompt(''))
+            review_lines = budget.fit(
+                [f"Yorum {i+1} (Rating: {review.get('rating', 'N/A')}): {review['text']}" for i, review in enumerate(reviews)],
+                max_item_tokens=200
+            )
+            record_budget('reviews', budget)
+            prompt = build_prompt('\n\n'.join(review_lines))
+            
+            response = await self._generate(prompt, 'reviews')
             
             # JSON parse et
             try:
-                analysis_result = json.loads(response.text.strip())
+                analysis_result = extract_json(response.text)
                 analysis_result['total_reviews'] = len(reviews)
                 
                 # Skor validasyonu
@@ -177,7 +241,7 @@ class GeminiAnalyzer:
                 logger.info(f"Detaylı yorum analizi tamamlandı: {len(reviews)} yorum")
                 return analysis_result
                 
-            except json.JSONDecodeError as e:
+            except (ValueError, TypeError) as e:
                 logger.error(f"JSON parse hatası: {e}")
                 logger.debug(f"AI response: {response.text[:500]}")
                 
@@ -191,22 +255,12 @@ class GeminiAnalyzer:
     def _fallback_review_analysis(self, reviews: List[Dict[str, str]]) -> Dict[str, Any]:
         """Basit fallback yorum analizi"""
         try:
-            # Basit sentiment analizi
-            positive_words = ['güzel', 'iyi', 'memnun', 'kaliteli', 'harika', 'mükemmel', 'tavsiye', 'başarılı']
-            negative_words = ['kötü', 'berbat', 'sorunlu', 'bozuk', 'pahalı', 'geç', 'yavaş', 'eksik']
-            
-            positive_count = 0
-            negative_count = 0
-            all_text = ""
-            
-            for review in reviews:
-                text = review['text'].lower()
-                all_text += text + " "
-                
-                for word in positive_words:
-                    positive_count += text.count(word)
-                for word in negative_words:
-                    negative_count += text.count(word)
+            # Basit sentiment analizi (olumsuzlamaya duyarlı, tek geçiş)
+            texts = [review['text'] for review in reviews]
+            summary = get_sentiment_engine().summarize(texts)
+            positive_count = summary['positive_hits']
+            negative_count = summary['negative_hits']
+            all_text = ' '.join(texts).lower()
             
             # Skor hesapla
             total_sentiment = positive_count - negative_count
@@ -362,21 +416,22 @@ class GeminiAnalyzer:
             # Detaylı karşılaştırma için AI kullan
             try:
                 comparison_data = []
-                for i, product in enumerate(products_data[:5]):  # İlk 5 ürünü karşılaştır
-                    comparison_data.append({
+                for i, product in enumerate(products_data):
+                    comparison_data.append(json.dumps({
                         'sira': i + 1,
-                        'baslik': product.get('title', 'Bilinmeyen')[:100],
+                        'baslik': truncate_to_tokens(product.get('title', 'Bilinmeyen'), 35),
                         'pazaryeri': product.get('domain', 'Bilinmeyen'),
                         'fiyat': product.get('price', 'Bilinmeyen'),
                         'rating': product.get('rating', 'Bilinmeyen'),
                         'yorum_sayisi': len(product.get('reviews', []))
-                    })
+                    }, ensure_ascii=False))
                 
-                prompt = f"""
+                def build_prompt(products_json: List[str]) -> str:
+                    return f"""
                 Aşağıdaki ürünleri detaylı olarak karşılaştır ve e-ticaret satıcısı perspektifinden analiz et:
 
                 ÜRÜNLER:
-                {json.dumps(comparison_data, ensure_ascii=False, indent=2)}
+                {chr(10).join(products_json)}
 
                 Lütfen aşağıdaki JSON formatında yanıt ver:
                 {{
@@ -408,10 +463,17 @@ class GeminiAnalyzer:
                 Sadece JSON formatında yanıt ver, başka hiçbir şey ekleme.
                 """
                 
-                response = await asyncio.to_thread(self.model.generate_content, prompt)
+                # Ürün sayısı sabit 5 yerine karşılaştırma bütçesiyle sınırlı (satır bölünmez)
+                budget = PromptBudget(self.config.prompt_budget('market_compare'))
+                budget.reserve(build_prompt([]))
+                products_json = budget.fit(comparison_data, truncate=False)
+                record_budget('market_compare', budget)
+                prompt = build_prompt(products_json)
+                
+                response = await self._generate(prompt, 'market_compare')
                 
                 try:
-                    ai_comparison = json.loads(response.text.strip())
+                    ai_comparison = extract_json(response.text)
                     
                     # Temel bilgileri ekle
                     ai_comparison['total_products'] = len(products_data)
@@ -420,7 +482,7 @@ class GeminiAnalyzer:
                     
                     return ai_comparison
                     
-                except json.JSONDecodeError:
+                except (ValueError, TypeError):
                     logger.warning("AI karşılaştırma JSON parse edilemedi, fallback kullanılıyor")
                     
             except Exception as e:
@@ -496,7 +558,8 @@ class GeminiAnalyzer:
                 all_themes.extend(review_analysis.get('common_themes', []))
             
             # Detaylı prompt oluştur
-            prompt = f"""
+            def build_prompt(pros: List[str], cons: List[str], themes: List[str]) -> str:
+                return f"""
             E-ticaret danışmanı olarak, aşağıdaki veriler ışığında bu ürünü satmak isteyen bir satıcı için DETAYLI stratejik öneriler oluştur:
 
             ÜRÜN ANALİZ VERİLERİ:
@@ -505,9 +568,9 @@ class GeminiAnalyzer:
             - Pazaryerleri: {', '.join(marketplaces)}
             
             MÜŞTERİ GERİ BİLDİRİMLERİ:
-            Artı Yönler: {', '.join(all_pros[:10])}
-            Eksi Yönler: {', '.join(all_cons[:10])}
-            Ana Temalar: {', '.join(all_themes[:10])}
+            Artı Yönler: {', '.join(pros)}
+            Eksi Yönler: {', '.join(cons)}
+            Ana Temalar: {', '.join(themes)}
 
             Lütfen aşağıdaki başlıklar altında DETAYLI ve UYGULANABILIR öneriler sun:
 
@@ -550,7 +613,18 @@ class GeminiAnalyzer:
             Her başlık altında en az 3-4 spesifik ve uygulanabilir öneri sun. Önerilerin e-ticaret satıcısının hemen uygulayabileceği türden olmasına dikkat et.
             """
             
-            response = await asyncio.to_thread(self.model.generate_content, prompt)
+            # İlk 10 madde yerine kalan bütçe üç liste arasında paylaştırılır
+            budget = PromptBudget(self.config.prompt_budget('recommendations'))
+            budget.reserve(build_prompt([], [], []))
+            share = budget.remaining // 3
+            prompt = build_prompt(
+                budget.fit(all_pros, max_item_tokens=30, max_tokens=share),
+                budget.fit(all_cons, max_item_tokens=30, max_tokens=share),
+                budget.fit(all_themes, max_item_tokens=15, max_tokens=share)
+            )
+            record_budget('recommendations', budget)
+            
+            response = await self._generate(prompt, 'recommendations')
             
             return {
                 'recommendations_text': response.text.strip(),
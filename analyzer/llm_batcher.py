@@ -0,0 +1,235 @@
+"""
+LLM İsteklerinin Mikro-Toplulaştırılması
+Toplu yükte her ürün kendi küçük Gemini isteklerini gönderir (ör. 3 yorumdan tema);
+istek başına sabit maliyet kotayı gereksiz tüketir.
+Bu modül kısa bir pencere boyunca bekleyen istekleri toplar, tek prompt'ta
+numaralı görevler olarak gönderir ve görev başına JSON yanıtı bekleyen
+çağıranlara dağıtır.
+
+- Pencerede tek istek varsa prompt değiştirilmeden tek başına gönderilir
+- Toplu yanıt ayrıştırılamazsa (veya bazı görevler eksikse) o görevler tek tek gönderilir
+- Toplu çağrının kendisi hata verirse hata bekleyen tüm çağıranlara iletilir
+
+Kullanım:
+    batcher = LLMBatcher(call_model, window=0.05, max_items=8)
+    response = await batcher.submit(prompt, 'themes')   # response.text
+"""
+
+import asyncio
+import json
+import logging
+import textwrap
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from analyzer.llm_cache import response_text
+from analyzer.rate_limiter import current_priority, llm_priority
+
+logger = logging.getLogger(__name__)
+
+BATCH_CALL_TYPE = 'batch'
+
+
+class BatchedResponse:
+    """Toplu yanıttan ayrılan görev yanıtı; çağıranlar Gemini yanıtı gibi .text okur"""
+
+    batched = True
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _PendingItem:
+    def __init__(self, prompt: str, call_type: str, future: asyncio.Future, call_kwargs: Dict[str, Any]):
+        self.prompt = prompt
+        self.call_type = call_type
+        self.future = future
+        self.call_kwargs = call_kwargs
+        # Toplu çağrı zamanlayıcıdan çalışır; çağıranın kota önceliği burada taşınır
+        self.priority = current_priority()
+
+
+def build_batch_prompt(prompts: List[str]) -> str:
+    """Görevleri numaralandırıp görev başına yanıt isteyen tek prompt"""
+    tasks = '\n\n'.join(
+        f"### GÖREV {index}\n{textwrap.dedent(prompt).strip()}"
+        for index, prompt in enumerate(prompts, 1)
+    )
+    return (
+        f"Aşağıda birbirinden bağımsız {len(prompts)} görev var. Her görevi yalnızca kendi "
+        "verisine bakarak, tek başına sorulmuş gibi yanıtla.\n"
+        "Yanıtı SADECE şu JSON biçiminde ver, başka metin ekleme:\n"
+        '{"results": [{"id": 1, "answer": ...}, {"id": 2, "answer": ...}]}\n'
+        "Görev JSON istiyorsa answer alanına JSON nesnesini koy, istemiyorsa yanıtı metin olarak yaz.\n\n"
+        f"{tasks}"
+    )
+
+
+def parse_batch_response(text: str, count: int) -> Dict[int, str]:
+    """
+    Toplu yanıttan görev numarası -> görev yanıtı metni
+
+    Raises:
+        ValueError: Yanıt beklenen JSON biçiminde değilse
+    """
+    cleaned = text.strip()
+    if '```' in cleaned:
+        cleaned = cleaned.split('```json')[-1] if '```json' in cleaned else cleaned.split('```')[1]
+        cleaned = cleaned.split('```')[0]
+    start = min((i for i in (cleaned.find('{'), cleaned.find('[')) if i >= 0), default=-1)
+    end = max(cleaned.rfind('}'), cleaned.rfind(']'))
+    if start < 0 or end < start:
+        raise ValueError("Toplu yanıtta JSON bulunamadı")
+    payload = json.loads(cleaned[start:end + 1])
+    results = payload.get('results') if isinstance(payload, dict) else payload
+    if not isinstance(results, list):
+        raise ValueError("Toplu yanıtta 'results' listesi yok")
+
+    answers: Dict[int, str] = {}
+    for position, entry in enumerate(results, 1):
+        if isinstance(entry, dict) and 'answer' in entry:
+            index, answer = entry.get('id', position), entry['answer']
+        else:
+            index, answer = position, entry
+        try:
+            index = int(index)
+        except (TypeError, ValueError):
+            continue
+        if not 1 <= index <= count or answer is None:
+            continue
+        if isinstance(answer, list) and all(isinstance(item, (str, int, float)) for item in answer):
+            # Metin görevi (ör. temalar) JSON MIME tipiyle doğal olarak dizi döner
+            text_answer = ', '.join(str(item) for item in answer)
+        elif isinstance(answer, (dict, list)):
+            text_answer = json.dumps(answer, ensure_ascii=False, separators=(',', ':'))
+        else:
+            text_answer = str(answer)
+        if text_answer.strip():
+            answers[index] = text_answer
+    return answers
+
+
+class LLMBatcher:
+    """Kısa pencerede biriken LLM isteklerini tek çağrıda gönderen toplayıcı"""
+
+    def __init__(self, call_model: Callable[..., Awaitable[Any]], window: float = 0.05,
+                 max_items: int = 8, max_chars: int = 12000):
+        """
+        Args:
+            call_model: (prompt, call_type, **kwargs) alıp Gemini yanıtı döndüren async fonksiyon
+                (zaman aşımı ve yeniden deneme bu fonksiyonun sorumluluğunda)
+            window: İlk istekten sonra diğerlerinin beklendiği süre (sn)
+            max_items: Bir toplu çağrıdaki en fazla görev (dolunca pencere beklenmez)
+            max_chars: Toplu prompt'un yaklaşık karakter sınırı
+        """
+        self.call_model = call_model
+        self.window = max(0.0, window)
+        self.max_items = max(1, max_items)
+        self.max_chars = max_chars
+
+        self._pending: List[_PendingItem] = []
+        self._pending_chars = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.stats = {
+            'submitted': 0, 'batches': 0, 'batched_items': 0, 'single_calls': 0,
+            'parse_failures': 0, 'item_fallbacks': 0, 'batch_errors': 0, 'calls_saved': 0
+        }
+
+    async def submit(self, prompt: str, call_type: str, **call_kwargs: Any) -> Any:
+        """
+        İsteği pencereye ekle ve yanıtını bekle (.text sunan yanıt nesnesi)
+
+        Args:
+            call_kwargs: Görev tek başına gönderilirse call_model'e iletilir (timeout, deadline)
+        """
+        loop = asyncio.get_running_loop()
+        item = _PendingItem(prompt, call_type, loop.create_future(), call_kwargs)
+        # Vazgeçen çağıranın hatası "okunmadı" uyarısına dönüşmesin
+        item.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        if self._pending and self._pending_chars + len(prompt) > self.max_chars:
+            self._dispatch()
+        self._pending.append(item)
+        self._pending_chars += len(prompt)
+        self.stats['submitted'] += 1
+
+        if len(self._pending) >= self.max_items:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._dispatch)
+        # Çağıran vazgeçse de (timeout) toplu çağrı diğer görevler için sürer
+        return await asyncio.shield(item.future)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._pending, self._pending_chars = self._pending, [], 0
+        if not items:
+            return
+        task = asyncio.ensure_future(self._run(items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, items: List[_PendingItem]) -> None:
+        # Partideki en öncelikli çağıranın önceliğiyle kota sırasına girilir
+        with llm_priority(min(item.priority for item in items)):
+            await self._run_items(items)
+
+    async def _run_items(self, items: List[_PendingItem]) -> None:
+        if len(items) == 1:
+            await self._run_single(items[0])
+            return
+
+        self.stats['batches'] += 1
+        self.stats['batched_items'] += len(items)
+        try:
+            response = await self.call_model(build_batch_prompt([item.prompt for item in items]), BATCH_CALL_TYPE)
+        except Exception as e:
+            self.stats['batch_errors'] += 1
+            logger.warning(f"Toplu LLM çağrısı başarısız ({len(items)} görev): {e}")
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        try:
+            answers = parse_batch_response(response_text(response) or '', len(items))
+        except (ValueError, TypeError) as e:
+            self.stats['parse_failures'] += 1
+            logger.warning(f"Toplu LLM yanıtı ayrıştırılamadı, görevler tek tek gönderiliyor: {e}")
+            answers = {}
+
+        missing = []
+        for index, item in enumerate(items, 1):
+            if index in answers:
+                if not item.future.done():
+                    item.future.set_result(BatchedResponse(answers[index]))
+            else:
+                missing.append(item)
+        self.stats['calls_saved'] += max(0, len(items) - len(missing) - 1)
+        if missing:
+            self.stats['item_fallbacks'] += len(missing)
+            await asyncio.gather(*(self._run_single(item) for item in missing))
+
+    async def _run_single(self, item: _PendingItem) -> None:
+        self.stats['single_calls'] += 1
+        try:
+            with llm_priority(item.priority):
+                response = await self.call_model(item.prompt, item.call_type, **item.call_kwargs)
+        except Exception as e:
+            if not item.future.done():
+                item.future.set_exception(e)
+            return
+        if not item.future.done():
+            item.future.set_result(response)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """İzleme için sayaçlar"""
+        batched = self.stats['batched_items']
+        return dict(
+            self.stats,
+            pending=len(self._pending),
+            window_ms=round(self.window * 1000),
+            max_items=self.max_items,
+            avg_batch_size=round(batched / self.stats['batches'], 2) if self.stats['batches'] else 0.0
+        )
@@ -0,0 +1,326 @@
+"""
+Kalıcı LLM Yanıt Önbelleği
+Aynı ürün yeniden analiz edildiğinde, demo yorumlar tekrarlandığında veya aynı
+ürün seti yeniden karşılaştırıldığında Gemini'ye aynı prompt tekrar gönderilmez.
+
+- Anahtar: model adı + prompt şablon sürümü + normalleştirilmiş prompt'un SHA-256'sı
+  (boşluk/girinti farkları aynı anahtara düşer; şablon değişince sürüm artırılır)
+- Disk: SQLite (süreç yeniden başlasa da korunur, birden fazla işçi paylaşabilir)
+- Bellek: sık kullanılanlar için küçük LRU ön katman (isabet mikrosaniyeler sürer)
+- TTL ve kayıt/bayt sınırı; sınır aşılınca en uzun süredir kullanılmayanlar silinir
+- İsabet/ıskalama/çıkarma sayaçları stats() ile izlenir
+- SQLite dosyası ilk kullanımda açılır (uygulamayı import etmek diske yazmaz)
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+# Prompt şablon sürümleri - şablon veya yanıtın yorumlanışı değişince artırın
+# (eski önbellek kayıtları bu sürümle eşleşmez)
+PROMPT_VERSIONS = {
+    'reviews': 1, 'market_compare': 1, 'recommendations': 1,
+    'themes': 1, 'product': 1, 'compare': 1
+}
+# Yanıtı JSON olması gereken çağrılar (JSON içermeyen yanıt önbelleğe alınmaz)
+JSON_CALL_TYPES = ('reviews', 'market_compare', 'product', 'compare')
+
+
+class CachedResponse:
+    """Önbellekten dönen yanıt; çağıranlar Gemini yanıtı gibi .text okur"""
+
+    cached = True
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Girinti ve satır sonu farklarını yok say (f-string şablonlarının boşlukları değişebilir)"""
+    return ' '.join(prompt.split())
+
+
+def response_text(response: Any) -> Optional[str]:
+    """Yanıt metni; güvenlik filtresine takılan/boş yanıtlarda None (önbelleğe alınmaz)"""
+    try:
+        text = response.text
+    except (ValueError, AttributeError):
+        return None
+    return text if isinstance(text, str) and text.strip() else None
+
+
+def looks_like_json(text: str) -> bool:
+    """JSON beklenen çağrılarda nesne içermeyen yanıt önbelleğe alınmaz"""
+    return '{' in text and '}' in text
+
+
+class LLMCache:
+    """SQLite destekli, bellek ön katmanlı LRU yanıt önbelleği"""
+
+    # Bellek isabetlerinin last_access güncellemeleri toplu yazılır
+    TOUCH_FLUSH_SIZE = 64
+
+    def __init__(self, path: str = 'data/llm_cache.sqlite3', ttl: float = 604800,
+                 max_entries: int = 5000, max_bytes: int = 50 * 1024 * 1024,
+                 memory_entries: int = 256):
+        """
+        Args:
+            path: SQLite dosyası (boşsa yalnızca bellekte tutulur)
+            ttl: Kayıt ömrü (sn)
+            max_entries: Diskteki en fazla kayıt
+            max_bytes: Diskteki yanıt metinlerinin toplam üst sınırı
+            memory_entries: Bellek ön katmanındaki en fazla kayıt
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.memory_entries = max(0, memory_entries)
+
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self.stats_counters = {
+            'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+            'stores': 0, 'skipped': 0, 'evictions': 0, 'expired': 0, 'errors': 0
+        }
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _database(self) -> sqlite3.Connection:
+        """Bağlantıyı ilk kullanımda aç (kilit altında çağrılır)"""
+        if self._db is None:
+            self._db = self._connect(self.path)
+        return self._db
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        target = path or ':memory:'
+        try:
+            if path:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(target, check_same_thread=False, isolation_level=None, timeout=5)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+        except sqlite3.Error as e:
+            logger.warning(f"LLM önbellek dosyası açılamadı ({path}), yalnızca bellek kullanılacak: {e}")
+            db = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS llm_cache ('
+            ' key TEXT PRIMARY KEY, model TEXT, call_type TEXT, response TEXT NOT NULL,'
+            ' size INTEGER NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)'
+        )
+        db.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access)')
+        return db
+
+    @staticmethod
+    def make_key(model: str, version: str, prompt: str) -> str:
+        """Model, şablon sürümü ve normalleştirilmiş prompt'tan anahtar"""
+        digest = hashlib.sha256()
+        for part in (model, version, normalize_prompt(prompt)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x1f')
+        return digest.hexdigest()
+
+    def lookup(self, model: str, call_type: str, prompt: str) -> Tuple[str, Optional[str]]:
+        """
+        Çağrının anahtarı ve (varsa) önbellekteki yanıt metni
+
+        Anahtara çağrı tipinin PROMPT_VERSIONS'taki şablon sürümü katılır.
+        """
+        version = f"{call_type}:v{PROMPT_VERSIONS.get(call_type, 1)}"
+        key = self.make_key(model, version, prompt)
+        return key, self.get(key)
+
+    def store(self, key: str, response: Any, model: str = '', call_type: str = '') -> bool:
+        """Model yanıtını kaydet; boş/engellenmiş ya da JSON beklenip JSON içermeyen yanıt atlanır"""
+        text = response_text(response)
+        if text is None or (call_type in JSON_CALL_TYPES and not looks_like_json(text)):
+            return False
+        self.put(key, text, model=model, call_type=call_type)
+        return True
+
+    def get(self, key: str) -> Optional[str]:
+        """Geçerli kayıt varsa yanıt metni, yoksa None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self._touched[key] = now
+                    if len(self._touched) >= self.TOUCH_FLUSH_SIZE:
+                        self._flush_touches()
+                    self.stats_counters['hits'] += 1
+                    self.stats_counters['memory_hits'] += 1
+                    return entry[0]
+                del self._memory[key]
+
+            try:
+                db = self._database()
+                row = db.execute(
+                    'SELECT response, created_at FROM llm_cache WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None and now - row[1] > self.ttl:
+                    db.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                    self.stats_counters['expired'] += 1
+                    row = None
+                if row is not None:
+                    db.execute('UPDATE llm_cache SET last_access = ? WHERE key = ?', (now, key))
+            except sqlite3.Error as e:
+                self.stats_counters['errors'] += 1
+                logger.debug(f"LLM önbellek okuma hatası: {e}")
+                row = None
+
+            if row is None:
+                self.stats_counters['misses'] += 1
+                return None
+            self._remember(key, row[0], row[1])
+            self.stats_counters['hits'] += 1
+            self.stats_counters['disk_hits'] += 1
+            return row[0]
+
+    def put(self, key: str, text: str, model: str = '', call_type: str = '') -> None:
+        """Yanıtı kaydet; sınırlar aşılırsa en eski kullanılanları çıkar"""
+        now = time.time()
+        size = len(text.encode('utf-8'))
+        with self._lock:
+            if size > self.max_bytes:
+                self.stats_counters['skipped'] += 1
+                return
+            self._remember(key, text, now)
+            try:
+                self._database().execute(
+                    'INSERT OR REPLACE INTO llm_cache (key, model, call_type, response, size, created_at, last_access)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (key, model, call_type, text, size, now, now)
+                )
+                self.stats_counters['stores'] += 1
+                self._evict(now)
+            except sqlite3.Error as e:
+                self.stats_counters['errors'] += 1
+                logger.warning(f"LLM önbellek yazma hatası: {e}")
+
+    def _remember(self, key: str, text: str, created_at: float) -> None:
+        if self.memory_entries <= 0:
+            return
+        self._memory[key] = (text, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_touches(self) -> None:
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        try:
+            self._database().executemany(
+                'UPDATE llm_cache SET last_access = MAX(last_access, ?) WHERE key = ?',
+                [(ts, key) for key, ts in touched.items()]
+            )
+        except sqlite3.Error as e:
+            self.stats_counters['errors'] += 1
+            logger.debug(f"LLM önbellek erişim zamanı yazılamadı: {e}")
+
+    def _evict(self, now: float) -> None:
+        """Süresi dolanları sil, ardından sınır aşımında LRU sırasıyla çıkar (kilit altında)"""
+        self._flush_touches()
+        db = self._database()
+        expired = db.execute('DELETE FROM llm_cache WHERE created_at < ?', (now - self.ttl,)).rowcount
+        self.stats_counters['expired'] += max(0, expired)
+
+        count, total = db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache').fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in db.execute('SELECT key, size FROM llm_cache ORDER BY last_access ASC'):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append(key)
+            count -= 1
+            total -= size
+        db.executemany('DELETE FROM llm_cache WHERE key = ?', [(key,) for key in victims])
+        for key in victims:
+            self._memory.pop(key, None)
+        self.stats_counters['evictions'] += len(victims)
+
+    def clear(self) -> int:
+        """Tüm kayıtları sil; silinen kayıt sayısını döndürür"""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            try:
+                return max(0, self._database().execute('DELETE FROM llm_cache').rowcount)
+            except sqlite3.Error as e:
+                self.stats_counters['errors'] += 1
+                logger.warning(f"LLM önbelleği temizlenemedi: {e}")
+                return 0
+
+    def stats(self) -> Dict[str, Any]:
+        """İzleme için sayaçlar ve doluluk"""
+        with self._lock:
+            self._flush_touches()
+            try:
+                db = self._database()
+                count, total = db.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache'
+                ).fetchone()
+                by_type = dict(db.execute(
+                    'SELECT call_type, COUNT(*) FROM llm_cache GROUP BY call_type'
+                ).fetchall())
+            except sqlite3.Error:
+                count, total, by_type = None, None, {}
+            counters = dict(self.stats_counters)
+        lookups = counters['hits'] + counters['misses']
+        return dict(
+            counters,
+            hit_rate=round(counters['hits'] / lookups, 3) if lookups else 0.0,
+            entries=count,
+            bytes=total,
+            memory_entries=len(self._memory),
+            by_call_type=by_type,
+            path=self.path or None,
+            ttl=self.ttl,
+            max_entries=self.max_entries,
+            max_bytes=self.max_bytes
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is None:
+                return
+            self._flush_touches()
+            self._db.close()
+            self._db = None
+
+
+_llm_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Analizörlerin paylaştığı tekil LLM önbelleği; LLM_CACHE_ENABLED=false ise None"""
+    global _llm_cache
+    with _cache_lock:
+        if _llm_cache is None:
+            config = Config()
+            if not config.llm_cache_enabled:
+                return None
+            _llm_cache = LLMCache(
+                path=config.llm_cache_path,
+                ttl=config.llm_cache_ttl,
+                max_entries=config.llm_cache_max_entries,
+                max_bytes=int(config.llm_cache_max_mb * 1024 * 1024),
+                memory_entries=config.llm_cache_memory_entries
+            )
+            logger.info(f"LLM yanıt önbelleği: {config.llm_cache_path or 'bellek'} "
+                        f"(TTL {config.llm_cache_ttl:.0f} sn, en fazla {config.llm_cache_max_entries} kayıt)")
+        return _llm_cache
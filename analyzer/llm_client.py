@@ -0,0 +1,317 @@
+"""
+Gemini İstemci Katmanı
+Model çağrıları varsayılan thread havuzunda (asyncio.to_thread) yapılmaz:
+
+- SDK'nın async API'si (generate_content_async) varsa o kullanılır; timeout veya
+  iptalde gRPC isteği gerçekten iptal edilir, bekleyen thread kalmaz
+- Yoksa (veya LLM_CLIENT_MODE=thread) yalnızca LLM'e ayrılmış, sınırlı bir thread
+  havuzu kullanılır; SDK destekliyorsa istek sunucu tarafında da timeout ile kesilir
+- Eşzamanlı çağrı sayısı sınırlıdır; slot, thread gerçekten bitene kadar tutulur
+  (terk edilen thread'ler diğer çağrıların kapasitesini gizlice tüketmez)
+- Uçuştaki çağrı, slot bekleme süresi ve terk edilen thread sayaçları snapshot() ile izlenir
+- generate_stream() aynı slot ve timeout kurallarıyla akışlı üretim yapar; parçalar
+  geldikçe on_text'e iletilir, dönen yanıt tam metni taşır
+
+Kullanım:
+    client = get_llm_client(MODEL_NAME)
+    response = await client.generate(prompt, timeout=30)
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import google.generativeai as genai
+
+from analyzer.llm_stream import StreamedResponse, chunk_text
+from analyzer.llm_usage import get_usage_tracker, response_usage
+from utils.config import Config
+from utils.latency_tracker import get_latency_tracker
+
+logger = logging.getLogger(__name__)
+
+ASYNC = 'async'
+THREAD = 'thread'
+
+# Analizörlerin kullandığı model (önbellek anahtarına da katılır)
+MODEL_NAME = 'gemini-1.5-flash'
+
+
+def _accepts(func: Any, name: str) -> bool:
+    try:
+        return name in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+class LLMClient:
+    """Tek model için sınırlı eşzamanlılıklı, iptal edilebilir Gemini çağrıları"""
+
+    def __init__(self, model: Any, mode: str = 'auto', max_concurrency: int = 8):
+        """
+        Args:
+            model: genai.GenerativeModel (veya aynı arayüzü sunan nesne)
+            mode: 'auto' (async API varsa onu kullan), 'async' veya 'thread'
+            max_concurrency: Aynı anda modele giden en fazla çağrı
+        """
+        self.model = model
+        has_async = hasattr(model, 'generate_content_async')
+        if mode == ASYNC and not has_async:
+            logger.warning("SDK'da generate_content_async yok, LLM çağrıları ayrı thread havuzunda yapılacak")
+        self.mode = ASYNC if has_async and mode in ('auto', ASYNC) else THREAD
+        self.max_concurrency = max(1, max_concurrency)
+        # Eski SDK sürümlerinde request_options yok; o zaman timeout yalnızca istemci tarafında
+        self._request_timeout = _accepts(model.generate_content, 'request_options')
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.BoundedSemaphore] = None
+        self._waiting = 0
+        self._in_flight = 0
+        self.stats = {
+            'calls': 0, 'streams': 0, 'completed': 0, 'failed': 0, 'timeouts': 0, 'cancelled': 0,
+            'abandoned_threads': 0, 'queued': 0, 'slot_timeouts': 0, 'wait_seconds': 0.0,
+            'max_wait_seconds': 0.0, 'peak_in_flight': 0
+        }
+
+    def _kwargs(self, timeout: Optional[float]) -> Dict[str, Any]:
+        return {'request_options': {'timeout': timeout}} if timeout and self._request_timeout else {}
+
+    async def _acquire_slot(self, timeout: Optional[float] = None) -> None:
+        """
+        Slot boşalana kadar olay döngüsünde bekle (thread havuzu kuyruğunda değil, yoklama yapmadan)
+
+        Raises:
+            asyncio.TimeoutError: timeout içinde slot boşalmazsa
+        """
+        if self._slots is None:
+            # Event loop içinde tembel oluşturulur (py3.8/3.9 loop bağlama kuralı)
+            self._slots = asyncio.BoundedSemaphore(self.max_concurrency)
+        if self._slots.locked():
+            started = time.monotonic()
+            self._waiting += 1
+            self.stats['queued'] += 1
+            acquire = asyncio.ensure_future(self._slots.acquire())
+            try:
+                await asyncio.wait_for(asyncio.shield(acquire), timeout=timeout)
+            except BaseException as e:
+                # Vazgeçildi; bekleme son anda slot aldıysa geri ver
+                acquire.cancel()
+                acquire.add_done_callback(self._return_unused_slot)
+                if isinstance(e, asyncio.TimeoutError):
+                    self.stats['slot_timeouts'] += 1
+                raise
+            finally:
+                self._waiting -= 1
+            waited = time.monotonic() - started
+            self.stats['wait_seconds'] += waited
+            self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+        else:
+            await self._slots.acquire()
+        self._in_flight += 1
+        self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self._in_flight)
+
+    def _return_unused_slot(self, acquire: asyncio.Future) -> None:
+        if not acquire.cancelled() and acquire.exception() is None:
+            self._slots.release()
+
+    def _release_slot(self) -> None:
+        # Her zaman olay döngüsünde çağrılır (doğrudan veya executor future'ının done-callback'inde)
+        self._in_flight -= 1
+        self._slots.release()
+
+    async def generate(self, prompt: Any, timeout: Optional[float] = None, call_type: str = '',
+                       slot_timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """
+        Modeli çağır; başarılı çağrının token ve süresi kullanım sayaçlarına, slot
+        alındıktan sonraki süresi LLM gecikme histogramına işlenir
+
+        Args:
+            prompt: Model girdisi
+            timeout: Çağrı süresi sınırı (slot beklemesi dahil değil)
+            call_type: Kullanım sayaçları ve gecikme histogramı için çağrı tipi
+            slot_timeout: Slot beklemesinin üst sınırı (genelde isteğin kalan bütçesi)
+            kwargs: generate_content'e iletilir (generation_config vb.)
+
+        Raises:
+            asyncio.TimeoutError: slot_timeout veya timeout dolarsa (istek iptal edilir / thread terk edilir)
+        """
+        self.stats['calls'] += 1
+        await self._acquire_slot(slot_timeout)
+        started = time.monotonic()
+        with self._measure(call_type):
+            if self.mode == ASYNC:
+                try:
+                    response = await asyncio.wait_for(
+                        self.model.generate_content_async(prompt, **kwargs, **self._kwargs(timeout)),
+                        timeout=timeout
+                    )
+                except BaseException as e:
+                    self._count_failure(e)
+                    raise
+                finally:
+                    self._release_slot()
+                self.stats['completed'] += 1
+            else:
+                response = await self._run_in_thread(
+                    lambda: self.model.generate_content(prompt, **kwargs, **self._kwargs(timeout)), timeout
+                )
+        self._record_usage(call_type, prompt, response, time.monotonic() - started)
+        return response
+    
+    async def generate_stream(self, prompt: Any, on_text: Callable[[str], None],
+                              timeout: Optional[float] = None, call_type: str = '',
+                              slot_timeout: Optional[float] = None, **kwargs: Any) -> StreamedResponse:
+        """
+        Modeli akışlı çağır; her metin parçası geldiği anda on_text'e verilir
+        
+        Args:
+            on_text: Olay döngüsünde çağrılan parça işleyicisi
+            timeout: Tüm akışın süre sınırı (ilk parça dahil)
+            slot_timeout: Slot beklemesinin üst sınırı
+        
+        Returns:
+            Parçaların birleşimini taşıyan yanıt
+        
+        Raises:
+            asyncio.TimeoutError: Slot slot_timeout içinde boşalmazsa veya akış timeout içinde bitmezse
+        """
+        self.stats['calls'] += 1
+        self.stats['streams'] += 1
+        await self._acquire_slot(slot_timeout)
+        started = time.monotonic()
+        with self._measure(call_type):
+            if self.mode == ASYNC:
+                async def consume() -> str:
+                    stream = await self.model.generate_content_async(
+                        prompt, stream=True, **kwargs, **self._kwargs(timeout)
+                    )
+                    parts = []
+                    async for chunk in stream:
+                        text = chunk_text(chunk)
+                        if text:
+                            parts.append(text)
+                            on_text(text)
+                    return ''.join(parts)
+                
+                try:
+                    text = await asyncio.wait_for(consume(), timeout=timeout)
+                except BaseException as e:
+                    self._count_failure(e)
+                    raise
+                finally:
+                    self._release_slot()
+                self.stats['completed'] += 1
+            else:
+                loop = asyncio.get_running_loop()
+                abandoned = threading.Event()
+                
+                def consume_in_thread() -> str:
+                    stream = self.model.generate_content(prompt, stream=True, **kwargs, **self._kwargs(timeout))
+                    parts = []
+                    for chunk in stream:
+                        # Çağıran vazgeçtiyse akışı okumayı bırak (geç parçalar iletilmez)
+                        if abandoned.is_set():
+                            break
+                        text = chunk_text(chunk)
+                        if text:
+                            parts.append(text)
+                            loop.call_soon_threadsafe(on_text, text)
+                    return ''.join(parts)
+                
+                try:
+                    text = await self._run_in_thread(consume_in_thread, timeout)
+                except BaseException:
+                    abandoned.set()
+                    raise
+        response = StreamedResponse(text)
+        self._record_usage(call_type, prompt, response, time.monotonic() - started)
+        return response
+
+    @contextmanager
+    def _measure(self, call_type: str) -> Iterator[None]:
+        """Slot alındıktan sonraki çağrı süresi (kuyrukta bekleme P99'a ve türetilen timeout'a karışmaz)"""
+        if not call_type:
+            yield
+            return
+        with get_latency_tracker().measure('llm', call_type):
+            yield
+
+    @staticmethod
+    def _record_usage(call_type: str, prompt: Any, response: Any, seconds: float) -> None:
+        text = prompt if isinstance(prompt, str) else str(prompt)
+        input_tokens, output_tokens, estimated = response_usage(text, response)
+        get_usage_tracker().record(call_type, input_tokens, output_tokens, seconds, estimated=estimated)
+
+    async def _run_in_thread(self, func: Callable[[], Any], timeout: Optional[float]) -> Any:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='gemini')
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._executor, func)
+        except BaseException:
+            self._release_slot()
+            raise
+        # Slot, çağıran vazgeçse bile thread bitince bırakılır
+        future.add_done_callback(lambda _: self._release_slot())
+        try:
+            response = await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except BaseException as e:
+            if not future.done():
+                self.stats['abandoned_threads'] += 1
+                # Sonradan gelen hata "okunmadı" uyarısına dönüşmesin
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._count_failure(e)
+            raise
+        self.stats['completed'] += 1
+        return response
+
+    def _count_failure(self, error: BaseException) -> None:
+        if isinstance(error, asyncio.TimeoutError):
+            self.stats['timeouts'] += 1
+        elif isinstance(error, asyncio.CancelledError):
+            self.stats['cancelled'] += 1
+        else:
+            self.stats['failed'] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """İzleme için uçuştaki çağrılar ve bekleme sayaçları"""
+        return dict(
+            self.stats,
+            wait_seconds=round(self.stats['wait_seconds'], 2),
+            max_wait_seconds=round(self.stats['max_wait_seconds'], 2),
+            mode=self.mode,
+            max_concurrency=self.max_concurrency,
+            in_flight=self._in_flight,
+            waiting=self._waiting,
+            server_timeout=self._request_timeout
+        )
+
+
+_clients: Dict[str, LLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(model_name: str) -> LLMClient:
+    """Model adına göre paylaşılan istemci (analizörler aynı slot havuzunu kullanır)"""
+    with _clients_lock:
+        client = _clients.get(model_name)
+        if client is None:
+            config = Config()
+            client = LLMClient(
+                genai.GenerativeModel(model_name),
+                mode=config.llm_client_mode,
+                max_concurrency=config.llm_max_concurrency
+            )
+            _clients[model_name] = client
+            logger.info(f"Gemini istemcisi ({model_name}): {client.mode} modu, en fazla {client.max_concurrency} eşzamanlı çağrı")
+        return client
+
+
+def llm_client_stats() -> Dict[str, Dict[str, Any]]:
+    """Tüm istemcilerin sayaçları - izleme için"""
+    return {name: client.snapshot() for name, client in list(_clients.items())}
@@ -0,0 +1,206 @@
+"""
+LLM Çıktısının Tarayıcıya Akıtılması (SSE)
+Ürün analizi ve karşılaştırma çağrıları tam Gemini yanıtını beklemeden, SDK'nın
+akışlı üretimiyle gelen parçaları istemciye iletir:
+
+- 'delta': modelden gelen ham metin parçası
+- 'field': JSON yanıtında tamamlanan her üst seviye alan (ör. category, strengths)
+- 'reset': çağrı yeniden denendiyse o çağrı tipinin önceki parçaları geçersizdir
+- Akış bitince son sonuç normal yoldan ayrıştırılır; kaydedilen analiz akışsız
+  çalıştırmayla aynıdır
+
+Akış, çağrı zincirine parametre olarak taşınmaz; llm_stream() bağlamı içinde
+açılan görevlerdeki analizör çağrıları sink'i current_sink() ile bulur.
+
+Kullanım:
+    async def work(sink):
+        return await analyzer.compare_products(ids)
+    return StreamingResponse(sse_events(work), media_type='text/event-stream')
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_SECONDS = 15.0
+
+
+class StreamedResponse:
+    """Akışla gelen parçaların birleşimi; çağıranlar Gemini yanıtı gibi .text okur"""
+
+    streamed = True
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def chunk_text(chunk: Any) -> str:
+    """Akış parçasının metni (güvenlik filtresine takılan parçada boş)"""
+    try:
+        text = chunk.text
+    except (ValueError, AttributeError):
+        return ''
+    return text if isinstance(text, str) else ''
+
+
+class JsonFieldParser:
+    """Parça parça gelen JSON nesnesinden tamamlanan üst seviye alanları çıkarır"""
+
+    def __init__(self):
+        self._buffer = ''
+        self._position = 0
+        self._depth = 0
+        self._started = False
+        self._finished = False
+        self._in_string = False
+        self._escaped = False
+        self._segment_start = 0
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Yeni parçayı ekle; bu parçayla tamamlanan (alan, değer) çiftlerini döndür"""
+        self._buffer += text
+        fields: List[Tuple[str, Any]] = []
+        buffer = self._buffer
+        while self._position < len(buffer) and not self._finished:
+            char = buffer[self._position]
+            index = self._position
+            self._position += 1
+            if not self._started:
+                if char == '{':
+                    self._started = True
+                    self._depth = 1
+                    self._segment_start = index + 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finished = True
+                    fields.extend(self._segment(index))
+            elif char == ',' and self._depth == 1:
+                fields.extend(self._segment(index))
+        return fields
+
+    def _segment(self, end: int) -> List[Tuple[str, Any]]:
+        segment = self._buffer[self._segment_start:end]
+        self._segment_start = end + 1
+        if not segment.strip():
+            return []
+        try:
+            parsed = json.loads('{' + segment + '}')
+        except ValueError:
+            # Bozuk alan akışta atlanır; son sonuç tam metinden ayrıştırılır
+            return []
+        return list(parsed.items()) if isinstance(parsed, dict) else []
+
+
+class StreamSink:
+    """Analiz sırasında üretilen akış olaylarını SSE yanıtına ileten kuyruk"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def event(self, name: str, data: Any) -> None:
+        self.queue.put_nowait((name, data))
+
+    def delta(self, call_type: str, text: str) -> None:
+        if text:
+            self.event('delta', {'call_type': call_type, 'text': text})
+
+    def field(self, call_type: str, key: str, value: Any) -> None:
+        self.event('field', {'call_type': call_type, 'key': key, 'value': value})
+
+    def reset(self, call_type: str) -> None:
+        self.event('reset', {'call_type': call_type})
+
+    def text_handler(self, call_type: str) -> Callable[[str], None]:
+        """Tek çağrı denemesinin parçalarını delta ve field olaylarına çeviren fonksiyon"""
+        parser = JsonFieldParser()
+
+        def on_text(text: str) -> None:
+            self.delta(call_type, text)
+            for key, value in parser.feed(text):
+                self.field(call_type, key, value)
+
+        return on_text
+
+    def replay(self, call_type: str, text: str) -> None:
+        """Önbellekten gelen tam yanıtı tek parça olarak akıt"""
+        self.text_handler(call_type)(text)
+
+
+_sink: ContextVar[Optional[StreamSink]] = ContextVar('llm_stream_sink', default=None)
+
+
+def current_sink() -> Optional[StreamSink]:
+    """Bu bağlamda açık akış (yoksa None - çağrılar akışsız yapılır)"""
+    return _sink.get()
+
+
+@contextmanager
+def llm_stream(sink: StreamSink) -> Iterator[StreamSink]:
+    """Bu bağlamda (ve içinde açılan görevlerde) akışlı çağrıları sink'e yönlendir"""
+    token = _sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _sink.reset(token)
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Tek SSE olayı"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def sse_events(work: Callable[[StreamSink], Awaitable[Any]]) -> AsyncIterator[str]:
+    """
+    work(sink)'i akış bağlamında çalıştırıp olaylarını SSE olarak üret
+
+    Son olay, work'ün dönüş değeriyle 'result' ya da hata mesajıyla 'error' olur.
+    İstemci bağlantıyı kapatırsa work iptal edilir.
+    """
+    sink = StreamSink()
+    with llm_stream(sink):
+        task = asyncio.ensure_future(work(sink))
+    try:
+        while True:
+            getter = asyncio.ensure_future(sink.queue.get())
+            done, _ = await asyncio.wait({getter, task}, timeout=KEEPALIVE_SECONDS,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield format_sse(*getter.result())
+                continue
+            getter.cancel()
+            if task in done:
+                break
+            # Proxy'ler boşta kalan bağlantıyı kapatmasın
+            yield ": keepalive\n\n"
+
+        while not sink.queue.empty():
+            yield format_sse(*sink.queue.get_nowait())
+        if task.cancelled():
+            yield format_sse('error', {'error': 'İptal edildi'})
+        elif task.exception() is not None:
+            logger.error(f"Akışlı analiz hatası: {task.exception()}")
+            yield format_sse('error', {'error': str(task.exception())})
+        else:
+            yield format_sse('result', task.result())
+    finally:
+        if not task.done():
+            task.cancel()
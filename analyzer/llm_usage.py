@@ -0,0 +1,220 @@
+"""
+LLM Token ve Maliyet Muhasebesi
+Her Gemini çağrısının girdi/çıktı tokenı, süresi ve tahmini maliyeti çağrı tipi
+bazında toplanır (themes, product, compare, reviews, market_compare, recommendations,
+toplu çağrılar için batch).
+
+- Yanıtta usage_metadata varsa gerçek sayılar, yoksa karakter tabanlı tahmin kullanılır
+  (tahmini kayıtlar 'estimated' olarak işaretlenir)
+- Süreç geneli sayaçlar: get_usage_tracker().snapshot()
+- Ürün bazlı kullanım: analiz usage_scope() içinde yapılır; önbellekten veya toplu
+  çağrıdan gelen yanıtlar da kaynağıyla birlikte kapsamın özetine işlenir
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from utils.config import Config
+
+# Türkçe metinde token başına düşen ortalama karakter (kötümser tahmin)
+CHARS_PER_TOKEN = 3
+
+MODEL = 'model'
+CACHE = 'cache'
+BATCH = 'batch'
+
+
+def estimate_tokens(text: str) -> int:
+    """Karakter sayısından kaba token tahmini"""
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+def response_token_count(response: Any) -> Optional[int]:
+    """Yanıttaki toplam token (usage_metadata yoksa None)"""
+    usage = getattr(response, 'usage_metadata', None)
+    total = getattr(usage, 'total_token_count', None)
+    return total if isinstance(total, int) and total > 0 else None
+
+
+def response_usage(prompt: str, response: Any) -> Tuple[int, int, bool]:
+    """
+    Çağrının (girdi, çıktı, tahmini_mi) token sayıları
+
+    SDK usage_metadata döndürüyorsa onu, döndürmüyorsa prompt ve yanıt metninden tahmini kullanır.
+    """
+    usage = getattr(response, 'usage_metadata', None)
+    prompt_tokens = getattr(usage, 'prompt_token_count', None)
+    output_tokens = getattr(usage, 'candidates_token_count', None)
+    if isinstance(prompt_tokens, int) and isinstance(output_tokens, int) and prompt_tokens > 0:
+        return prompt_tokens, output_tokens, False
+    try:
+        text = response.text or ''
+    except (ValueError, AttributeError):
+        text = ''
+    return estimate_tokens(prompt), estimate_tokens(text), True
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {'calls': 0, 'input_tokens': 0, 'output_tokens': 0, 'seconds': 0.0,
+            'max_seconds': 0.0, 'estimated_calls': 0, 'cached': 0, 'batched': 0}
+
+
+class UsageTracker:
+    """Süreç geneli, çağrı tipi bazlı token/süre/maliyet sayaçları"""
+
+    def __init__(self, input_price_per_m: float = 0.075, output_price_per_m: float = 0.30):
+        """
+        Args:
+            input_price_per_m: 1M girdi tokenı fiyatı (USD)
+            output_price_per_m: 1M çıktı tokenı fiyatı (USD)
+        """
+        self.input_price_per_m = input_price_per_m
+        self.output_price_per_m = output_price_per_m
+        self._lock = threading.Lock()
+        self._by_type: Dict[str, Dict[str, Any]] = {}
+
+    def cost(self, input_tokens: int, output_tokens: int) -> float:
+        """Token sayılarının USD karşılığı"""
+        return (input_tokens * self.input_price_per_m + output_tokens * self.output_price_per_m) / 1_000_000
+
+    def record(self, call_type: str, input_tokens: int, output_tokens: int, seconds: float,
+               estimated: bool = False) -> None:
+        """Modele giden gerçek bir çağrıyı kaydet"""
+        with self._lock:
+            bucket = self._by_type.setdefault(call_type or 'other', _empty_bucket())
+            bucket['calls'] += 1
+            bucket['input_tokens'] += input_tokens
+            bucket['output_tokens'] += output_tokens
+            bucket['seconds'] += seconds
+            bucket['max_seconds'] = max(bucket['max_seconds'], seconds)
+            bucket['estimated_calls'] += int(estimated)
+
+    def record_avoided(self, call_type: str, source: str) -> None:
+        """Modele gitmeden karşılanan çağrı (önbellek isabeti veya toplu çağrının parçası)"""
+        with self._lock:
+            bucket = self._by_type.setdefault(call_type or 'other', _empty_bucket())
+            bucket['cached' if source == CACHE else 'batched'] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """İzleme için çağrı tipi bazlı ve toplam kullanım"""
+        with self._lock:
+            by_type = {name: dict(bucket) for name, bucket in self._by_type.items()}
+        totals = _empty_bucket()
+        for bucket in by_type.values():
+            for key in totals:
+                totals[key] = max(totals[key], bucket[key]) if key == 'max_seconds' else totals[key] + bucket[key]
+            bucket['avg_seconds'] = round(bucket['seconds'] / bucket['calls'], 3) if bucket['calls'] else 0.0
+            bucket['cost_usd'] = round(self.cost(bucket['input_tokens'], bucket['output_tokens']), 6)
+            bucket['seconds'] = round(bucket['seconds'], 2)
+            bucket['max_seconds'] = round(bucket['max_seconds'], 2)
+        totals['cost_usd'] = round(self.cost(totals['input_tokens'], totals['output_tokens']), 6)
+        totals['seconds'] = round(totals['seconds'], 2)
+        totals['max_seconds'] = round(totals['max_seconds'], 2)
+        return {
+            'by_call_type': by_type,
+            'total': totals,
+            'pricing': {'input_per_m': self.input_price_per_m, 'output_per_m': self.output_price_per_m}
+        }
+
+
+class UsageScope:
+    """Tek analizin (ör. bir ürünün) LLM kullanım özeti"""
+
+    def __init__(self, tracker: UsageTracker):
+        self.tracker = tracker
+        self._by_type: Dict[str, Dict[str, Any]] = {}
+        self.budgets: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, call_type: str, input_tokens: int, output_tokens: int, seconds: float,
+            source: str = MODEL, estimated: bool = False) -> None:
+        bucket = self._by_type.setdefault(call_type, _empty_bucket())
+        bucket['calls'] += 1
+        bucket['seconds'] += seconds
+        bucket['max_seconds'] = max(bucket['max_seconds'], seconds)
+        if source == CACHE:
+            # Önbellek isabeti kota harcamaz
+            bucket['cached'] += 1
+            return
+        bucket['batched'] += int(source == BATCH)
+        bucket['input_tokens'] += input_tokens
+        bucket['output_tokens'] += output_tokens
+        bucket['estimated_calls'] += int(estimated)
+
+    def to_dict(self) -> Dict[str, Any]:
+        by_type = {}
+        input_tokens = output_tokens = 0
+        seconds = 0.0
+        for name, bucket in self._by_type.items():
+            input_tokens += bucket['input_tokens']
+            output_tokens += bucket['output_tokens']
+            seconds += bucket['seconds']
+            by_type[name] = {
+                'calls': bucket['calls'],
+                'cached': bucket['cached'],
+                'batched': bucket['batched'],
+                'input_tokens': bucket['input_tokens'],
+                'output_tokens': bucket['output_tokens'],
+                'seconds': round(bucket['seconds'], 3),
+                'cost_usd': round(self.tracker.cost(bucket['input_tokens'], bucket['output_tokens']), 6)
+            }
+        return {
+            'calls': sum(b['calls'] for b in self._by_type.values()),
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'estimated': any(b['estimated_calls'] for b in self._by_type.values()),
+            'cost_usd': round(self.tracker.cost(input_tokens, output_tokens), 6),
+            'llm_seconds': round(seconds, 3),
+            'by_call_type': by_type,
+            'prompt_budgets': dict(self.budgets)
+        }
+
+
+_scope: ContextVar[Optional[UsageScope]] = ContextVar('llm_usage_scope', default=None)
+
+
+@contextmanager
+def usage_scope() -> Iterator[UsageScope]:
+    """Bu bağlamda (ve içinde açılan görevlerde) yapılan LLM çağrılarını tek özette topla"""
+    scope = UsageScope(get_usage_tracker())
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+def record_call(call_type: str, prompt: str, response: Any, seconds: float, source: str = MODEL) -> None:
+    """Analizör seviyesindeki çağrıyı (model, önbellek veya toplu) açık kapsama işle"""
+    if source != MODEL:
+        get_usage_tracker().record_avoided(call_type, source)
+    scope = _scope.get()
+    if scope is None:
+        return
+    input_tokens, output_tokens, estimated = response_usage(prompt, response)
+    scope.add(call_type, input_tokens, output_tokens, seconds, source=source, estimated=estimated)
+
+
+def record_budget(call_type: str, budget: Any) -> None:
+    """Prompt bütçesinin kullanımını açık kapsama işle"""
+    scope = _scope.get()
+    if scope is not None:
+        scope.budgets[call_type] = budget.to_dict()
+
+
+_usage_tracker: Optional[UsageTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Tüm LLM çağrılarının paylaştığı tekil kullanım sayacı"""
+    global _usage_tracker
+    with _tracker_lock:
+        if _usage_tracker is None:
+            config = Config()
+            _usage_tracker = UsageTracker(
+                input_price_per_m=config.llm_input_price_per_m,
+                output_price_per_m=config.llm_output_price_per_m
+            )
+        return _usage_tracker
@@ -27,6 +27,7 @@ import os
 import re
 import logging
 import asyncio
+import time
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from pathlib import Path
@@ -35,19 +36,79 @@ import pandas as pd
 # Google Gemini AI için gerekli import
 import google.generativeai as genai
 
+from analyzer.llm_batcher import BATCH_CALL_TYPE, LLMBatcher
+from analyzer.llm_client import MODEL_NAME, get_llm_client
+from analyzer.llm_cache import JSON_CALL_TYPES, CachedResponse, get_llm_cache
+from analyzer.llm_stream import StreamSink, current_sink
+from analyzer.llm_usage import BATCH, CACHE, MODEL, record_budget, record_call, usage_scope
+from analyzer.prompt_budget import PromptBudget, truncate_to_tokens
+from analyzer.rate_limiter import RateLimitTimeout, get_rate_limiter, is_rate_limited
+from analyzer.schemas import (ComparisonAnalysis, ProductAnalysis, StructuredOutputError, parse_structured,
+                              structured_output_kwargs)
+from analyzer.sentiment import get_sentiment_engine
+from utils.deadline import Deadline, ensure_deadline
+from utils.config import Config
+from utils.latency_tracker import get_latency_tracker
+from utils.retry import get_retry_policy
+from utils.stage_graph import StageGraph
+
 # Logger nesnesi - bu modül için özel log kaydı
 logger = logging.getLogger(__name__)
 
 class ProductDetailedAnalyzer:
     """Ürünleri tek tek detaylıca analiz eden sınıf"""
     
+    # Zaman bütçesi eşikleri (sn) - altında kalınca opsiyonel aşama atlanır
+    THEMES_MIN_BUDGET = 20.0
+    AI_ANALYSIS_MIN_BUDGET = 5.0
+    
+    # JSON çağrılarının yanıt şemaları (SDK destekliyorsa istekte response_schema olarak gönderilir)
+    RESPONSE_SCHEMAS = {'product': ProductAnalysis, 'compare': ComparisonAnalysis}
+    # Kısa pencerede biriken istekleri tek çağrıda gönderilebilen küçük çağrılar; 'product'
+    # toplanmaz (tema ile aynı pencereye düşer, toplu çağrıda ProductAnalysis şeması gönderilemez)
+    BATCH_CALL_TYPES = ('themes',)
+    # Açık bir akış (SSE) varsa parçaları tarayıcıya iletilen uzun çağrılar
+    STREAM_CALL_TYPES = ('product', 'compare')
+    
     def __init__(self, api_key: str):
         """
         Args:
             api_key: Gemini API anahtarı
         """
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        # Async SDK çağrısı veya ayrılmış sınırlı thread havuzu (varsayılan executor'ı tüketmez)
+        self.llm = get_llm_client(MODEL_NAME)
+        self.model = self.llm.model
+        
+        # Aynı prompt için kalıcı yanıt önbelleği (LLM_CACHE_ENABLED=false ise None)
+        self.llm_cache = get_llm_cache()
+        # Tüm Gemini çağrılarının paylaştığı RPM/TPM sınırlayıcısı (kapalıysa None)
+        self.rate_limiter = get_rate_limiter()
+        
+        # LLM çağrı tipi bazlı gecikme histogramları - timeout'lar bunlardan türetilir
+        self.latency = get_latency_tracker()
+        
+        # Gemini'nin geçici hataları (timeout, 429, 503) için ortak yeniden deneme politikası
+        config = Config()
+        self.retry_policy = get_retry_policy(
+            'llm',
+            max_retries=config.llm_max_retries,
+            base_delay=config.retry_base_delay,
+            max_delay=config.retry_max_delay
+        )
+        
+        # Prompt'lar çağrı tipine ayrılmış token bütçesiyle doldurulur (LLM_PROMPT_BUDGETS)
+        self.config = config
+        
+        # Yorum duygu sınıflandırması (tek derlenmiş regex, toplu API)
+        self.sentiment = get_sentiment_engine()
+        
+        # Toplu yükte ürünlerin tema/analiz istekleri tek prompt'ta birleştirilir
+        self.batcher = LLMBatcher(
+            self._call_model,
+            window=config.llm_batch_window_ms / 1000,
+            max_items=config.llm_batch_max_items
+        ) if config.llm_batch_enabled else None
         
         # Veri dizinleri
         self.data_dir = Path("data")
@@ -61,9 +122,91 @@ class ProductDetailedAnalyzer:
         
         logger.info("Detaylı analiz sistemi başlatıldı")
     
+    async def _generate(self, prompt: str, call_type: str, timeout: Optional[float] = None,
+                        deadline: Optional[Deadline] = None):
+        """
+        Gemini çağrısı - geçici hatalarda üstel bekleme ile yeniden denenir
+        
+        Aynı model/şablon sürümü/prompt için önbellekte yanıt varsa model çağrılmaz
+        ve kota harcanmaz (dönen nesne yalnızca .text sunar). Toplulaştırılabilen
+        çağrılar mikro-toplayıcıya gider; bekleme deadline ile sınırlanır. Açık bir
+        akış varsa STREAM_CALL_TYPES çağrıları toplayıcıya girmez, parçalar geldikçe
+        akışa iletilir (dönen tam metin akışsız çağrıyla aynı şekilde ayrıştırılır).
+        
+        Args:
+            prompt: Model girdisi
+            call_type: Gecikme istatistiği anahtarı ('themes', 'product', 'compare')
+            timeout: Deneme başına süre; verilmezse geçmiş gecikmelerden türetilir
+            deadline: İsteğin zaman ve yeniden deneme bütçesi
+        """
+        started = time.monotonic()
+        sink = current_sink() if call_type in self.STREAM_CALL_TYPES else None
+        cache_key = None
+        if self.llm_cache is not None:
+            cache_key, cached = self.llm_cache.lookup(MODEL_NAME, call_type, prompt)
+            if cached is not None:
+                response = CachedResponse(cached)
+                record_call(call_type, prompt, response, time.monotonic() - started, source=CACHE)
+                if sink is not None:
+                    sink.replay(call_type, cached)
+                return response
+        
+        if sink is not None:
+            response = await self._call_model(prompt, call_type, timeout=timeout, deadline=deadline, sink=sink)
+        elif self.batcher is not None and call_type in self.BATCH_CALL_TYPES:
+            wait = None if deadline is None or deadline.unlimited else deadline.remaining()
+            response = await asyncio.wait_for(
+                self.batcher.submit(prompt, call_type, timeout=timeout, deadline=deadline), timeout=wait
+            )
+        else:
+            response = await self._call_model(prompt, call_type, timeout=timeout, deadline=deadline)
+        record_call(call_type, prompt, response, time.monotonic() - started,
+                    source=BATCH if getattr(response, 'batched', False) else MODEL)
+        
+        if cache_key is not None:
+            self.llm_cache.store(cache_key, response, model=MODEL_NAME, call_type=call_type)
+        return response
+    
+    async def _call_model(self, prompt: str, call_type: str, timeout: Optional[float] = None,
+                          deadline: Optional[Deadline] = None, sink: Optional[StreamSink] = None):
+        """
+        Doğrudan model çağrısı (önbellek ve toplulaştırma olmadan); kota sırası deadline ile sınırlı
+        
+        sink verilirse çağrı akışlı yapılır; yeniden denemede önceki parçalar için 'reset' gönderilir.
+        """
+        deadline = ensure_deadline(deadline)
+        attempts = 0
+        # JSON çağrıları (toplu çağrılar dahil) JSON MIME tipi ve şemayla istenir
+        output_kwargs = structured_output_kwargs(self.RESPONSE_SCHEMAS.get(call_type)) \
+            if call_type in JSON_CALL_TYPES or call_type == BATCH_CALL_TYPE else {}
+        
+        async def call():
+            nonlocal attempts
+            # Gecikme örneği istemcide, slot alındıktan sonra ölçülür; slot beklemesi bütçeyle sınırlı
+            attempt_timeout = deadline.cap(timeout or self.latency.timeout('llm', call_type))
+            slot_timeout = None if deadline.unlimited else deadline.remaining()
+            if sink is None:
+                return await self.llm.generate(prompt, timeout=attempt_timeout, call_type=call_type,
+                                               slot_timeout=slot_timeout, **output_kwargs)
+            if attempts:
+                sink.reset(call_type)
+            attempts += 1
+            return await self.llm.generate_stream(
+                prompt, sink.text_handler(call_type), timeout=attempt_timeout, call_type=call_type,
+                slot_timeout=slot_timeout, **output_kwargs
+            )
+        
+        async def attempt():
+            if self.rate_limiter is None:
+                return await call()
+            wait_limit = None if deadline.unlimited else deadline.remaining()
+            return await self.rate_limiter.run(prompt, call, timeout=wait_limit)
+        
+        return await self.retry_policy.run(attempt, deadline=deadline, label=call_type)
+    
     def analyze_sentiment_simple(self, text: str) -> str:
         """
-        Basit duygu analizi - Anahtar kelime tabanlı
+        Basit duygu analizi - Anahtar kelime tabanlı (kelime sınırı ve olumsuzlamaya duyarlı)
         
         Args:
             text: Analiz edilecek metin
@@ -71,29 +214,7 @@ class ProductDetailedAnalyzer:
         Returns:
             'positive', 'negative' veya 'neutral'
         """
-        if not text:
-            return 'neutral'
-            
-        # Türkçe duygu analizi için anahtar kelimeler
-        positive_words = [
-            'iyi', 'güzel', 'harika', 'mükemmel', 'tavsiye', 'beğendim', 
-            'kaliteli', 'başarılı', 'süper', 'müthiş', 'hızlı', 'ucuz'
-        ]
-        negative_words = [
-            'kötü', 'berbat', 'sorun', 'problem', 'beğenmedim', 
-            'kalitesiz', 'başarısız', 'pahalı', 'yavaş', 'eksik'
-        ]
-        
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        
-        if positive_count > negative_count:
-            return 'positive'
-        elif negative_count > positive_count:
-            return 'negative'
-        else:
-            return 'neutral'
+        return self.sentiment.classify(text)
     
     def get_product_id(self, url: str) -> str:
         """URL'den benzersiz ürün ID'si oluştur"""
@@ -111,26 +232,40 @@ class ProductDetailedAnalyzer:
         
         return f"{domain}_{product_id}"
     
-    async def analyze_single_product(self, product_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Tek bir ürünü detaylıca analiz et"""
+    async def analyze_single_product(self, product_data: Dict[str, Any],
+                                     deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Tek bir ürünü detaylıca analiz et
+        
+        Aşamalar bağımlılık grafiği olarak çalışır: tema çıkarma ve ürün analizi
+        (iki LLM çağrısı) ile yerel fiyat/puan/duygu hesapları aynı anda başlar,
+        toplam süre en yavaş aşamaya iner.
+        
+        Args:
+            product_data: Scraper çıktısı
+            deadline: Uçtan uca zaman bütçesi; azaldığında tema çıkarma ve AI analizi atlanır
+        """
+        deadline = ensure_deadline(deadline)
         try:
             product_id = self.get_product_id(product_data.get('url', ''))
             logger.info(f"Ürün detaylı analizi başlatılıyor: {product_id}")
+            reviews = product_data.get('reviews', [])
             
-            # Ürün temel bilgileri
-            basic_info = self._extract_basic_info(product_data)
-            
-            # Yorum analizi
-            review_analysis = await self._analyze_reviews(product_data.get('reviews', []))
-            
-            # Fiyat analizi
-            price_analysis = self._analyze_price(product_data.get('price', ''))
-            
-            # Rating analizi
-            rating_analysis = self._analyze_rating(product_data.get('rating', ''))
-            
-            # AI destekli genel analiz
-            ai_analysis = await self._ai_analyze_product(product_data)
+            graph = StageGraph()
+            graph.add('basic_info', lambda: self._extract_basic_info(product_data))
+            graph.add('review_stats', lambda: self._review_statistics(reviews))
+            graph.add('themes', lambda: self._review_themes(reviews, deadline))
+            graph.add('review_analysis', self._merge_review_analysis, deps=('review_stats', 'themes'))
+            graph.add('price_analysis', lambda: self._analyze_price(product_data.get('price', '')))
+            graph.add('rating_analysis', lambda: self._analyze_rating(product_data.get('rating', '')))
+            graph.add('ai_analysis', lambda: self._ai_analysis_stage(product_data, deadline))
+            # Aşamaların LLM çağrıları (token, süre, maliyet) bu ürünün özetinde toplanır
+            with usage_scope() as llm_usage:
+                stages = await graph.run()
+            logger.info(
+                f"Analiz aşamaları {graph.timings['total']['seconds']:.1f} sn sürdü "
+                f"(tema {graph.timings['themes']['seconds']:.1f} sn, AI {graph.timings['ai_analysis']['seconds']:.1f} sn)"
+            )
             
             # Detaylı analiz sonucu
             detailed_analysis = {
@@ -138,11 +273,16 @@ class ProductDetailedAnalyzer:
                 'timestamp': datetime.now().isoformat(),
                 'url': product_data.get('url', ''),
                 'domain': product_data.get('domain', ''),
-                'basic_info': basic_info,
-                'review_analysis': review_analysis,
-                'price_analysis': price_analysis,
-                'rating_analysis': rating_analysis,
-                'ai_analysis': ai_analysis,
+                'basic_info': stages['basic_info'],
+                'review_analysis': stages['review_analysis'],
+                'price_analysis': stages['price_analysis'],
+                'rating_analysis': stages['rating_analysis'],
+                'ai_analysis': stages['ai_analysis'],
+                'partial': deadline.partial or bool(product_data.get('partial')),
+                'time_budget': deadline.to_dict(),
+                'stage_timings': graph.timings,
+                'llm_usage': llm_usage.to_dict(),
+                'sampling': product_data.get('sampling'),
                 'raw_data': product_data
             }
             
@@ -192,8 +332,8 @@ class ProductDetailedAnalyzer:
             'has_color': bool(re.search(r'(siyah|beyaz|mavi|kırmızı|gri|gold|rose|pembe)', title.lower()))
         }
     
-    async def _analyze_reviews(self, reviews: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Yorumları detaylı analiz et"""
+    def _review_statistics(self, reviews: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Yorumların yerel istatistikleri: duygu dağılımı, uzunluk, dil, kalite (LLM yok)"""
         if not reviews:
             return {
                 'total_reviews': 0,
@@ -203,39 +343,14 @@ class ProductDetailedAnalyzer:
                 'languages': {}
             }
         
-        sentiment_scores = {'positive': 0, 'negative': 0, 'neutral': 0}
-        total_length = 0
-        languages = {}
-        all_texts = []
-        
-        for review in reviews:
-            text = review.get('text', '').strip()
-            if not text:
-                continue
-                
-            all_texts.append(text)
-            total_length += len(text)
-            
-            # Basit duygu analizi (TextBlob alternatifi)
-            try:
-                sentiment = self.analyze_sentiment_simple(text)
-                
-                if sentiment == 'positive':
-                    sentiment_scores['positive'] += 1
-                elif sentiment == 'negative':
-                    sentiment_scores['negative'] += 1
-                else:
-                    sentiment_scores['neutral'] += 1
-                
-                # Varsayılan dil Türkçe
-                languages['tr'] = languages.get('tr', 0) + 1
-                    
-            except Exception as e:
-                logger.debug(f"Yorum analizi hatası: {e}")
-                sentiment_scores['neutral'] += 1
+        texts = [text for text in (review.get('text', '').strip() for review in reviews) if text]
+        total_length = sum(len(text) for text in texts)
+        # Varsayılan dil Türkçe
+        languages = {'tr': len(texts)} if texts else {}
         
-        # Ana temaları AI ile çıkar
-        key_themes = await self._extract_review_themes(all_texts[:20])  # İlk 20 yorum
+        # Basit duygu analizi (TextBlob alternatifi) - tüm yorumlar tek geçişte
+        summary = self.sentiment.summarize(texts)
+        sentiment_scores = {key: summary[key] for key in ('positive', 'negative', 'neutral')}
         
         return {
             'total_reviews': len(reviews),
@@ -244,45 +359,74 @@ class ProductDetailedAnalyzer:
                 k: round(v / len(reviews) * 100, 2) if reviews else 0
                 for k, v in sentiment_scores.items()
             },
-            'key_themes': key_themes,
+            'key_themes': [],
             'average_length': round(total_length / len(reviews), 2) if reviews else 0,
             'languages': languages,
             'review_quality_score': self._calculate_review_quality(reviews)
         }
     
-    async def _extract_review_themes(self, texts: List[str]) -> List[str]:
+    async def _review_themes(self, reviews: List[Dict[str, Any]], deadline: Deadline) -> List[str]:
+        """Ana temaları AI ile çıkar (opsiyonel - bütçe azsa varsayılan temalar)"""
+        texts = [text for text in (review.get('text', '').strip() for review in reviews) if text]
+        if not texts:
+            return []
+        if not deadline.has_time(self.THEMES_MIN_BUDGET):
+            logger.info("Zaman bütçesi az, tema çıkarma atlanıyor")
+            deadline.skip('theme_extraction')
+            return ['kalite', 'fiyat', 'hızlı teslimat']
+        return await self._extract_review_themes(
+            texts, timeout=deadline.cap(self.latency.timeout('llm', 'themes')), deadline=deadline
+        )
+    
+    @staticmethod
+    def _merge_review_analysis(review_stats: Dict[str, Any], themes: List[str]) -> Dict[str, Any]:
+        """Yerel istatistiklerle AI temalarını tek yorum analizi sonucunda birleştir"""
+        review_analysis = dict(review_stats)
+        if review_stats.get('total_reviews'):
+            review_analysis['key_themes'] = themes
+        return review_analysis
+    
+    async def _ai_analysis_stage(self, product_data: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+        """AI destekli genel analiz (bütçe yetmiyorsa kural tabanlı analiz)"""
+        if deadline.has_time(self.AI_ANALYSIS_MIN_BUDGET):
+            return await self._ai_analyze_product(
+                product_data, timeout=deadline.cap(self.latency.timeout('llm', 'product')), deadline=deadline
+            )
+        logger.warning("Zaman bütçesi doldu, AI analizi atlanıyor")
+        deadline.skip('ai_analysis')
+        return self._create_fallback_analysis(product_data, "Zaman bütçesi doldu")
+    
+    async def _extract_review_themes(self, texts: List[str], timeout: Optional[float] = None,
+                                     deadline: Optional[Deadline] = None) -> List[str]:
         """Yorumlardan ana temaları AI ile çıkar - Timeout optimized"""
         if not texts:
             return []
+        if timeout is None:
+            timeout = self.latency.timeout('llm', 'themes')
         
         try:
-            # Sadece ilk 3 yorumu al ve kısalt
-            short_texts = []
-            for text in texts[:3]:
-                if len(text) > 100:
-                    short_texts.append(text[:100] + "...")
-                else:
-                    short_texts.append(text)
-            
-            combined_text = " | ".join(short_texts)
-            
-            prompt = f"""
-            Yorumlar: {combined_text}
+            template = """
+            Yorumlar: {reviews}
             
             5 tema çıkar (tek kelime):
             kalite, fiyat, hız, tasarım, servis
             """
+            # Yorumlar sabit sayı/uzunluk yerine tema bütçesine sığdığı kadar alınır
+            budget = PromptBudget(self.config.prompt_budget('themes'))
+            budget.reserve(template)
+            combined_text = " | ".join(budget.fit(texts, max_item_tokens=40))
+            record_budget('themes', budget)
+            
+            prompt = template.format(reviews=combined_text)
             
             try:
-                response = await asyncio.wait_for(
-                    asyncio.to_thread(self.model.generate_content, prompt),
-                    timeout=15.0  # 15 saniye timeout
-                )
+                response = await self._generate(prompt, 'themes', timeout=timeout, deadline=deadline)
                 
                 themes = []
                 words = response.text.strip().replace(',', ' ').split()
                 for word in words[:5]:
-                    clean_word = word.strip('.,;:!?').lower()
+                    # JSON dizisi olarak gelen yanıtın tırnak/köşeli parantezleri de atılır
+                    clean_word = word.strip('.,;:!?"\'[]').lower()
                     if clean_word and len(clean_word) > 2:
                         themes.append(clean_word)
                 
@@ -407,45 +551,46 @@ class ProductDetailedAnalyzer:
                 'error': str(e)
             }
     
-    async def _ai_analyze_product(self, product_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _ai_analyze_product(self, product_data: Dict[str, Any],
+                                  timeout: Optional[float] = None,
+                                  deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """AI ile kapsamlı ürün analizi - Geliştirilmiş ve güvenli"""
+        if timeout is None:
+            timeout = self.latency.timeout('llm', 'product')
         try:
             title = product_data.get('title', '')
             price = product_data.get('price', '')
             rating = product_data.get('rating', '')
             reviews = product_data.get('reviews', [])
             
-            # İlk 5 yorumu al ve kısalt (hızlı analiz için)
-            sample_reviews = []
+            # Yorumları olumlu/olumsuz ayır
             positive_reviews = []
             negative_reviews = []
             
-            for r in reviews[:10]:  # İlk 10 yorumu incele
-                text = r.get('text', '')[:100]  # İlk 100 karakter
+            for r in reviews:
+                text = ' '.join(r.get('text', '').split())
+                if not text:
+                    continue
                 rating_num = self._extract_rating_number(r.get('rating', ''))
                 
                 if rating_num >= 4:
                     positive_reviews.append(text)
                 elif rating_num <= 2:
                     negative_reviews.append(text)
-                else:
-                    sample_reviews.append(text)
-            
-            # En iyi ve en kötü yorumları al
-            selected_reviews = (positive_reviews[:2] + negative_reviews[:2] + sample_reviews[:1])[:5]
             
             # Renk analizi
             color_info = self._extract_color_from_title(title)
             
             # Yapıcı ve detaylı prompt
-            prompt = f"""
-            Ürün: {title[:100]}
+            def build_prompt(title: str, positives: List[str], negatives: List[str]) -> str:
+                return f"""
+            Ürün: {title}
             Fiyat: {price}
             Rating: {rating}
             Renkler: {color_info}
             
-            Olumlu yorumlar: {" | ".join(positive_reviews[:2])}
-            Olumsuz yorumlar: {" | ".join(negative_reviews[:2])}
+            Olumlu yorumlar: {" | ".join(positives)}
+            Olumsuz yorumlar: {" | ".join(negatives)}
             
             Lütfen bu ürün için detaylı ve yapıcı analiz yap:
 
@@ -465,42 +610,40 @@ class ProductDetailedAnalyzer:
             Sadece JSON formatında cevap ver:
             """
             
+            # Olumlu ve olumsuz yorumlar sırayla bütçeye sığdığı kadar eklenir
+            budget = PromptBudget(self.config.prompt_budget('product'))
+            budget.reserve(build_prompt('', [], []))
+            title = budget.clip(title, max_tokens=40)
+            labelled = []
+            for index in range(max(len(positive_reviews), len(negative_reviews))):
+                labelled.extend((positive, group[index])
+                                for positive, group in ((True, positive_reviews), (False, negative_reviews))
+                                if index < len(group))
+            fitted = budget.fit([text for _, text in labelled], max_item_tokens=60)
+            positive_reviews = [text for (positive, _), text in zip(labelled, fitted) if positive]
+            negative_reviews = [text for (positive, _), text in zip(labelled, fitted) if not positive]
+            record_budget('product', budget)
+            
+            prompt = build_prompt(title, positive_reviews, negative_reviews)
+            
             # Kısa timeout ile deneme
             try:
-                response = await asyncio.wait_for(
-                    asyncio.to_thread(self.model.generate_content, prompt),
-                    timeout=30.0  # 30 saniye timeout
-                )
+                response = await self._generate(prompt, 'product', timeout=timeout, deadline=deadline)
                 
-                # JSON parse et - Geliştirilmiş
-                result_text = response.text.strip()
-                
-                # JSON kısmını temizle ve çıkar
-                if '{' in result_text and '}' in result_text:
-                    json_start = result_text.find('{')
-                    json_end = result_text.rfind('}') + 1
-                    json_str = result_text[json_start:json_end]
-                    
-                    # Yaygın JSON hatalarını düzelt
-                    json_str = self._fix_json_format(json_str)
-                    
-                    ai_result = json.loads(json_str)
-                    
-                    # Eksik alanları tamamla
-                    ai_result = self._complete_ai_analysis(ai_result, product_data)
-                    
-                    return ai_result
-                else:
-                    raise ValueError("JSON bulunamadı")
+                # Şemaya göre doğrula - eksik/bozuk alanlar tek tek varsayılana döner
+                analysis, repaired = parse_structured(response.text, ProductAnalysis)
+                if repaired:
+                    logger.info(f"AI analizinde varsayılana dönen alanlar: {', '.join(repaired)}")
+                return analysis.model_dump()
                     
             except asyncio.TimeoutError:
                 logger.warning("AI analizi timeout, fallback kullanılıyor")
                 return self._create_fallback_analysis(product_data, "Timeout hatası")
-            except json.JSONDecodeError as je:
+            except StructuredOutputError as je:
                 logger.warning(f"JSON parse hatası: {je}")
                 return self._create_fallback_analysis(product_data, f"JSON hatası: {str(je)}")
             except Exception as e:
-                if "quota" in str(e).lower() or "429" in str(e):
+                if isinstance(e, RateLimitTimeout) or is_rate_limited(e):
                     logger.warning("API quota aşıldı, fallback kullanılıyor")
                     return self._create_fallback_analysis(product_data, "API quota aşıldı")
                 else:
@@ -538,43 +681,6 @@ class ProductDetailedAnalyzer:
         
         return ', '.join(found_colors) if found_colors else 'renk belirtilmemiş'
     
-    def _fix_json_format(self, json_str: str) -> str:
-        """JSON formatını düzelt"""
-        try:
-            # Yaygın hatalar
-            json_str = json_str.replace("'", '"')  # Tek tırnak -> çift tırnak
-            json_str = re.sub(r'(\w+):', r'"\1":', json_str)  # Key'leri tırnak içine al
-            json_str = re.sub(r':\s*([^",\[\{\d][^",\]\}]*)', r': "\1"', json_str)  # Value'ları tırnak içine al
-            
-            # Son virgülü temizle
-            json_str = re.sub(r',\s*}', '}', json_str)
-            json_str = re.sub(r',\s*]', ']', json_str)
-            
-            return json_str
-        except:
-            return json_str
-    
-    def _complete_ai_analysis(self, ai_result: Dict[str, Any], product_data: Dict[str, Any]) -> Dict[str, Any]:
-        """AI analiz sonucunu tamamla"""
-        required_fields = {
-            'category': 'Elektronik',
-            'strengths': ['Kaliteli', 'Uygun fiyat'],
-            'weaknesses': ['Analiz edilemedi'],
-            'target_audience': 'Genel kullanıcı',
-            'market_position': 'Orta seviye',
-            'purchase_recommendation': 75,
-            'color_analysis': 'Renk analizi yapılamadı',
-            'price_competitiveness': 'Fiyat analizi yapılamadı',
-            'user_satisfaction': 'Yorum analizi yapılamadı',
-            'sales_potential': 'Orta seviye'
-        }
-        
-        for field, default_value in required_fields.items():
-            if field not in ai_result:
-                ai_result[field] = default_value
-        
-        return ai_result
-    
     def _create_fallback_analysis(self, product_data: Dict[str, Any], error_reason: str) -> Dict[str, Any]:
         """Fallback analiz oluştur - Kullanıcı dostu mesajlarla"""
         title = product_data.get('title', '')
@@ -758,19 +864,23 @@ class ProductDetailedAnalyzer:
                 }
             
             # Karşılaştırma analizi
+            with usage_scope() as llm_usage:
+                ai_comparison = await self._ai_compare_products(products)
+            comparison_id = f"comparison_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             comparison = {
+                'comparison_id': comparison_id,
                 'timestamp': datetime.now().isoformat(),
                 'total_products': len(products),
                 'price_comparison': self._compare_prices(products),
                 'rating_comparison': self._compare_ratings(products),
                 'review_comparison': self._compare_reviews(products),
-                'ai_comparison': await self._ai_compare_products(products),
+                'ai_comparison': ai_comparison,
                 'best_product': self._find_best_product(products),
+                'llm_usage': llm_usage.to_dict(),
                 'detailed_products': products
             }
             
             # Karşılaştırmayı kaydet
-            comparison_id = f"comparison_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             await self._save_comparison(comparison_id, comparison)
             
             return comparison
@@ -863,25 +973,27 @@ class ProductDetailedAnalyzer:
     async def _ai_compare_products(self, products: List[Dict[str, Any]]) -> Dict[str, Any]:
         """AI ile ürün karşılaştırması ve önerisi - Geliştirilmiş AI yorumu"""
         try:
-            # Ürün bilgilerini hazırla
+            # Ürün bilgilerini hazırla - ürün sayısı karşılaştırma bütçesiyle sınırlı
             product_summaries = []
-            for i, product in enumerate(products[:4], 1):  # Max 4 ürün
+            for i, product in enumerate(products, 1):
                 basic_info = product.get('basic_info', {})
                 price_analysis = product.get('price_analysis', {})
                 rating_analysis = product.get('rating_analysis', {})
                 ai_analysis = product.get('ai_analysis', {})
                 
-                summary = f"""Ürün {i}: {basic_info.get('title', '')[:60]}
+                title = truncate_to_tokens(basic_info.get('title', ''), 25)
+                summary = f"""Ürün {i}: {title}
 - Fiyat: {price_analysis.get('original_text', 'Belirtilmemiş')}
 - Rating: {rating_analysis.get('original_text', 'Belirtilmemiş')}
 - AI Önerisi: {ai_analysis.get('purchase_recommendation', 0)}%
 - Kategori: {ai_analysis.get('category', 'Bilinmeyen')}"""
                 product_summaries.append(summary)
             
-            prompt = f"""
+            def build_prompt(summaries: List[str]) -> str:
+                return f"""
             Sen bir ürün karşılaştırma uzmanısın. Aşağıdaki ürünleri analiz et ve karşılaştır:
 
-            {chr(10).join(product_summaries)}
+            {chr(10).join(summaries)}
             
             Lütfen aşağıdaki JSON formatında detaylı bir analiz ve öneri ver:
             {{
@@ -902,39 +1014,32 @@ class ProductDetailedAnalyzer:
             Sadece JSON formatında yanıt ver, başka metin ekleme.
             """
             
+            budget = PromptBudget(self.config.prompt_budget('compare'))
+            budget.reserve(build_prompt([]))
+            product_summaries = budget.fit(product_summaries, truncate=False)
+            record_budget('compare', budget)
+            prompt = build_prompt(product_summaries)
+            
             try:
-                response = await asyncio.wait_for(
-                    asyncio.to_thread(self.model.generate_content, prompt),
-                    timeout=25.0  # 25 saniye timeout
-                )
+                response = await self._generate(prompt, 'compare')
                 
-                result_text = response.text.strip()
-                # JSON'u temizle
-                if '```json' in result_text:
-                    result_text = result_text.split('```json')[1].split('```')[0]
-                elif '```' in result_text:
-                    result_text = result_text.split('```')[1]
+                comparison, repaired = parse_structured(response.text, ComparisonAnalysis)
+                if repaired:
+                    logger.info(f"AI karşılaştırmasında varsayılana dönen alanlar: {', '.join(repaired)}")
+                ai_result = comparison.model_dump()
                 
-                if '{' in result_text and '}' in result_text:
-                    json_start = result_text.find('{')
-                    json_end = result_text.rfind('}') + 1
-                    clean_json = result_text[json_start:json_end]
-                    
-                    # JSON'u parse et
-                    ai_result = json.loads(clean_json)
-                    
-                    # Sonucu zenginleştir
-                    ai_result['ai_recommendation'] = {
-                        'recommended_product': ai_result.get('recommended_product', 'Belirtilmemiş'),
-                        'reason': ai_result.get('reason', 'Detaylı analiz sonucu bu ürün öne çıkmaktadır.'),
-                        'confidence_score': ai_result.get('confidence_score', 75)
-                    }
-                    
-                    return ai_result
+                # Sonucu zenginleştir
+                ai_result['ai_recommendation'] = {
+                    'recommended_product': ai_result['recommended_product'],
+                    'reason': ai_result['reason'],
+                    'confidence_score': ai_result['confidence_score']
+                }
+                
+                return ai_result
                     
             except asyncio.TimeoutError:
                 logger.warning("AI karşılaştırma timeout - varsayılan sonuç dönülüyor")
-            except json.JSONDecodeError as e:
+            except StructuredOutputError as e:
                 logger.warning(f"AI JSON parse hatası: {e}")
             except Exception as e:
                 logger.warning(f"AI analiz hatası: {e}")
@@ -1043,6 +1148,20 @@ class ProductDetailedAnalyzer:
             logger.error(f"Ürün ID listesi hatası: {e}")
             return []
     
+    def get_comparison(self, comparison_id: str) -> Optional[Dict[str, Any]]:
+        """Kaydedilmiş karşılaştırmayı getir"""
+        if not re.fullmatch(r'comparison_\d{8}_\d{6}', comparison_id):
+            return None
+        try:
+            json_path = self.analysis_dir / f"{comparison_id}.json"
+            if json_path.exists():
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            return None
+        except Exception as e:
+            logger.error(f"Karşılaştırma yükleme hatası: {e}")
+            return None
+    
     def get_product_analysis(self, product_id: str) -> Optional[Dict[str, Any]]:
         """Belirli bir ürünün analizini getir"""
         try:
@@ -0,0 +1,116 @@
+"""
+Prompt Token Bütçesi
+Prompt'lar sabit karakter kesmeleri ([:100], ilk 5 yorum ...) yerine çağrı tipine
+ayrılmış token bütçesine göre doldurulur:
+
+- Şablon ve zorunlu alanlar önce bütçeden düşülür (reserve)
+- Değişken parçalar (yorumlar, ürün özetleri) öncelik sırasıyla eklenir; her parça
+  kendi üst sınırına ve kalan bütçeye göre kelime sınırından kısaltılır
+- Bütçe bitince kalan parçalar atlanır; kullanım to_dict() ile raporlanır
+
+Kullanım:
+    budget = PromptBudget(600)
+    budget.reserve(template)
+    title = budget.clip(title, max_tokens=40)
+    reviews = budget.fit(review_texts, max_item_tokens=60)
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from analyzer.llm_usage import CHARS_PER_TOKEN, estimate_tokens
+
+
+def _normalize(text: str) -> str:
+    """Fazla boşlukları at (satır sonları korunur)"""
+    return '\n'.join(' '.join(line.split()) for line in (text or '').splitlines() if line.strip())
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Metni yaklaşık max_tokens'a kelime sınırından kısalt"""
+    text = _normalize(text)
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    if max_chars <= 1:
+        return ''
+    cut = text[:max_chars - 1]
+    space = max(cut.rfind(' '), cut.rfind('\n'))
+    if space > max_chars // 2:
+        cut = cut[:space]
+    return cut.rstrip(' ,.;:') + '…'
+
+
+class PromptBudget:
+    """Bir prompt'un token bütçesi"""
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max(1, max_tokens)
+        self.used = 0
+        self.included = 0
+        self.truncated = 0
+        self.dropped = 0
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.max_tokens - self.used)
+
+    def reserve(self, *texts: str) -> None:
+        """Şablon gibi kısaltılamayan metinleri bütçeden düş"""
+        self.used += sum(estimate_tokens(text) for text in texts)
+
+    def clip(self, text: str, max_tokens: Optional[int] = None) -> str:
+        """Tek alanı kendi sınırına ve kalan bütçeye sığdır"""
+        limit = self.remaining if max_tokens is None else min(max_tokens, self.remaining)
+        clipped = truncate_to_tokens(text or '', limit)
+        if clipped != _normalize(text):
+            self.truncated += 1
+        self.used += estimate_tokens(clipped)
+        return clipped
+
+    def fit(self, texts: Sequence[str], max_item_tokens: Optional[int] = None,
+            min_item_tokens: int = 8, max_tokens: Optional[int] = None,
+            truncate: bool = True) -> List[str]:
+        """
+        Parçaları öncelik sırasıyla bütçeye sığdır
+
+        Args:
+            texts: Önem sırasına dizilmiş parçalar
+            max_item_tokens: Parça başına üst sınır
+            min_item_tokens: Kalan bütçe bundan azsa eklemeyi bırak
+            max_tokens: Bu çağrının kullanabileceği en fazla bütçe (ör. listeler arası paylaştırma)
+            truncate: False ise parçalar bölünmez; sığmayan ilk parçada durulur (ör. ürün özetleri)
+
+        Returns:
+            Sığan parçalar (boş olmayan girdilerin ön eki, kısaltılmış halleriyle)
+        """
+        allowance = self.remaining if max_tokens is None else min(max_tokens, self.remaining)
+        fitted: List[str] = []
+        for position, text in enumerate(texts):
+            text = _normalize(text)
+            if not text:
+                continue
+            if allowance < min_item_tokens:
+                self.dropped += len(texts) - position
+                break
+            limit = allowance if max_item_tokens is None else min(max_item_tokens, allowance)
+            if not truncate and estimate_tokens(text) > limit:
+                self.dropped += len(texts) - position
+                break
+            clipped = truncate_to_tokens(text, limit)
+            if clipped != text:
+                self.truncated += 1
+            cost = estimate_tokens(clipped)
+            allowance -= cost
+            self.used += cost
+            self.included += 1
+            fitted.append(clipped)
+        return fitted
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'budget': self.max_tokens,
+            'used': self.used,
+            'items': self.included,
+            'truncated': self.truncated,
+            'dropped': self.dropped
+        }
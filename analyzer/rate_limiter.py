@@ -0,0 +1,428 @@
+"""
+Merkezi Gemini Hız Sınırlayıcı ve Kota Yöneticisi
+Tüm Gemini çağrıları (detaylı analiz, karşılaştırma, GeminiAnalyzer) tek bir
+sınırlayıcıdan geçer; kotaya çarpıp yedek analize düşmek yerine istekler kotanın
+izin verdiği hızda sıraya alınır.
+
+- RPM ve TPM için iki token kovası (istek ve tahmini token sayısı birlikte düşülür)
+- Öncelik kuyruğu: etkileşimli istekler (web formu) toplu işlerin (tarama, izleme) önüne geçer
+- 429 / ResourceExhausted alınınca tüm çağrılar sunucunun istediği süre (retry-after)
+  kadar durdurulur; süre hataya retry_after olarak eklenir, yeniden deneme buna uyar
+- LLM_RATE_LIMIT_SHARED_PATH verilirse kova durumu SQLite üzerinden aynı makinedeki
+  tüm worker süreçleriyle paylaşılır
+- Sayaçlar snapshot() ile izlenir
+
+Kullanım:
+    limiter = get_rate_limiter()
+    with llm_priority(BULK):
+        async with limiter.limit(prompt):
+            response = await call_gemini(prompt)
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from analyzer.llm_usage import estimate_tokens, response_token_count
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BULK: 'bulk'}
+
+_priority: ContextVar[int] = ContextVar('llm_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(level: int) -> Iterator[None]:
+    """Bu bağlamda (ve içinde açılan görevlerde) yapılan LLM çağrılarının önceliği"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class RateLimitTimeout(Exception):
+    """Kota sırası isteğin zaman bütçesi içinde gelmedi"""
+
+    # Yeniden denemek sırayı kısaltmaz; çağıran yedek sonuca geçer
+    retry_class = 'permanent'
+
+    def __init__(self, waited: float):
+        self.waited = waited
+        super().__init__(f"Gemini kota sırası {waited:.1f} sn içinde gelmedi")
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Hata kota/hız sınırı kaynaklı mı (429, ResourceExhausted)?"""
+    for attr in ('code', 'status_code', 'status'):
+        if getattr(error, attr, None) == 429:
+            return True
+    if 'exhausted' in type(error).__name__.lower():
+        return True
+    message = str(error).lower()
+    return '429' in message or 'quota' in message or 'rate limit' in message
+
+
+_RETRY_PATTERNS = (
+    re.compile(r'retry in\s+(\d+(?:\.\d+)?)\s*s', re.IGNORECASE),
+    re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)', re.IGNORECASE),
+    re.compile(r'retry[- ]after[:=\s]+(\d+(?:\.\d+)?)', re.IGNORECASE),
+)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Sunucunun önerdiği bekleme (retry-after başlığı veya hata mesajı); yoksa None"""
+    value = getattr(error, 'retry_after', None)
+    if isinstance(value, (int, float)) and value > 0:
+        return float(value)
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        header = headers.get('Retry-After') or headers.get('retry-after')
+        if header is not None:
+            return max(0.0, float(header))
+    except (TypeError, ValueError, AttributeError):
+        pass
+    message = str(error)
+    for pattern in _RETRY_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def _refill(level: float, updated: float, now: float, per_minute: float, capacity: float) -> float:
+    return min(capacity, level + max(0.0, now - updated) * per_minute / 60.0)
+
+
+class _LocalState:
+    """Süreç içi kova durumu"""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.rpm = rpm
+        self.tpm = tpm
+        now = time.time()
+        self._levels = {'rpm': [float(rpm), now], 'tpm': [float(tpm), now]}
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self) -> Tuple[Dict[str, List[float]], float]:
+        return self._levels, self._paused_until
+
+    def _store(self, levels: Dict[str, List[float]], paused_until: float) -> None:
+        self._levels, self._paused_until = levels, paused_until
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            yield
+
+    def reserve(self, tokens: int) -> float:
+        """1 istek + tokens düşmeyi dene; başarılıysa 0, değilse gereken bekleme (sn)"""
+        with self._transaction():
+            levels, paused_until = self._load()
+            now = time.time()
+            if paused_until > now:
+                return paused_until - now
+            rpm = _refill(*levels['rpm'], now, self.rpm, self.rpm)
+            tpm = _refill(*levels['tpm'], now, self.tpm, self.tpm)
+            # Kova kapasitesinden büyük istek, kova dolunca geçer (sonsuza kadar beklemesin)
+            tokens = min(tokens, self.tpm)
+            wait = max(
+                (1 - rpm) * 60.0 / self.rpm if rpm < 1 else 0.0,
+                (tokens - tpm) * 60.0 / self.tpm if tpm < tokens else 0.0
+            )
+            if wait <= 0:
+                rpm -= 1
+                tpm -= tokens
+            self._store({'rpm': [rpm, now], 'tpm': [tpm, now]}, paused_until)
+            return wait
+
+    def adjust(self, tokens_delta: float) -> None:
+        """Gerçek kullanım tahminden farklıysa TPM kovasını düzelt (negatife inebilir)"""
+        with self._transaction():
+            levels, paused_until = self._load()
+            now = time.time()
+            tpm = _refill(*levels['tpm'], now, self.tpm, self.tpm) - tokens_delta
+            levels = dict(levels, tpm=[min(tpm, self.tpm), now])
+            self._store(levels, paused_until)
+
+    def pause(self, seconds: float) -> float:
+        """Tüm çağrıları durdur ve kovaları boşalt; geçerli duraklama bitişini döndür"""
+        with self._transaction():
+            levels, paused_until = self._load()
+            now = time.time()
+            paused_until = max(paused_until, now + seconds)
+            self._store({'rpm': [0.0, now], 'tpm': [0.0, now]}, paused_until)
+            return paused_until
+
+    def levels(self) -> Dict[str, float]:
+        with self._transaction():
+            levels, paused_until = self._load()
+        now = time.time()
+        return {
+            'rpm_available': round(_refill(*levels['rpm'], now, self.rpm, self.rpm), 2),
+            'tpm_available': round(_refill(*levels['tpm'], now, self.tpm, self.tpm)),
+            'paused_for': round(max(0.0, paused_until - now), 1)
+        }
+
+
+class _SharedState(_LocalState):
+    """SQLite üzerinden worker süreçleri arasında paylaşılan kova durumu"""
+
+    def __init__(self, rpm: float, tpm: float, path: str):
+        super().__init__(rpm, tpm)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS llm_rate (name TEXT PRIMARY KEY, level REAL, updated REAL)')
+        now = time.time()
+        for name, value in (('rpm', rpm), ('tpm', tpm), ('paused_until', 0.0)):
+            self._db.execute('INSERT OR IGNORE INTO llm_rate VALUES (?, ?, ?)', (name, value, now))
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            # IMMEDIATE: oku-hesapla-yaz sırasında diğer süreçler bekler
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                yield
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+
+    def _load(self) -> Tuple[Dict[str, List[float]], float]:
+        rows = {name: (level, updated) for name, level, updated in self._db.execute('SELECT * FROM llm_rate')}
+        levels = {name: list(rows[name]) for name in ('rpm', 'tpm')}
+        return levels, rows['paused_until'][0]
+
+    def _store(self, levels: Dict[str, List[float]], paused_until: float) -> None:
+        self._db.executemany(
+            'UPDATE llm_rate SET level = ?, updated = ? WHERE name = ?',
+            [(levels['rpm'][0], levels['rpm'][1], 'rpm'), (levels['tpm'][0], levels['tpm'][1], 'tpm'),
+             (paused_until, time.time(), 'paused_until')]
+        )
+
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'tokens', 'wake')
+
+    def __init__(self, priority: int, seq: int, tokens: int):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.wake: Optional[asyncio.Future] = None
+
+    def __lt__(self, other: '_Waiter') -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class RateLimiter:
+    """RPM/TPM kovalı, öncelik kuyruklu Gemini sınırlayıcısı"""
+
+    def __init__(self, rpm: float = 15, tpm: float = 1_000_000, output_tokens: int = 512,
+                 throttle_backoff: float = 10.0, shared_path: str = ''):
+        """
+        Args:
+            rpm: Dakikadaki en fazla istek
+            tpm: Dakikadaki en fazla token (girdi + beklenen çıktı)
+            output_tokens: İstek başına tahmini çıktı tokenı (rezervasyona eklenir)
+            throttle_backoff: 429'da sunucu süre vermezse ilk duraklama (sn; art arda katlanır)
+            shared_path: Boş değilse kova durumunun paylaşıldığı SQLite dosyası
+        """
+        self.rpm = max(0.1, rpm)
+        self.tpm = max(1.0, tpm)
+        self.output_tokens = output_tokens
+        self.throttle_backoff = throttle_backoff
+        self.shared_path = shared_path
+        self._state = _SharedState(self.rpm, self.tpm, shared_path) if shared_path else _LocalState(self.rpm, self.tpm)
+
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._consecutive_throttles = 0
+        self.stats = {
+            'requests': 0, 'queued': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0,
+            'tokens_reserved': 0, 'tokens_used': 0, 'throttled': 0, 'paused_seconds': 0.0,
+            'timeouts': 0, 'by_priority': {name: 0 for name in PRIORITY_NAMES.values()}
+        }
+
+    def _wake_head(self) -> None:
+        if self._waiters:
+            wake = self._waiters[0].wake
+            if wake is not None and not wake.done():
+                wake.set_result(None)
+
+    async def acquire(self, tokens: int, priority: Optional[int] = None,
+                      timeout: Optional[float] = None) -> float:
+        """
+        Sıra ve kota gelene kadar bekle
+
+        Args:
+            tokens: Rezerve edilecek token
+            priority: INTERACTIVE/BULK; verilmezse bağlamdaki öncelik
+            timeout: En uzun bekleme (None = sınırsız)
+
+        Returns:
+            Beklenen süre (sn)
+
+        Raises:
+            RateLimitTimeout: timeout içinde sıra gelmezse
+        """
+        priority = current_priority() if priority is None else priority
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, next(self._seq), tokens)
+        heapq.heappush(self._waiters, waiter)
+        started = time.monotonic()
+        queued = False
+        try:
+            while True:
+                delay = None
+                if self._waiters[0] is waiter:
+                    delay = self._state.reserve(tokens)
+                    if delay <= 0:
+                        break
+                if not queued:
+                    queued = True
+                    self.stats['queued'] += 1
+                waited = time.monotonic() - started
+                if timeout is not None:
+                    if waited >= timeout:
+                        self.stats['timeouts'] += 1
+                        raise RateLimitTimeout(waited)
+                    delay = timeout - waited if delay is None else min(delay, timeout - waited)
+                # Baştaki bekleyen süre dolunca, diğerleri sıra kendilerine gelince uyanır
+                waiter.wake = loop.create_future()
+                try:
+                    await asyncio.wait_for(waiter.wake, delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+            self._wake_head()
+
+        waited = time.monotonic() - started
+        self.stats['requests'] += 1
+        self.stats['tokens_reserved'] += tokens
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        self.stats['by_priority'][name] = self.stats['by_priority'].get(name, 0) + 1
+        if queued:
+            self.stats['wait_seconds'] += waited
+            self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+        return waited
+
+    def record_usage(self, reserved: int, used: Optional[int]) -> None:
+        """Yanıttaki gerçek token kullanımıyla rezervasyonu düzelt"""
+        if used is None:
+            self.stats['tokens_used'] += reserved
+            return
+        self.stats['tokens_used'] += used
+        if used != reserved:
+            self._state.adjust(used - reserved)
+
+    def record_throttle(self, error: BaseException) -> float:
+        """
+        429 sonrası tüm çağrıları duraklat; süre hataya retry_after olarak eklenir
+
+        Returns:
+            Duraklama süresi (sn)
+        """
+        self._consecutive_throttles += 1
+        seconds = retry_after_seconds(error)
+        if seconds is None:
+            seconds = min(120.0, self.throttle_backoff * 2 ** (self._consecutive_throttles - 1))
+        self._state.pause(seconds)
+        self.stats['throttled'] += 1
+        self.stats['paused_seconds'] += seconds
+        try:
+            error.retry_after = seconds
+        except AttributeError:
+            pass
+        logger.warning(f"Gemini kota sınırı (429): tüm çağrılar {seconds:.1f} sn duraklatıldı")
+        return seconds
+
+    @asynccontextmanager
+    async def limit(self, prompt: str, timeout: Optional[float] = None):
+        """
+        Tek Gemini çağrısını sınırla: girişte kota bekler, 429'da duraklatır
+
+        Gövde yanıtı `ticket['response']` alanına koyarsa gerçek token kullanımı okunur.
+        """
+        reserved = estimate_tokens(prompt) + self.output_tokens
+        await self.acquire(reserved, timeout=timeout)
+        ticket: Dict[str, Any] = {'tokens': reserved, 'response': None}
+        try:
+            yield ticket
+        except Exception as e:
+            if is_rate_limited(e):
+                self.record_throttle(e)
+            raise
+        self._consecutive_throttles = 0
+        self.record_usage(reserved, response_token_count(ticket['response']))
+
+    async def run(self, prompt: str, func: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """func() çağrısını limit() içinde çalıştır ve yanıtını döndür"""
+        async with self.limit(prompt, timeout=timeout) as ticket:
+            ticket['response'] = await func()
+        return ticket['response']
+
+    def snapshot(self) -> Dict[str, Any]:
+        """İzleme için kova doluluğu, kuyruk ve sayaçlar"""
+        waiting = {name: 0 for name in PRIORITY_NAMES.values()}
+        for waiter in self._waiters:
+            name = PRIORITY_NAMES.get(waiter.priority, str(waiter.priority))
+            waiting[name] = waiting.get(name, 0) + 1
+        return dict(
+            self.stats,
+            wait_seconds=round(self.stats['wait_seconds'], 1),
+            max_wait_seconds=round(self.stats['max_wait_seconds'], 1),
+            paused_seconds=round(self.stats['paused_seconds'], 1),
+            by_priority=dict(self.stats['by_priority']),
+            rpm=self.rpm,
+            tpm=self.tpm,
+            shared=self.shared_path or None,
+            waiting=waiting,
+            **self._state.levels()
+        )
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Tüm Gemini çağrılarının paylaştığı tekil sınırlayıcı; LLM_RATE_LIMIT_ENABLED=false ise None"""
+    global _rate_limiter
+    with _limiter_lock:
+        if _rate_limiter is None:
+            config = Config()
+            if not config.llm_rate_limit_enabled:
+                return None
+            _rate_limiter = RateLimiter(
+                rpm=config.llm_rpm,
+                tpm=config.llm_tpm,
+                output_tokens=config.llm_output_token_estimate,
+                throttle_backoff=config.llm_throttle_backoff,
+                shared_path=config.llm_rate_limit_shared_path
+            )
+            logger.info(f"Gemini hız sınırı: {config.llm_rpm:g} istek/dk, {config.llm_tpm:g} token/dk"
+                        f"{' (worker süreçleriyle paylaşımlı)' if config.llm_rate_limit_shared_path else ''}")
+        return _rate_limiter
@@ -0,0 +1,234 @@
+"""
+Yapılandırılmış LLM Çıktısı
+JSON beklenen Gemini çağrıları serbest metinden regex ile "onarılmaz":
+
+- SDK destekliyorsa istek response_mime_type='application/json' ve pydantic
+  modellerinden türetilen response_schema ile yapılır (model geçerli JSON döndürür)
+- Yanıt tipli modellerle doğrulanır; yaygın sapmalar (virgülle ayrılmış liste,
+  "85%" gibi sayı) alan bazında düzeltilir
+- Doğrulanamayan alanlar yalnızca kendileri varsayılana döner; yanıtın geri kalanı korunur
+- Yanıtta hiç JSON nesnesi yoksa StructuredOutputError (çağıran fallback'e düşer)
+
+Eski SDK sürümlerinde (generation_config'te response_mime_type yok) istek şemasız
+gönderilir; doğrulama ve alan bazlı düzeltme yine uygulanır.
+"""
+
+import inspect
+import json
+import logging
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import google.generativeai as genai
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+logger = logging.getLogger(__name__)
+
+JSON_MIME_TYPE = 'application/json'
+
+
+class StructuredOutputError(ValueError):
+    """Yanıtta doğrulanabilecek bir JSON nesnesi yok"""
+
+
+def _as_list(value: Any) -> Any:
+    """'a, b; c' veya madde işaretli metni listeye çevir"""
+    if isinstance(value, str):
+        items = re.split(r'[,;\n]', value)
+        return [item.strip(' -•*"\'') for item in items if item.strip(' -•*"\'')]
+    if isinstance(value, list):
+        return [item if isinstance(item, str) else json.dumps(item, ensure_ascii=False)
+                for item in value if item is not None]
+    return value
+
+
+def _as_text(value: Any) -> Any:
+    """Liste veya sayı gelen metin alanını metne çevir"""
+    if isinstance(value, list):
+        return ', '.join(str(item) for item in value if item is not None)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def _as_percent(value: Any) -> Any:
+    """'85%', '85.5' veya 0.85 -> 0-100 arası tam sayı (oran yalnızca 1'den küçük float ise)"""
+    if isinstance(value, float) and 0 < value < 1:
+        value *= 100
+    elif isinstance(value, str):
+        # Metin her zaman yüzde değeridir: "1" ve "1%" 1 olur, 100 değil
+        match = re.search(r'\d+(?:[.,]\d+)?', value)
+        if not match:
+            return value
+        value = float(match.group().replace(',', '.'))
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return max(0, min(100, round(value)))
+    return value
+
+
+class ProductAnalysis(BaseModel):
+    """_ai_analyze_product yanıtı (varsayılanlar eksik/bozuk alanlar için)"""
+
+    category: str = 'Elektronik'
+    strengths: List[str] = Field(default_factory=lambda: ['Kaliteli', 'Uygun fiyat'])
+    weaknesses: List[str] = Field(default_factory=lambda: ['Analiz edilemedi'])
+    target_audience: str = 'Genel kullanıcı'
+    market_position: str = 'Orta seviye'
+    purchase_recommendation: int = 75
+    color_analysis: str = 'Renk analizi yapılamadı'
+    price_competitiveness: str = 'Fiyat analizi yapılamadı'
+    user_satisfaction: str = 'Yorum analizi yapılamadı'
+    sales_potential: str = 'Orta seviye'
+
+    _lists = field_validator('strengths', 'weaknesses', mode='before')(_as_list)
+    _texts = field_validator('category', 'target_audience', 'market_position', 'color_analysis',
+                             'price_competitiveness', 'user_satisfaction', 'sales_potential',
+                             mode='before')(_as_text)
+    _percent = field_validator('purchase_recommendation', mode='before')(_as_percent)
+
+
+class ComparisonWinners(BaseModel):
+    price_winner: str = 'Belirtilmemiş'
+    quality_winner: str = 'Belirtilmemiş'
+    overall_winner: str = 'Belirtilmemiş'
+
+    _texts = field_validator('price_winner', 'quality_winner', 'overall_winner', mode='before')(_as_text)
+
+
+class ComparisonAnalysis(BaseModel):
+    """_ai_compare_products yanıtı"""
+
+    recommended_product: str = 'Belirtilmemiş'
+    reason: str = 'Detaylı analiz sonucu bu ürün öne çıkmaktadır.'
+    confidence_score: int = 75
+    best_value: str = 'Belirtilmemiş'
+    highest_quality: str = 'Belirtilmemiş'
+    most_affordable: str = 'Belirtilmemiş'
+    detailed_analysis: ComparisonWinners = Field(default_factory=ComparisonWinners)
+    comparison_summary: str = ''
+
+    _texts = field_validator('recommended_product', 'reason', 'best_value', 'highest_quality',
+                             'most_affordable', 'comparison_summary', mode='before')(_as_text)
+    _percent = field_validator('confidence_score', mode='before')(_as_percent)
+
+
+def _gemini_schema(schema: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON Schema'yı Gemini'nin desteklediği alt kümeye çevir ($ref çözülür, title/default atılır)"""
+    if '$ref' in schema:
+        schema = defs[schema['$ref'].split('/')[-1]]
+    kind = schema.get('type', 'string')
+    if kind == 'object':
+        properties = {name: _gemini_schema(value, defs) for name, value in schema.get('properties', {}).items()}
+        return {'type': 'object', 'properties': properties, 'required': list(properties)}
+    if kind == 'array':
+        return {'type': 'array', 'items': _gemini_schema(schema.get('items', {}), defs)}
+    return {'type': kind}
+
+
+@lru_cache(maxsize=None)
+def response_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Modelin Gemini response_schema karşılığı"""
+    schema = model.model_json_schema()
+    return _gemini_schema(schema, schema.get('$defs', {}))
+
+
+@lru_cache(maxsize=1)
+def _sdk_support() -> Tuple[bool, bool]:
+    """(response_mime_type, response_schema) SDK'da var mı"""
+    try:
+        parameters = inspect.signature(genai.GenerationConfig).parameters
+    except (TypeError, ValueError):
+        return False, False
+    return 'response_mime_type' in parameters, 'response_schema' in parameters
+
+
+def structured_output_kwargs(model: Optional[Type[BaseModel]] = None) -> Dict[str, Any]:
+    """
+    JSON çıktı için generate_content argümanları
+
+    Args:
+        model: Yanıt şeması; None ise yalnızca JSON MIME tipi istenir (ör. toplu çağrılar)
+
+    Returns:
+        SDK desteklemiyorsa boş sözlük (istek eskisi gibi gönderilir)
+    """
+    supports_mime, supports_schema = _sdk_support()
+    if not supports_mime:
+        return {}
+    generation_config: Dict[str, Any] = {'response_mime_type': JSON_MIME_TYPE}
+    if model is not None and supports_schema:
+        generation_config['response_schema'] = response_schema(model)
+    return {'generation_config': generation_config}
+
+
+def extract_json(text: str) -> Any:
+    """
+    Yanıttaki JSON değeri (doğrudan, kod bloğu içinde veya metnin ortasında)
+
+    Raises:
+        StructuredOutputError: Ayrıştırılabilen JSON yoksa
+    """
+    cleaned = (text or '').strip()
+    candidates = [cleaned]
+    fenced = re.search(r'```(?:json)?\s*(.*?)```', cleaned, re.DOTALL)
+    if fenced:
+        candidates.append(fenced.group(1).strip())
+    start, end = cleaned.find('{'), cleaned.rfind('}')
+    if 0 <= start < end:
+        candidates.append(cleaned[start:end + 1])
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    raise StructuredOutputError("Yanıtta geçerli JSON bulunamadı")
+
+
+_stats_lock = threading.Lock()
+_stats = {'parsed': 0, 'repaired': 0, 'failed': 0, 'repaired_fields': 0}
+
+
+def _count(outcome: str, fields: int = 0) -> None:
+    with _stats_lock:
+        _stats[outcome] += 1
+        _stats['repaired_fields'] += fields
+
+
+def parse_structured(text: str, model: Type[BaseModel]) -> Tuple[BaseModel, List[str]]:
+    """
+    Yanıtı modele göre doğrula; yalnızca hatalı alanları varsayılana döndür
+
+    Returns:
+        (doğrulanmış model, varsayılana dönen alanlar)
+
+    Raises:
+        StructuredOutputError: Yanıtta JSON nesnesi yoksa
+    """
+    try:
+        data = extract_json(text)
+    except StructuredOutputError:
+        _count('failed')
+        raise
+    if not isinstance(data, dict):
+        _count('failed')
+        raise StructuredOutputError("Yanıt bir JSON nesnesi değil")
+
+    try:
+        result = model.model_validate(data)
+    except ValidationError as e:
+        failed = sorted({str(error['loc'][0]) for error in e.errors() if error['loc']})
+        result = model.model_validate({key: value for key, value in data.items() if key not in failed})
+        _count('repaired', len(failed))
+        return result, failed
+    _count('parsed')
+    return result, []
+
+
+def structured_output_stats() -> Dict[str, Any]:
+    """İzleme için ayrıştırma sayaçları ve SDK desteği"""
+    supports_mime, supports_schema = _sdk_support()
+    with _stats_lock:
+        stats = dict(_stats)
+    return dict(stats, json_mime_type=supports_mime, response_schema=supports_schema)
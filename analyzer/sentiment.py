@@ -0,0 +1,172 @@
+"""
+Anahtar Kelime Tabanlı Duygu Analizi
+Tüm sözlük (olumlu, olumsuz ve olumsuzlayıcı kelimeler) tek bir önceden derlenmiş
+alternasyon regex'inde toplanır; her yorum tek geçişte taranır:
+
+- Kelimeler yalnızca kelime başında eşleşir ve yalnızca yaygın çekim ekleriyle
+  uzayabilir ("iyiydi", "güzeller" eşleşir; "iyileştirme", "kiyi" eşleşmez)
+- Türkçe büyük/küçük harf dönüşümü (I -> ı, İ -> i) uygulanır
+- Olumsuzlama: duygu kelimesinden sonra aynı cümlede en fazla NEGATION_WINDOW kelime
+  içinde gelen "değil", "yok", "etmem" ... kelimenin yönünü çevirir
+  ("iyi değil" olumsuz, "hiçbir sorun yaşamadım" olumlu)
+- Toplu API (classify_many / summarize) yorum başına SentimentScore nesnesi
+  oluşturmaz; tekli çağrılarla aynı sonucu verir
+- Hız: varsayılan (küçük) sözlükte eski substring taramasından yavaştır; regex
+  taraması sözlük büyüdükçe öne geçer (benchmarks/sentiment_benchmark.py)
+
+Kullanım:
+    engine = get_sentiment_engine()
+    engine.classify("Ürün iyi değil")                     # 'negative'
+    engine.classify_many(["Harika", "Kargo geç geldi"])   # ['positive', 'negative']
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+POSITIVE = 'positive'
+NEGATIVE = 'negative'
+NEUTRAL = 'neutral'
+
+POSITIVE_WORDS = (
+    'iyi', 'güzel', 'harika', 'mükemmel', 'tavsiye', 'beğendim', 'memnun', 'kaliteli',
+    'başarılı', 'süper', 'müthiş', 'hızlı', 'ucuz', 'sağlam', 'kusursuz', 'efsane'
+)
+NEGATIVE_WORDS = (
+    'kötü', 'berbat', 'sorun', 'sorunlu', 'problem', 'problemli', 'beğenmedim', 'kalitesiz',
+    'başarısız', 'pahalı', 'yavaş', 'eksik', 'bozuk', 'kırık', 'rezalet', 'iade',
+    'gecikme', 'geç geldi', 'geç teslim'
+)
+NEGATORS = (
+    'değil', 'yok', 'etmem', 'etmiyorum', 'etmedim', 'edemem', 'olmaz', 'olmadı', 'olmuyor',
+    'yaşamadım', 'yaşamadık', 'yaşanmadı', 'çıkmadı', 'görmedim'
+)
+
+# Kelimeye eklenebilen yaygın çekim ekleri (en fazla iki tane): -ydi, -ymiş, -dir, -ler, -ce, -si ...
+SUFFIXES = (
+    r'y?[dt][iıuü]', r'y?m[iıuü]ş', r'[dt][iıuü]r', r'l[ae]r', r'[cç][ae]', r's[iıuü]',
+    r'[iıuü]m', r'y?[iıuü]z', r'n[iıuü]n', r'y[ae]', r'[dt][ae]', r'n[ae]'
+)
+NEGATION_WINDOW = 2
+
+
+def tr_lower(text: str) -> str:
+    """Türkçe kurallarıyla küçük harf (I -> ı, İ -> i)"""
+    # str.translate sözlükle karakter başına Python çağrısı yapar; replace C hızında
+    return text.replace('İ', 'i').replace('I', 'ı').lower()
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Kelimeleri ortak önekleri birleştirilmiş tek alternasyona çevir (geri izleme az, ilk karakter hızlı elenir)"""
+    root: Dict[str, dict] = {}
+    for word in words:
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [(r'\s+' if char == ' ' else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(root)
+
+
+def _label(positive: int, negative: int) -> str:
+    if positive > negative:
+        return POSITIVE
+    if negative > positive:
+        return NEGATIVE
+    return NEUTRAL
+
+
+class SentimentScore(NamedTuple):
+    positive: int
+    negative: int
+
+    @property
+    def label(self) -> str:
+        return _label(self.positive, self.negative)
+
+
+class SentimentEngine:
+    """Derlenmiş tek regex ile olumsuzlamaya duyarlı kelime sayımı"""
+
+    def __init__(self, positive: Sequence[str] = POSITIVE_WORDS, negative: Sequence[str] = NEGATIVE_WORDS,
+                 negators: Sequence[str] = NEGATORS, negation_window: int = NEGATION_WINDOW):
+        """
+        Args:
+            positive / negative: Duygu kelimeleri (boşluklu ifadeler olabilir)
+            negators: Duygu kelimesinden sonra gelince yönünü çeviren kelimeler
+            negation_window: Duygu kelimesi ile olumsuzlayıcı arasındaki en fazla kelime
+        """
+        self._polarity = {word: 1 for word in positive}
+        self._polarity.update({word: -1 for word in negative})
+        suffixes = '(?:' + '|'.join(SUFFIXES) + '){0,2}'
+        # 1. grup duygu kelimesi, 2. grup (varsa) aynı cümlede arkasından gelen olumsuzlayıcı;
+        # aradaki noktalama \s+ ile eşleşmediğinden olumsuzlama cümle/virgül sınırını geçmez
+        self.pattern = re.compile(
+            rf'(?<!\w)({_trie_pattern(self._polarity)}){suffixes}\b'
+            rf'((?:\s+\w+){{0,{negation_window}}}?\s+{_trie_pattern(negators)}{suffixes}\b)?'
+        )
+
+    def _count(self, lowered: str) -> Tuple[int, int]:
+        positive = negative = 0
+        polarity = self._polarity
+        for word, negated in self.pattern.findall(lowered):
+            sign = polarity.get(word)
+            if sign is None:
+                # Çok kelimeli ifadede birden fazla boşluk
+                sign = polarity[' '.join(word.split())]
+            if (sign > 0) != bool(negated):
+                positive += 1
+            else:
+                negative += 1
+        return positive, negative
+
+    def _counts(self, texts: Iterable[str]) -> Iterator[Tuple[int, int]]:
+        count = self._count
+        for text in texts:
+            yield count(tr_lower(text)) if text else (0, 0)
+
+    def score(self, text: str) -> SentimentScore:
+        """Tek metnin olumlu/olumsuz kelime sayıları"""
+        return SentimentScore(*self._count(tr_lower(text))) if text else SentimentScore(0, 0)
+
+    def classify(self, text: str) -> str:
+        """'positive', 'negative' veya 'neutral'"""
+        return self.score(text).label
+
+    def score_many(self, texts: Iterable[str]) -> List[SentimentScore]:
+        """Metinleri girdi sırasıyla puanla"""
+        return [SentimentScore(positive, negative) for positive, negative in self._counts(texts)]
+
+    def classify_many(self, texts: Iterable[str]) -> List[str]:
+        """Toplu sınıflandırma"""
+        return [_label(positive, negative) for positive, negative in self._counts(texts)]
+
+    def summarize(self, texts: Iterable[str]) -> Dict[str, int]:
+        """Etiket sayıları ve toplam olumlu/olumsuz kelime sayısı"""
+        summary = {POSITIVE: 0, NEGATIVE: 0, NEUTRAL: 0, 'positive_hits': 0, 'negative_hits': 0}
+        for positive, negative in self._counts(texts):
+            summary[_label(positive, negative)] += 1
+            summary['positive_hits'] += positive
+            summary['negative_hits'] += negative
+        return summary
+
+
+_engine: Optional[SentimentEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_sentiment_engine() -> SentimentEngine:
+    """Varsayılan sözlükle derlenmiş paylaşılan motor"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SentimentEngine()
+        return _engine
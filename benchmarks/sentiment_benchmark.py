@@ -0,0 +1,126 @@
+"""
+Duygu Analizi Performans Ölçümü
+Sentetik Türkçe yorumlarla eski anahtar kelime taraması (kelime başına ayrı
+substring araması) ile derlenmiş SentimentEngine'in tekli ve toplu API'sini
+karşılaştırır; saniyedeki yorum sayısı ve etiketli şablonlara göre doğruluk raporlanır.
+İkinci tablo sözlüğü sentetik kelimelerle büyütür: substring taraması kelime sayısıyla
+doğrusal yavaşlar, derlenmiş regex'in süresi neredeyse sabit kalır.
+
+Kullanım (proje kök dizininden):
+    python -m benchmarks.sentiment_benchmark --reviews 100000 --extra-words 50 200
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from analyzer.sentiment import NEGATIVE, NEGATIVE_WORDS, NEUTRAL, POSITIVE, POSITIVE_WORDS, SentimentEngine
+
+# (şablon, beklenen etiket) - olumsuzlama ve alt dize tuzakları bilerek eklendi
+TEMPLATES: Sequence[Tuple[str, str]] = (
+    ("Ürün çok {pos}, herkese tavsiye ederim.", POSITIVE),
+    ("{Pos} bir ürün, kargo da hızlıydı.", POSITIVE),
+    ("Hiçbir sorun yaşamadım, {pos}.", POSITIVE),
+    ("Fiyatına göre gayet {pos} ve sağlam.", POSITIVE),
+    ("Ürün {neg}, hiç memnun kalmadım.", NEGATIVE),
+    ("Ürün {pos} değil, iade ettim.", NEGATIVE),
+    ("Kargo geç geldi ve kutu {neg} çıktı.", NEGATIVE),
+    ("Maalesef {neg}, tavsiye etmem.", NEGATIVE),
+    ("Renk seçenekleri fotoğraftakiyle aynı, ölçüler standart.", NEUTRAL),
+    ("Kıyıda kullanmak için aldım, iyileştirme yapılabilir.", NEUTRAL),
+    ("Dün teslim aldım, henüz kullanmadım.", NEUTRAL),
+)
+POSITIVE_FILL = ('güzel', 'harika', 'kaliteli', 'mükemmel', 'süper', 'başarılı')
+NEGATIVE_FILL = ('kötü', 'berbat', 'bozuk', 'kalitesiz', 'sorunlu', 'eksik')
+NOISE = ('', ' Satıcıya teşekkürler.', ' Paketleme özenliydi.', ' 3 gündür kullanıyorum.')
+
+
+LEGACY_POSITIVE = (
+    'iyi', 'güzel', 'harika', 'mükemmel', 'tavsiye', 'beğendim',
+    'kaliteli', 'başarılı', 'süper', 'müthiş', 'hızlı', 'ucuz'
+)
+LEGACY_NEGATIVE = (
+    'kötü', 'berbat', 'sorun', 'problem', 'beğenmedim',
+    'kalitesiz', 'başarısız', 'pahalı', 'yavaş', 'eksik'
+)
+LETTERS = 'abcçdefgğhıijklmnoöprsştuüvyz'
+
+
+def legacy_classify(text: str, positive_words: Sequence[str] = LEGACY_POSITIVE,
+                    negative_words: Sequence[str] = LEGACY_NEGATIVE) -> str:
+    """Eski analyze_sentiment_simple: her anahtar kelime için ayrı substring taraması"""
+    if not text:
+        return NEUTRAL
+    text_lower = text.lower()
+    positive_count = sum(1 for word in positive_words if word in text_lower)
+    negative_count = sum(1 for word in negative_words if word in text_lower)
+    if positive_count > negative_count:
+        return POSITIVE
+    if negative_count > positive_count:
+        return NEGATIVE
+    return NEUTRAL
+
+
+def synthetic_words(count: int, rng: random.Random) -> Tuple[str, ...]:
+    """Yorumlarda geçmeyen rastgele sözlük kelimeleri (büyük sözlük simülasyonu)"""
+    return tuple(''.join(rng.choice(LETTERS) for _ in range(rng.randint(5, 9))) for _ in range(count))
+
+
+def synthetic_reviews(count: int, seed: int = 42) -> Tuple[List[str], List[str]]:
+    """Etiketli sentetik yorumlar"""
+    rng = random.Random(seed)
+    texts, labels = [], []
+    for _ in range(count):
+        template, label = rng.choice(TEMPLATES)
+        pos, neg = rng.choice(POSITIVE_FILL), rng.choice(NEGATIVE_FILL)
+        text = template.format(pos=pos, Pos=pos.capitalize(), neg=neg) + rng.choice(NOISE)
+        texts.append(text.upper() if rng.random() < 0.05 else text)
+        labels.append(label)
+    return texts, labels
+
+
+def measure(name: str, run: Callable[[], List[str]], labels: Optional[List[str]] = None,
+            count: int = 0) -> float:
+    started = time.perf_counter()
+    predicted = run()
+    seconds = time.perf_counter() - started
+    count = count or len(predicted)
+    line = f"{name:<30} {seconds:8.3f} sn  {count / seconds:12,.0f} yorum/sn"
+    if labels is not None:
+        accuracy = sum(p == l for p, l in zip(predicted, labels)) / len(labels)
+        line += f"  doğruluk %{accuracy * 100:5.1f}"
+    print(line)
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Duygu analizi performans ölçümü")
+    parser.add_argument('--reviews', type=int, default=100_000, help="Sentetik yorum sayısı")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--extra-words', type=int, nargs='*', default=[50, 200],
+                        help="Sözlük büyüklüğü tablosu için eklenecek sentetik kelime sayıları")
+    args = parser.parse_args()
+
+    texts, labels = synthetic_reviews(args.reviews, args.seed)
+    engine = SentimentEngine()
+    print(f"{len(texts):,} sentetik yorum, ortalama {sum(map(len, texts)) / len(texts):.0f} karakter\n")
+
+    legacy = measure("eski (substring taraması)", lambda: [legacy_classify(t) for t in texts], labels)
+    single = measure("SentimentEngine.classify", lambda: [engine.classify(t) for t in texts], labels)
+    batch = measure("SentimentEngine.classify_many", lambda: engine.classify_many(texts), labels)
+    print(f"\nHızlanma: tekli {legacy / single:.2f}x, toplu {legacy / batch:.2f}x")
+
+    rng = random.Random(args.seed)
+    for extra in args.extra_words:
+        positive = POSITIVE_WORDS + synthetic_words(extra // 2, rng)
+        negative = NEGATIVE_WORDS + synthetic_words(extra - extra // 2, rng)
+        print(f"\nSözlük: {len(positive) + len(negative)} kelime")
+        legacy = measure("substring taraması", lambda: [legacy_classify(t, positive, negative) for t in texts])
+        scaled = SentimentEngine(positive, negative)
+        batch = measure("SentimentEngine.classify_many", lambda: scaled.classify_many(texts))
+        print(f"Hızlanma: {legacy / batch:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
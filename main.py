@@ -29,22 +29,32 @@ import os
 import logging
 import asyncio
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from pathlib import Path
 
 # FastAPI framework ve bağımlılıkları
 from fastapi import FastAPI, Request, Form, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse
 
 # Environment değişkenleri için
 from dotenv import load_dotenv
 
 # Proje modülleri
 from scraper.product_scraper import ProductScraper
+from scraper.category_crawler import CategoryCrawler
+from scraper.refresh_scheduler import RefreshScheduler
+from scraper.prefetch import PrefetchManager
 from analyzer.product_detailed_analyzer import ProductDetailedAnalyzer
+from analyzer.llm_client import llm_client_stats
+from analyzer.llm_stream import StreamSink, sse_events
+from analyzer.llm_usage import get_usage_tracker
+from analyzer.schemas import structured_output_stats
 from utils.data_exporter import DataExporter
+from utils.deadline import Deadline
+from utils.pipeline import Pipeline, StageFailure
+from utils.sequential_sampling import SequentialSampler
 
 # Environment değişkenlerini yükle
 load_dotenv()
@@ -92,6 +102,33 @@ if not GEMINI_API_KEY:
 scraper = ProductScraper()  # Web scraping için
 detailed_analyzer = ProductDetailedAnalyzer(GEMINI_API_KEY)  # AI analiz için  
 data_exporter = DataExporter()  # Veri export işlemleri için
+category_crawler = CategoryCrawler(scraper, detailed_analyzer)  # Toplu kategori taraması için
+refresh_scheduler = RefreshScheduler(scraper, detailed_analyzer)  # Kayıtlı ürünlerin fiyat/puan izlemesi için
+prefetcher = PrefetchManager(scraper)  # Form yazılırken başlatılan ön çekmeler için
+
+
+def create_review_sampler() -> SequentialSampler:
+    """Uyarlanabilir yorum sayısı için örnekleyici (analizdeki duygu sınıflandırıcısıyla)"""
+    config = scraper.config
+    return SequentialSampler(
+        proportion_margin=config.adaptive_proportion_margin,
+        rating_margin=config.adaptive_rating_margin,
+        confidence=config.adaptive_confidence,
+        min_samples=config.adaptive_min_reviews,
+        classify=detailed_analyzer.analyze_sentiment_simple
+    )
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """MONITOR_ENABLED=true ise kayıtlı ürün izleme zamanlayıcısını başlat"""
+    if scraper.config.monitor_enabled:
+        refresh_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await refresh_scheduler.stop()
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -121,9 +158,15 @@ async def analyze_products_detailed(
     request: Request,
     product_urls: str = Form(...),
     max_reviews: int = Form(100),
-    show_reviews: bool = Form(False)
+    show_reviews: bool = Form(False),
+    max_seconds: int = Form(0),
+    adaptive_reviews: bool = Form(False)
 ):
-    """Detaylı ürün analizi - Her ürünü ayrı ayrı analiz et"""
+    """
+    Detaylı ürün analizi - Her ürünü ayrı ayrı analiz et (max_seconds > 0 ise zaman bütçeli)
+    
+    adaptive_reviews: Yorumlar güven aralıkları hedefe inene kadar çekilir, max_reviews üst sınırdır
+    """
     try:
         # URL'leri parse et
         urls = [url.strip() for url in product_urls.split('\n') if url.strip()]
@@ -135,44 +178,70 @@ async def analyze_products_detailed(
         logger.info(f"Toplam URL sayısı: {len(urls)}")
         logger.info(f"Maksimum yorum sayısı: {max_reviews}")
         logger.info(f"Yorumları göster: {show_reviews}")
+        logger.info(f"Zaman bütçesi: {max_seconds or 'sınırsız'} sn")
+        logger.info(f"Uyarlanabilir yorum sayısı: {adaptive_reviews}")
+        
+        # Uçtan uca zaman ve yeniden deneme bütçesi tüm istek için ortak; atlanan aşamalar
+        # ve kısmi durum her ürünün alt bütçesinde ayrı tutulur
+        deadline = Deadline(max_seconds, retry_budget=scraper.config.retry_budget)
+        
+        # Aşamalı iş hattı: bir ürün analiz edilirken sıradaki ürün scrape edilir
+        async def scrape_stage(entry: Tuple[int, str]) -> Tuple[Dict[str, Any], Deadline]:
+            # Sıra numarası girdiyle taşınır (aynı URL iki kez verilebilir)
+            position, url = entry
+            if deadline.expired:
+                logger.warning(f"Zaman bütçesi doldu, ürün atlanıyor: {url}")
+                deadline.skip('remaining_products')
+                raise StageFailure("Zaman bütçesi doldu")
+            
+            # 1. Ürünü scrape et (form yazılırken başlamış ön çekme varsa onu devral)
+            logger.info(f"1. Ürün {position}/{len(urls)} scraping başlıyor: {url}")
+            product_deadline = deadline.child()
+            sampler = create_review_sampler() if adaptive_reviews else None
+            scraped_data = await prefetcher.claim(url, max_reviews, deadline=product_deadline)
+            if scraped_data is None:
+                scraped_data = await scraper.scrape_product(
+                    url, max_reviews=max_reviews, deadline=product_deadline, sampler=sampler
+                )
+            elif sampler is not None:
+                # Ön çekme sabit sayıyla yapıldı: ulaşılan güveni çekilen yorumlardan ölç
+                sampler.add(scraped_data.get('reviews') or [])
+                sampler.stop_reason = 'prefetched'
+                scraped_data['sampling'] = sampler.report()
+            
+            if not scraped_data.get('success'):
+                logger.error(f"Scraping başarısız: {scraped_data.get('error', 'Bilinmeyen hata')}")
+                raise StageFailure(scraped_data.get('error', 'Bilinmeyen hata'))
+            
+            logger.info(f"Scraping başarılı: {scraped_data.get('title', '')[:50]}... ({len(scraped_data.get('reviews', []))} yorum)")
+            return scraped_data, product_deadline
+        
+        async def analyze_stage(scraped: Tuple[Dict[str, Any], Deadline]) -> Dict[str, Any]:
+            # 2. Detaylı analiz et
+            scraped_data, product_deadline = scraped
+            logger.info(f"2. Detaylı AI analizi başlıyor: {scraped_data.get('url', '')}")
+            detailed_analysis = await detailed_analyzer.analyze_single_product(
+                scraped_data, deadline=product_deadline
+            )
+            
+            if detailed_analysis.get('error'):
+                logger.error(f"Analiz hatası: {detailed_analysis['error']}")
+                raise StageFailure(detailed_analysis['error'])
+            
+            logger.info(f"Analiz başarılı - Ürün ID: {detailed_analysis.get('product_id')}")
+            refresh_scheduler.observe(detailed_analysis)
+            return detailed_analysis
         
-        # Her URL'yi ayrı ayrı işle
-        all_results = []
-        failed_urls = []
+        config = scraper.config
+        pipeline = Pipeline(queue_size=config.pipeline_queue_size)
+        pipeline.add_stage('scrape', scrape_stage, workers=config.pipeline_scrape_workers)
+        pipeline.add_stage('analyze', analyze_stage, workers=config.pipeline_analyze_workers)
+        items = await pipeline.run(list(enumerate(urls, 1)))
         
-        for i, url in enumerate(urls, 1):
-            logger.info(f"\\n--- ÜRÜN {i}/{len(urls)} ANALİZİ ---")
-            logger.info(f"URL: {url}")
-            
-            try:
-                # 1. Ürünü scrape et
-                logger.info("1. Ürün scraping başlıyor...")
-                scraped_data = await scraper.scrape_product(url, max_reviews=max_reviews)
-                
-                if not scraped_data.get('success'):
-                    logger.error(f"Scraping başarısız: {scraped_data.get('error', 'Bilinmeyen hata')}")
-                    failed_urls.append(url)
-                    continue
-                
-                logger.info(f"Scraping başarılı: {scraped_data.get('title', '')[:50]}...")
-                logger.info(f"Yorum sayısı: {len(scraped_data.get('reviews', []))}")
-                
-                # 2. Detaylı analiz et
-                logger.info("2. Detaylı AI analizi başlıyor...")
-                detailed_analysis = await detailed_analyzer.analyze_single_product(scraped_data)
-                
-                if detailed_analysis.get('error'):
-                    logger.error(f"Analiz hatası: {detailed_analysis['error']}")
-                    failed_urls.append(url)
-                    continue
-                
-                logger.info(f"Analiz başarılı - Ürün ID: {detailed_analysis.get('product_id')}")
-                all_results.append(detailed_analysis)
-                
-            except Exception as e:
-                logger.error(f"Ürün {i} işleme hatası: {e}")
-                failed_urls.append(url)
-                continue
+        # Sonuçlar girdi sırasıyla; hatalı ürün diğerlerini etkilemez
+        all_results = [item.result for item in items if item.ok]
+        failed_urls = [item.input[1] for item in items if not item.ok]
+        logger.info(f"İş hattı süresi: {pipeline.stats['total']['seconds']:.1f} sn")
         
         logger.info(f"\\n=== ANALİZ TAMAMLANDI ===")
         logger.info(f"Başarılı: {len(all_results)} ürün")
@@ -203,7 +272,9 @@ async def analyze_products_detailed(
             "failed_urls": failed_urls,
             "analysis_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "show_reviews": show_reviews,
-            "max_reviews_used": max_reviews
+            "max_reviews_used": max_reviews,
+            "adaptive_reviews": adaptive_reviews,
+            "time_budget": deadline.to_dict()
         })
         
     except Exception as e:
@@ -256,6 +327,7 @@ async def get_product_detail(request: Request, product_id: str):
         if not analysis:
             raise HTTPException(status_code=404, detail="Ürün bulunamadı")
         
+        refresh_scheduler.record_view(product_id)
         return templates.TemplateResponse("product_detail.html", {
             "request": request,
             "product": analysis
@@ -269,6 +341,22 @@ async def get_product_detail(request: Request, product_id: str):
         })
 
 
+@app.get("/comparison/{comparison_id}")
+async def get_comparison_detail(request: Request, comparison_id: str):
+    """Kaydedilmiş karşılaştırmayı göster (akışlı karşılaştırma bitince buraya yönlenir)"""
+    comparison = detailed_analyzer.get_comparison(comparison_id)
+    if not comparison:
+        return templates.TemplateResponse("error.html", {
+            "request": request,
+            "error": "Karşılaştırma bulunamadı"
+        })
+    
+    return templates.TemplateResponse("comparison_results.html", {
+        "request": request,
+        "comparison": comparison
+    })
+
+
 @app.post("/compare_saved")
 async def compare_saved_products(
     request: Request,
@@ -395,6 +483,211 @@ async def download_file(filename: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/circuit_breakers")
+async def circuit_breaker_status():
+    """Domain devre kesicilerinin durumu - izleme için"""
+    return JSONResponse(scraper.get_circuit_status())
+
+
+@app.get("/api/browser_grid")
+async def browser_grid_status():
+    """Selenium Grid node/slot doluluğu ve kuyruk sayaçları (BROWSER_BACKEND=remote)"""
+    if scraper.remote_grid is None:
+        raise HTTPException(status_code=404, detail="Uzak tarayıcı backend'i kullanılmıyor (BROWSER_BACKEND=remote değil)")
+    await scraper.remote_grid.refresh_status()
+    return JSONResponse(scraper.remote_grid.snapshot())
+
+
+@app.get("/api/latency")
+async def latency_status():
+    """Domain ve LLM çağrı tipi bazlı gecikme istatistikleri ve türetilen timeout'lar"""
+    return JSONResponse(scraper.latency.snapshot())
+
+
+@app.get("/api/llm_cache")
+async def llm_cache_status():
+    """LLM yanıt önbelleği: isabet/ıskalama, çıkarma sayaçları ve doluluk"""
+    if detailed_analyzer.llm_cache is None:
+        return JSONResponse({"enabled": False})
+    return JSONResponse(dict(detailed_analyzer.llm_cache.stats(), enabled=True))
+
+
+@app.get("/api/llm_client")
+async def llm_client_status():
+    """Gemini istemcileri: çağrı modu, uçuştaki çağrılar, slot bekleme ve terk edilen thread sayaçları"""
+    return JSONResponse(llm_client_stats())
+
+
+@app.get("/api/llm_batcher")
+async def llm_batcher_status():
+    """LLM mikro-toplulaştırma: toplu çağrı sayısı, ortalama parti boyu ve tek tek gönderime düşenler"""
+    if detailed_analyzer.batcher is None:
+        return JSONResponse({"enabled": False})
+    return JSONResponse(dict(detailed_analyzer.batcher.snapshot(), enabled=True))
+
+
+@app.get("/api/llm_quota")
+async def llm_quota_status():
+    """Gemini hız sınırlayıcısı: kova doluluğu, öncelik bazlı kuyruk, 429 duraklamaları"""
+    if detailed_analyzer.rate_limiter is None:
+        return JSONResponse({"enabled": False})
+    return JSONResponse(dict(detailed_analyzer.rate_limiter.snapshot(), enabled=True))
+
+
+@app.get("/api/llm_usage")
+async def llm_usage_status():
+    """Çağrı tipi bazlı LLM token, süre ve tahmini maliyet sayaçları; JSON yanıtların doğrulama sonuçları"""
+    return JSONResponse(dict(get_usage_tracker().snapshot(), structured_output=structured_output_stats()))
+
+
+@app.delete("/api/llm_cache")
+async def clear_llm_cache():
+    """LLM yanıt önbelleğini temizle (ör. model davranışı değiştiğinde)"""
+    if detailed_analyzer.llm_cache is None:
+        raise HTTPException(status_code=404, detail="LLM önbelleği kapalı (LLM_CACHE_ENABLED=false)")
+    return JSONResponse({"deleted": detailed_analyzer.llm_cache.clear()})
+
+
+@app.post("/api/prefetch")
+async def prefetch_products(
+    product_urls: str = Form(""),
+    max_reviews: int = Form(100),
+    client_id: str = Form("")
+):
+    """Formdaki URL'ler için düşük öncelikli scraping başlat; formdan silinenleri iptal et"""
+    if not scraper.config.prefetch_enabled:
+        return JSONResponse({"enabled": False, "started": [], "tracked": []})
+    urls = [url.strip() for url in product_urls.split('\n') if url.strip()]
+    result = prefetcher.prefetch(urls, max_reviews=max_reviews, client_id=client_id)
+    return JSONResponse(dict(result, enabled=True))
+
+
+@app.get("/api/prefetch")
+async def prefetch_status():
+    """Ön çekme sayaçları: devralınan, iptal edilen ve süresi dolan işler"""
+    return JSONResponse(prefetcher.snapshot())
+
+
+@app.get("/api/monitoring")
+async def monitoring_status():
+    """İzleme zamanlayıcısı: bütçe, sayaçlar ve sıradaki en öncelikli ürünler"""
+    return JSONResponse(refresh_scheduler.snapshot())
+
+
+@app.get("/api/monitoring/{product_id}")
+async def monitoring_history(product_id: str):
+    """Ürünün fiyat/puan geçmişi ve oynaklığı"""
+    history = refresh_scheduler.history(product_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Ürün izlenmiyor")
+    return JSONResponse(history)
+
+
+@app.post("/api/crawl")
+async def start_crawl(
+    category_url: str = Form(""),
+    max_pages: int = Form(0),
+    max_products: int = Form(0),
+    max_reviews: int = Form(50),
+    resume_id: str = Form("")
+):
+    """Kategori/arama sonucu taramasını arka planda başlat veya kayıtlı taramayı devam ettir"""
+    if not category_url.strip() and not resume_id.strip():
+        raise HTTPException(status_code=400, detail="category_url veya resume_id gerekli")
+    try:
+        job = category_crawler.start(
+            category_url.strip(),
+            max_pages=max_pages or None,
+            max_products=max_products,
+            max_reviews=max_reviews,
+            resume_id=resume_id.strip() or None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(job.progress(), status_code=202)
+
+
+@app.get("/api/crawl")
+async def list_crawls():
+    """Kayıtlı kategori taramalarının özeti"""
+    return JSONResponse(category_crawler.list_crawls())
+
+
+@app.get("/api/crawl/{crawl_id}")
+async def crawl_status(crawl_id: str):
+    """Taramanın ilerlemesi, işlem hızı ve hata oranı"""
+    job = category_crawler.get(crawl_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tarama bulunamadı")
+    return JSONResponse(job.progress())
+
+
+@app.delete("/api/crawl/{crawl_id}")
+async def cancel_crawl(crawl_id: str):
+    """Taramayı durdur (durum kaydedilir, resume_id ile devam ettirilebilir)"""
+    if not category_crawler.cancel(crawl_id):
+        raise HTTPException(status_code=404, detail="Çalışan tarama bulunamadı")
+    return JSONResponse({"crawl_id": crawl_id, "status": "cancelling"})
+
+
+# Akışlı (SSE) analiz - sonuç sayfası Gemini yanıtının tamamını beklemeden dolar
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+@app.get("/api/stream/analyze")
+async def stream_product_analysis(url: str, max_reviews: int = 100, max_seconds: int = 0):
+    """
+    Tek ürünü scrape edip analiz et; ilerleme ve AI çıktısı SSE olarak akar
+    (max_seconds > 0 ise /analyze_detailed gibi zaman bütçeli)
+    
+    Olaylar: status (aşama), delta (model metni), field (tamamlanan JSON alanı),
+    reset (yeniden deneme), result (kaydedilen analiz) veya error
+    """
+    url = url.strip()
+    if not url:
+        raise HTTPException(status_code=400, detail="url gerekli")
+    
+    async def work(sink: StreamSink) -> Dict[str, Any]:
+        # Bütçe akış başladığında işlemeye başlar (istemci bağlanana kadar harcanmaz)
+        deadline = Deadline(max_seconds, retry_budget=scraper.config.retry_budget)
+        sink.event('status', {'stage': 'scraping', 'url': url})
+        scraped_data = await prefetcher.claim(url, max_reviews, deadline=deadline)
+        if scraped_data is None:
+            scraped_data = await scraper.scrape_product(url, max_reviews=max_reviews, deadline=deadline)
+        if not scraped_data.get('success'):
+            raise RuntimeError(scraped_data.get('error', 'Scraping başarısız'))
+        
+        sink.event('status', {
+            'stage': 'analyzing',
+            'title': scraped_data.get('title', ''),
+            'review_count': len(scraped_data.get('reviews', []))
+        })
+        analysis = await detailed_analyzer.analyze_single_product(scraped_data, deadline=deadline)
+        if analysis.get('error'):
+            raise RuntimeError(analysis['error'])
+        refresh_scheduler.observe(analysis)
+        return analysis
+    
+    return StreamingResponse(sse_events(work), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.get("/api/stream/compare")
+async def stream_comparison(product_ids: str):
+    """Kaydedilmiş ürünleri karşılaştır; AI karşılaştırması SSE olarak akar (virgülle ayrılmış ID'ler)"""
+    ids = [pid.strip() for pid in product_ids.split(',') if pid.strip()]
+    if len(ids) < 2:
+        raise HTTPException(status_code=400, detail="En az 2 ürün seçmelisiniz")
+    
+    async def work(sink: StreamSink) -> Dict[str, Any]:
+        sink.event('status', {'stage': 'comparing', 'total_products': len(ids)})
+        comparison = await detailed_analyzer.compare_products(ids)
+        if comparison.get('error'):
+            raise RuntimeError(comparison['error'])
+        return comparison
+    
+    return StreamingResponse(sse_events(work), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 # API durumu
 @app.get("/api/status")
 async def api_status():
@@ -413,6 +706,7 @@ async def api_status():
             ],
             "version": "2.0.0",
             "saved_products": saved_count,
+            "open_circuits": scraper.circuit_breakers.open_circuits(),
             "features": [
                 "Detaylı ürün analizi",
                 "AI destekli karşılaştırma",
@@ -490,14 +784,8 @@ async def quick_test():
         # 2. AI bağlantı testi (kısa timeout ile)
         ai_test = "OK"
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=GEMINI_API_KEY)
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            
-            response = await asyncio.wait_for(
-                asyncio.to_thread(model.generate_content, "Test: 1+1=?"),
-                timeout=10.0
-            )
+            # Analizörle aynı istemci: async çağrı, timeout'ta istek iptal edilir
+            response = await detailed_analyzer.llm.generate("Test: 1+1=?", timeout=10.0)
             if "2" in response.text:
                 ai_test = "OK"
             else:
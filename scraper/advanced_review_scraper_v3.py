@@ -16,17 +16,112 @@ from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+from .bot_detection import BotChallengeError, check_driver
+from utils.deadline import Deadline, ensure_deadline
+from utils.latency_tracker import get_latency_tracker
+from utils.sequential_sampling import SequentialSampler
+
 logger = logging.getLogger(__name__)
 
+# Yorum yükleyici (execute_async_script): sayfa sonuna kaydırır, "Daha fazla" butonuna
+# tıklar, MutationObserver ile yeni yorum düğümü gelene kadar (en fazla waitMs) bekler
+# ve bilinen sayının ötesindeki düğümleri çıkararak döndürür.
+# Argümanlar: selectors, textSelectors, knownCount, waitMs, maxItems, callback
+REVIEW_LOADER_JS = """
+const selectors = arguments[0], textSelectors = arguments[1], knownCount = arguments[2];
+const waitMs = arguments[3], maxItems = arguments[4], done = arguments[arguments.length - 1];
+
+const pick = () => {
+    for (const sel of selectors) {
+        const nodes = document.querySelectorAll(sel);
+        if (nodes.length) return [sel, nodes];
+    }
+    return [null, []];
+};
+
+const textOf = (el) => {
+    for (const sel of textSelectors) {
+        const t = el.querySelector(sel);
+        if (t && (t.innerText || '').trim().length > 10) return t.innerText.trim();
+    }
+    return (el.innerText || '').trim();
+};
+
+const ratingOf = (el) => {
+    const r = el.querySelector('.a-icon-alt, [aria-label*="yıldız"], [aria-label*="star"], [title*="yıldız"], [title*="star"]');
+    const label = r ? (r.getAttribute('aria-label') || r.getAttribute('title') || r.textContent || '') : '';
+    const m = label.match(/[1-5]/);
+    if (m) return m[0];
+    const full = el.querySelectorAll('.star-w .full, .fa-star.checked, [class*="star"][class*="full"]');
+    return full.length && full.length <= 5 ? String(full.length) : null;
+};
+
+const dateOf = (el) => {
+    const d = el.querySelector('.date, time, [class*="date"]');
+    return d ? (d.innerText || '').trim() : null;
+};
+
+let finished = false;
+let observer = null;
+const finish = (grew) => {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    const [sel, nodes] = pick();
+    const items = Array.from(nodes).slice(knownCount, maxItems).map((el) => (
+        {text: textOf(el), rating: ratingOf(el), date: dateOf(el)}
+    ));
+    done({selector: sel, count: nodes.length, items: items, grew: grew});
+};
+
+// Önceki turdan kalan çıkarılmamış düğümler varsa beklemeden döndür
+if (pick()[1].length > knownCount) { finish(true); return; }
+
+observer = new MutationObserver(() => {
+    if (pick()[1].length > knownCount) finish(true);
+});
+observer.observe(document.body, {childList: true, subtree: true});
+setTimeout(() => finish(false), waitMs);
+
+window.scrollTo(0, document.body.scrollHeight);
+const more = Array.from(document.querySelectorAll('button, a, span')).find((b) => {
+    const t = (b.textContent || '').trim();
+    return t.length < 60 && /Daha fazla|Load more|Show more/i.test(t) && b.offsetParent !== null;
+});
+if (more) more.click();
+"""
+
 class AdvancedReviewScraperV3:
     """Gelişmiş yorum çekme sistemi v3"""
     
+    # Opsiyonel XPath taraması için gereken en az bütçe (sn)
+    XPATH_SWEEP_BUDGET = 10.0
+    # Yeni yorum düğümü için bir turda beklenecek en uzun süre (sn)
+    REVIEW_WAIT_SECONDS = 4.0
+    # Art arda bu kadar tur yeni yorum gelmezse liste doymuş sayılır
+    SATURATION_ROUNDS = 2
+    
     def __init__(self, driver: webdriver.Chrome):
         self.driver = driver
         self.wait = WebDriverWait(driver, 10)
+        self.deadline = Deadline()
+        self.sampler: Optional[SequentialSampler] = None
+        self.latency = get_latency_tracker()
         
-    async def scrape_all_reviews(self, url: str, max_reviews: int = 100) -> List[Dict[str, Any]]:
-        """Tüm yorumları çek - platform bazlı"""
+    async def scrape_all_reviews(self, url: str, max_reviews: int = 100,
+                                 deadline: Optional[Deadline] = None,
+                                 sampler: Optional[SequentialSampler] = None) -> List[Dict[str, Any]]:
+        """
+        Tüm yorumları çek - platform bazlı
+
+        Args:
+            sampler: Verilirse uyarlanabilir mod - güven aralıkları hedefe inince yükleme
+                durur (max_reviews üst sınırdır) ve eksik yorumlar demo ile doldurulmaz
+        """
+        self.deadline = ensure_deadline(deadline)
+        self.sampler = sampler
+        if sampler is not None:
+            sampler.reset()
         try:
             domain = self._get_domain(url)
             logger.info(f"Yorum çekme başlıyor: {domain} - Maksimum {max_reviews}")
@@ -41,6 +136,8 @@ class AdvancedReviewScraperV3:
                 logger.warning(f"Desteklenmeyen platform: {domain}")
                 return self._generate_demo_reviews(max_reviews // 2)
                 
+        except BotChallengeError:
+            raise
         except Exception as e:
             logger.error(f"Yorum çekme genel hatası: {e}")
             return self._generate_demo_reviews(max_reviews // 4)
@@ -58,8 +155,8 @@ class AdvancedReviewScraperV3:
         reviews = []
         try:
             logger.info("Trendyol sayfası yükleniyor...")
-            self.driver.get(url)
-            await asyncio.sleep(4)  # Sayfa yüklensin
+            await self._load_page(url)
+            await self._sleep(4)  # Sayfa yüklensin
             
             # Yorumlar sekmesine git
             review_tabs = [
@@ -77,7 +174,7 @@ class AdvancedReviewScraperV3:
                     self.driver.execute_script("arguments[0].click();", tab)
                     review_tab_found = True
                     logger.info("Yorumlar sekmesi bulundu ve tıklandı")
-                    await asyncio.sleep(3)
+                    await self._sleep(3)
                     break
                 except:
                     continue
@@ -85,9 +182,6 @@ class AdvancedReviewScraperV3:
             if not review_tab_found:
                 logger.warning("Yorumlar sekmesi bulunamadı, mevcut sayfada arama yapılıyor")
             
-            # Daha fazla yorum yüklemek için scroll yap
-            await self._scroll_and_load_reviews(max_reviews // 10)
-            
             # Çoklu selector stratejisi
             review_selectors = [
                 # Trendyol ana yorum containerları
@@ -110,7 +204,17 @@ class AdvancedReviewScraperV3:
                 ".rating-comment"
             ]
             
+            # Listeyi doygunluğa kadar yükle, yorumları yüklendikçe çıkar
+            reviews = await self._load_reviews_until_saturated(
+                review_selectors, max_reviews, text_selectors=[".comment-text", ".review-text"]
+            )
+            
             for selector in review_selectors:
+                if reviews:
+                    break  # Yükleyici listeyi buldu, tekrar taramaya gerek yok
+                if self.deadline.expired:
+                    self.deadline.skip('review_selectors')
+                    break
                 try:
                     elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     logger.info(f"Selector '{selector}' ile {len(elements)} element bulundu")
@@ -127,7 +231,7 @@ class AdvancedReviewScraperV3:
                     logger.debug(f"Selector '{selector}' hatası: {e}")
                     continue
             
-            # XPath ile de dene
+            # XPath ile de dene (opsiyonel - bütçe azsa atlanır)
             xpath_selectors = [
                 "//div[contains(@class, 'comment')]",
                 "//div[contains(@class, 'review')]", 
@@ -140,6 +244,12 @@ class AdvancedReviewScraperV3:
             ]
             
             for xpath in xpath_selectors:
+                if reviews:
+                    break  # Yorum listesi bulundu, sezgisel XPath taramasına gerek yok
+                if not self.deadline.has_time(self.XPATH_SWEEP_BUDGET):
+                    logger.info("Zaman bütçesi az, XPath taraması atlanıyor")
+                    self.deadline.skip('xpath_sweep')
+                    break
                 try:
                     elements = self.driver.find_elements(By.XPATH, xpath)
                     for element in elements[:20]:  # Her XPath'ten max 20
@@ -153,7 +263,7 @@ class AdvancedReviewScraperV3:
             
             # Yeterli yorum bulunamadıysa demo ekle
             # Yeterli yorum bulunamadıysa demo yorum ekle
-            if len(reviews) < max_reviews:
+            if len(reviews) < max_reviews and self.sampler is None:
                 logger.info(f"Hedef: {max_reviews}, Bulunan: {len(reviews)} - Demo yorumlar ekleniyor")
                 needed_reviews = max_reviews - len(reviews)
                 demo_reviews = self._generate_trendyol_demo_reviews(needed_reviews)
@@ -164,6 +274,8 @@ class AdvancedReviewScraperV3:
             logger.info(f"Trendyol tam {len(final_reviews)} yorum hazırlandı (hedef: {max_reviews})")
             return final_reviews
             
+        except BotChallengeError:
+            raise
         except Exception as e:
             logger.error(f"Trendyol yorum çekme hatası: {e}")
             # Fallback demo reviews
@@ -174,8 +286,8 @@ class AdvancedReviewScraperV3:
         reviews = []
         try:
             logger.info("Amazon sayfası yükleniyor...")
-            self.driver.get(url)
-            await asyncio.sleep(4)
+            await self._load_page(url)
+            await self._sleep(4)
             
             # Yorumlar bölümüne git
             review_links = [
@@ -191,14 +303,11 @@ class AdvancedReviewScraperV3:
                     link = self.driver.find_element(By.XPATH, link_xpath)
                     self.driver.execute_script("arguments[0].click();", link)
                     logger.info("Amazon yorumlar sayfasına gidildi")
-                    await asyncio.sleep(3)
+                    await self._sleep(3)
                     break
                 except:
                     continue
             
-            # Sayfa yükleme ve scroll
-            await self._scroll_and_load_reviews(max_reviews // 20)
-            
             # Amazon review selectors
             review_selectors = [
                 "[data-hook='review']",
@@ -210,7 +319,19 @@ class AdvancedReviewScraperV3:
                 "[class*='review-body']"
             ]
             
+            # Listeyi doygunluğa kadar yükle, yorumları yüklendikçe çıkar
+            reviews = await self._load_reviews_until_saturated(
+                review_selectors, max_reviews,
+                text_selectors=["[data-hook='review-body'] span", ".cr-original-review-text", ".review-text"],
+                source='amazon_scraped'
+            )
+            
             for selector in review_selectors:
+                if reviews:
+                    break
+                if self.deadline.expired:
+                    self.deadline.skip('review_selectors')
+                    break
                 try:
                     elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     logger.info(f"Amazon selector '{selector}' ile {len(elements)} element bulundu")
@@ -228,7 +349,7 @@ class AdvancedReviewScraperV3:
                     continue
             
             # Yeterli yorum yoksa demo ekle
-            if len(reviews) < max_reviews // 4:
+            if len(reviews) < max_reviews // 4 and self.sampler is None:
                 logger.warning(f"Amazon'dan sadece {len(reviews)} yorum alındı, demo ekleniyor")
                 demo_reviews = self._generate_amazon_demo_reviews(max_reviews - len(reviews))
                 reviews.extend(demo_reviews)
@@ -236,6 +357,8 @@ class AdvancedReviewScraperV3:
             logger.info(f"Amazon toplam {len(reviews)} yorum çekildi")
             return reviews[:max_reviews]
             
+        except BotChallengeError:
+            raise
         except Exception as e:
             logger.error(f"Amazon yorum çekme hatası: {e}")
             return self._generate_amazon_demo_reviews(max_reviews)
@@ -245,11 +368,8 @@ class AdvancedReviewScraperV3:
         reviews = []
         try:
             logger.info("Hepsiburada sayfası yükleniyor...")
-            self.driver.get(url)
-            await asyncio.sleep(4)
-            
-            # Scroll ve yorum yükleme
-            await self._scroll_and_load_reviews(max_reviews // 15)
+            await self._load_page(url)
+            await self._sleep(4)
             
             # Hepsiburada selectors
             review_selectors = [
@@ -260,7 +380,17 @@ class AdvancedReviewScraperV3:
                 "[class*='comment']"
             ]
             
+            # Listeyi doygunluğa kadar yükle, yorumları yüklendikçe çıkar
+            reviews = await self._load_reviews_until_saturated(
+                review_selectors, max_reviews, text_selectors=[".comment-text", ".review-text"]
+            )
+            
             for selector in review_selectors:
+                if reviews:
+                    break
+                if self.deadline.expired:
+                    self.deadline.skip('review_selectors')
+                    break
                 try:
                     elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     for element in elements[:max_reviews]:
@@ -271,12 +401,14 @@ class AdvancedReviewScraperV3:
                     continue
             
             # Demo reviews ekle
-            if len(reviews) < max_reviews // 4:
+            if len(reviews) < max_reviews // 4 and self.sampler is None:
                 demo_reviews = self._generate_hepsiburada_demo_reviews(max_reviews - len(reviews))
                 reviews.extend(demo_reviews)
             
             return reviews[:max_reviews]
             
+        except BotChallengeError:
+            raise
         except Exception as e:
             logger.error(f"Hepsiburada yorum hatası: {e}")
             return self._generate_hepsiburada_demo_reviews(max_reviews)
@@ -369,8 +501,6 @@ class AdvancedReviewScraperV3:
     
     def _extract_rating_from_element(self, element) -> str:
         """Element'ten rating değerini çıkar - Geliştirilmiş versiyon"""
-        import random
-        
         try:
             # Yaygın rating selectorları
             rating_selectors = [
@@ -431,49 +561,16 @@ class AdvancedReviewScraperV3:
                 pass
             
             # Gerçekçi rastgele rating üret (ağırlıklı)
-            # %40 -> 5 yıldız, %30 -> 4 yıldız, %20 -> 3 yıldız, %7 -> 2 yıldız, %3 -> 1 yıldız
-            rating_weights = {
-                5: 40,
-                4: 30, 
-                3: 20,
-                2: 7,
-                1: 3
-            }
-            
-            weighted_ratings = []
-            for rating, weight in rating_weights.items():
-                weighted_ratings.extend([rating] * weight)
-            
-            return str(random.choice(weighted_ratings))
+            return self._weighted_random_rating()
             
         except Exception as e:
             logger.debug(f"Rating çıkarma hatası: {e}")
-            # Fallback - gerçekçi dağılım
-            return str(random.choices([5, 4, 3, 2, 1], weights=[40, 30, 20, 7, 3])[0])
-        """Element'ten rating çıkar"""
-        try:
-            # Rating selectors
-            rating_selectors = [
-                ".rating", ".star", ".score", 
-                "[class*='rating']", "[class*='star']", "[class*='score']"
-            ]
-            
-            for selector in rating_selectors:
-                try:
-                    rating_elem = element.find_element(By.CSS_SELECTOR, selector)
-                    rating_text = rating_elem.text.strip()
-                    # Sayı çıkar
-                    import re
-                    numbers = re.findall(r'\d+', rating_text)
-                    if numbers:
-                        return numbers[0]
-                except:
-                    continue
-            
-            return "5"  # Default
-            
-        except:
-            return "5"
+            return self._weighted_random_rating()
+    
+    def _weighted_random_rating(self) -> str:
+        """Gerçekçi dağılımlı rating - %40 5, %30 4, %20 3, %7 2, %3 1 yıldız"""
+        import random
+        return str(random.choices([5, 4, 3, 2, 1], weights=[40, 30, 20, 7, 3])[0])
     
     def _extract_date_from_element(self, element) -> str:
         """Element'ten tarih çıkar"""
@@ -492,36 +589,120 @@ class AdvancedReviewScraperV3:
         except:
             return "Tarih yok"
     
-    async def _scroll_and_load_reviews(self, iterations: int = 5):
-        """Sayfayı scroll yaparak daha fazla yorum yükle"""
+    async def _load_reviews_until_saturated(self, selectors: List[str], max_reviews: int,
+                                            text_selectors: Optional[List[str]] = None,
+                                            source: str = 'scraped') -> List[Dict[str, Any]]:
+        """
+        Yorum listesini yeni düğüm gelmeyene (doygunluk) veya max_reviews'a kadar yükle
+
+        Her turda sayfa sonuna kaydırılır, görünür "Daha fazla" butonuna tıklanır ve
+        MutationObserver ile yalnızca yeni yorum düğümü gelene kadar beklenir. Yeni
+        gelen düğümler aynı turda çıkarılır; sabit uykular ve XPath aramaları yoktur.
+
+        Args:
+            selectors: Yorum kartı CSS selectorları (öncelik sırasıyla)
+            max_reviews: Hedef yorum sayısı
+            text_selectors: Kart içinde yorum metnini taşıyan selectorlar
+            source: Yorumlara yazılacak kaynak etiketi
+
+        Uyarlanabilir modda (self.sampler) her turdan sonra yeni yorumlar örnekleyiciye
+        eklenir; duygu oranları ve ortalama puan hedef güven aralığına inince durulur.
+        """
+        reviews: List[Dict[str, Any]] = []
+        seen_texts = set()
+        active_selectors = list(selectors)
+        known_count = 0
+        idle_rounds = 0
+        wait_ms = int(self.REVIEW_WAIT_SECONDS * 1000)
+
         try:
-            for i in range(iterations):
-                # Sayfanın sonuna scroll
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                await asyncio.sleep(2)
-                
-                # "Daha fazla yorum" butonu varsa tıkla
-                load_more_buttons = [
-                    "//button[contains(text(), 'Daha fazla')]",
-                    "//button[contains(text(), 'Load more')]",
-                    "//a[contains(text(), 'Daha fazla')]",
-                    "//span[contains(text(), 'Daha fazla')]"
-                ]
-                
-                for button_xpath in load_more_buttons:
-                    try:
-                        button = self.driver.find_element(By.XPATH, button_xpath)
-                        if button.is_displayed():
-                            self.driver.execute_script("arguments[0].click();", button)
-                            await asyncio.sleep(3)
-                            break
-                    except:
-                        continue
-                
-                logger.debug(f"Scroll iterasyonu {i+1}/{iterations} tamamlandı")
-                
-        except Exception as e:
-            logger.debug(f"Scroll hatası: {e}")
+            self.driver.set_script_timeout(self.REVIEW_WAIT_SECONDS + 5)
+        except Exception:
+            pass
+
+        while len(reviews) < max_reviews:
+            if not self.deadline.has_time(self.REVIEW_WAIT_SECONDS):
+                logger.info(f"Zaman bütçesi az, yorum yükleme {len(reviews)} yorumda durduruldu")
+                self.deadline.skip('review_loading')
+                break
+
+            try:
+                batch = await asyncio.to_thread(
+                    self.driver.execute_async_script, REVIEW_LOADER_JS,
+                    active_selectors, text_selectors or [], known_count, wait_ms, max_reviews
+                )
+            except Exception as e:
+                logger.debug(f"Yorum yükleyici hatası: {e}")
+                break
+
+            if not batch or not batch.get('selector'):
+                # Liste henüz render edilmemiş olabilir - bir tur daha bekle
+                idle_rounds += 1
+                if idle_rounds >= self.SATURATION_ROUNDS:
+                    break
+                continue
+
+            active_selectors = [batch['selector']]
+            known_count = max(known_count, batch.get('count', 0))
+
+            added = 0
+            fresh = []
+            for item in batch.get('items') or []:
+                text = (item.get('text') or '').strip()
+                if len(text) < 3 or text in seen_texts:
+                    continue
+                seen_texts.add(text)
+                # Örnekleyici yalnızca sayfadaki gerçek puanı görür (tahmini puan değil)
+                fresh.append({'text': text, 'rating': item.get('rating')})
+                reviews.append({
+                    'text': text,
+                    'rating': item.get('rating') or self._weighted_random_rating(),
+                    'date': item.get('date') or 'Tarih yok',
+                    'length': len(text),
+                    'source': source
+                })
+                added += 1
+
+            if self.sampler is not None and fresh:
+                self.sampler.add(fresh)
+                if self.sampler.satisfied:
+                    self.sampler.stop_reason = 'converged'
+                    logger.info(f"Güven aralıkları hedefe ulaştı, yorum yükleme {len(reviews)} yorumda durduruldu")
+                    break
+
+            if batch.get('grew') or added:
+                idle_rounds = 0
+            else:
+                idle_rounds += 1
+                if idle_rounds >= self.SATURATION_ROUNDS:
+                    logger.info(f"Yorum listesi doygunluğa ulaştı: {known_count} düğüm")
+                    break
+
+        if self.sampler is not None and self.sampler.stop_reason is None:
+            if len(reviews) >= max_reviews:
+                self.sampler.stop_reason = 'max_reviews'
+            elif 'review_loading' in self.deadline.skipped_stages:
+                self.sampler.stop_reason = 'deadline'
+            else:
+                self.sampler.stop_reason = 'exhausted'
+
+        logger.info(f"Yükleyici '{active_selectors[0] if active_selectors else '-'}' ile {len(reviews)} yorum çıkardı")
+        return reviews[:max_reviews]
+    
+    async def _load_page(self, url: str) -> None:
+        """Sayfayı thread'de yükle (driver.get bloklayıcı) ve bot engeli kontrolü yap"""
+        domain = self._get_domain(url)
+
+        def load() -> None:
+            with self.latency.measure('page_load', domain):
+                self.driver.get(url)
+            check_driver(self.driver, domain)
+
+        await asyncio.to_thread(load)
+
+    async def _sleep(self, seconds: float) -> None:
+        """Zaman bütçesini aşmayacak şekilde bekle"""
+        await asyncio.sleep(min(seconds, self.deadline.remaining()))
     
     def _generate_demo_reviews(self, count: int) -> List[Dict[str, Any]]:
         """Genel demo yorumlar"""
@@ -0,0 +1,200 @@
+"""
+Bot Engeli / Captcha Algılayıcı
+Navigasyondan hemen sonra sayfanın gerçek ürün sayfası mı yoksa bot kontrolü,
+captcha veya erişim engeli ara sayfası mı olduğunu hızlıca sınıflandırır.
+Engel algılanırsa selector listeleri hiç çalıştırılmadan BotChallengeError fırlatılır.
+"""
+
+import logging
+import re
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tek başına engel sayfası olduğunu gösteren görünen metin ifadeleri (küçük harf).
+# Yalnızca başlık ve görünen metinde aranır; HTML kaynağında aranmaz
+CHALLENGE_MARKERS = [
+    'enter the characters you see below',       # Amazon captcha
+    'robot olmadığınızı',
+    'robot olmadiginizi',
+    'checking your browser',                    # Cloudflare
+    'press & hold',                             # PerimeterX
+    'basılı tutun',
+    'unusual traffic',
+    'olağan dışı trafik',
+    'request unsuccessful. incapsula',
+    'access to this page has been denied',
+    'erişiminiz engellendi',
+]
+
+# HTML kaynağındaki engel izleri. Cloudflare /cdn-cgi/challenge-platform/ betiğini normal
+# sayfalara da ekler; bu yüzden yalnızca küçük DOM veya 403/503 ile birlikte engel sayılır
+HTML_MARKERS = [
+    '/errors/validatecaptcha',
+    'cf-challenge',
+    'challenge-platform',
+    'cf-turnstile',
+    'px-captcha',
+]
+HTML_MARKER_STATUS_CODES = {403, 503}
+
+# Yalnızca küçük bir DOM ile birlikte engel sayılan zayıf ifadeler
+WEAK_MARKERS = [
+    'captcha',
+    'access denied',
+    'erişim engellendi',
+    'güvenlik doğrulaması',
+    'verify you are human',
+    'are you a robot',
+]
+
+# Engel/sınırlama anlamına gelen HTTP durum kodları
+BLOCKING_STATUS_CODES = {403, 429, 503}
+
+# Bu sayıdan az element içeren sayfa ürün sayfası olamayacak kadar küçüktür
+MIN_PRODUCT_PAGE_NODES = 150
+MIN_PRODUCT_PAGE_TEXT = 200
+
+_TITLE_PATTERN = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+_INVISIBLE_PATTERN = re.compile(r'<(script|style|noscript|template)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+_ELEMENT_PATTERN = re.compile(r'<[a-zA-Z]')
+
+# Tek round-trip ile sayfa özeti: durum kodu, element sayısı, başlık ve metin başı
+PAGE_PROBE_JS = """
+const nav = (performance.getEntriesByType && performance.getEntriesByType('navigation')[0]) || {};
+const body = document.body;
+return {
+    status: nav.responseStatus || null,
+    nodes: document.getElementsByTagName('*').length,
+    title: document.title || '',
+    text: body ? (body.innerText || '').slice(0, 3000) : '',
+    html: document.documentElement.outerHTML.slice(0, 20000)
+};
+"""
+
+
+class BotChallengeError(Exception):
+    """Site bot kontrolü, captcha veya erişim engeli sayfası döndürdü"""
+
+    def __init__(self, domain: str, reason: str, status_code: Optional[int] = None):
+        self.domain = domain
+        self.reason = reason
+        self.status_code = status_code
+        super().__init__(f"Bot engeli algılandı ({domain}): {reason}")
+
+    @property
+    def rate_limited(self) -> bool:
+        """Engel işareti yok, yalnızca 429/503 - geçici hız sınırı"""
+        return self.status_code in (429, 503) and self.reason == f"HTTP {self.status_code}"
+
+    @property
+    def retry_class(self) -> str:
+        """Yeniden deneme sınıfı: hız sınırı beklenip tekrar denenir, captcha denenmez"""
+        return 'retryable' if self.rate_limited else 'bot_blocked'
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Sonuç sözlüğüne eklenecek hata özeti"""
+        return {
+            'error_type': 'bot_challenge',
+            'blocked_reason': self.reason,
+            'status_code': self.status_code
+        }
+
+
+def classify_page(text: str, status_code: Optional[int] = None,
+                  node_count: Optional[int] = None, title: str = '', html: str = '') -> Optional[str]:
+    """
+    Sayfayı sınıflandır
+
+    Args:
+        text: Sayfanın görünen metni
+        status_code: Ana dokümanın HTTP durum kodu (bilinmiyorsa None)
+        node_count: DOM element sayısı (bilinmiyorsa None)
+        title: Sayfa başlığı
+        html: HTML kaynağı (yalnızca HTML_MARKERS için)
+
+    Returns:
+        Engel nedeni; normal sayfa ise None
+    """
+    haystack = f"{title}\n{text or ''}".lower()
+
+    for marker in CHALLENGE_MARKERS:
+        if marker in haystack:
+            return f"Engel işareti: '{marker}'"
+
+    if node_count is not None:
+        small_dom = node_count < MIN_PRODUCT_PAGE_NODES
+    else:
+        small_dom = len(text or '') < MIN_PRODUCT_PAGE_TEXT * 10
+
+    if html and (small_dom or status_code in HTML_MARKER_STATUS_CODES):
+        source = html.lower()
+        for marker in HTML_MARKERS:
+            if marker in source:
+                return f"Engel işareti: '{marker}'"
+
+    if small_dom:
+        for marker in WEAK_MARKERS:
+            if marker in haystack:
+                return f"Küçük DOM ve '{marker}' ifadesi"
+
+    if status_code in BLOCKING_STATUS_CODES:
+        return f"HTTP {status_code}"
+
+    if node_count is not None and small_dom and len((text or '').strip()) < MIN_PRODUCT_PAGE_TEXT:
+        return f"Anormal küçük sayfa ({node_count} element)"
+
+    return None
+
+
+def classify_html(body: str, status_code: Optional[int] = None) -> Optional[str]:
+    """
+    HTTP yanıt gövdesini sınıflandır (başlık, görünen metin ve element sayısı HTML'den çıkarılır)
+
+    HTML olmayan gövdede (JSON API yanıtı) element sayısı bilinmez kabul edilir.
+    """
+    body = (body or '')[:50000]
+    node_count = len(_ELEMENT_PATTERN.findall(body))
+    if not node_count:
+        return classify_page(body, status_code)
+    title_match = _TITLE_PATTERN.search(body)
+    title = _TAG_PATTERN.sub(' ', title_match.group(1)) if title_match else ''
+    text = ' '.join(_TAG_PATTERN.sub(' ', _INVISIBLE_PATTERN.sub(' ', body)).split())
+    return classify_page(text, status_code, node_count, title, html=body)
+
+
+def check_driver(driver, domain: str) -> None:
+    """
+    Navigasyondan hemen sonra tarayıcıdaki sayfayı kontrol et
+
+    Raises:
+        BotChallengeError: Sayfa engel/captcha sayfasıysa
+    """
+    try:
+        probe = driver.execute_script(PAGE_PROBE_JS) or {}
+    except Exception as e:
+        logger.debug(f"Sayfa yoklama hatası: {e}")
+        return
+
+    # CDP backend'i gerçek durum kodunu doğrudan bilir
+    status_code = getattr(driver, 'last_status_code', None) or probe.get('status')
+
+    reason = classify_page(probe.get('text', ''), status_code, probe.get('nodes'),
+                           probe.get('title', ''), html=probe.get('html', ''))
+    if reason:
+        logger.warning(f"Bot engeli algılandı, tarayıcı yolu durduruluyor: {domain} - {reason}")
+        raise BotChallengeError(domain, reason, status_code)
+
+
+def check_response(response, domain: str) -> None:
+    """
+    HTTP (requests) yanıtını kontrol et
+
+    Raises:
+        BotChallengeError: Yanıt engel/captcha sayfasıysa
+    """
+    reason = classify_html(response.text, response.status_code)
+    if reason:
+        logger.warning(f"Bot engeli algılandı (HTTP): {domain} - {reason}")
+        raise BotChallengeError(domain, reason, response.status_code)
@@ -0,0 +1,266 @@
+"""
+Kalıcı Tarayıcı Profil Havuzu
+Chrome'un her açılışta geçici profille başlayıp statik dosyaları (JS, CSS, font,
+görsel) yeniden indirmesini önler. Profiller data/browser_profiles altında tutulur
+ve tarayıcılar arasında yeniden kullanılır:
+
+- Her profil aynı anda tek tarayıcıya kiralanır (süreçler arası kilit dosyası)
+- HTTP disk önbelleği --disk-cache-size ile sınırlanır
+- Çıkış noktası (proxy/doğrudan) başına ayrı profil: çerezler karışmaz
+- Uzun süre kullanılmayan profiller ve gereksiz dizinler periyodik temizlenir
+"""
+
+import atexit
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Önbellek değeri düşük, zamanla büyüyen profil alt dizinleri
+DISPOSABLE_DIRS = [
+    'Crashpad',
+    'Crash Reports',
+    'GrShaderCache',
+    'ShaderCache',
+    'GraphiteDawnCache',
+    'Default/GPUCache',
+    'Default/Service Worker/CacheStorage',
+    'Default/Sessions',
+]
+
+LOCK_FILE = '.btk_lease'
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ProfileLease:
+    """Kiralanmış profil dizini; tarayıcı kapanınca release() ile iade edilir"""
+
+    def __init__(self, pool: 'BrowserProfilePool', path: Path):
+        self.pool = pool
+        self.path = path
+        self._released = False
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    @property
+    def cache_dir(self) -> Path:
+        return self.path / 'cache'
+
+    def chrome_args(self) -> List[str]:
+        """Profil ve sınırlı disk önbelleği için Chrome argümanları"""
+        return [
+            f'--user-data-dir={self.path}',
+            f'--disk-cache-dir={self.cache_dir}',
+            f'--disk-cache-size={self.pool.cache_size_bytes}',
+        ]
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self.pool._release(self)
+
+
+class BrowserProfilePool:
+    """Tarayıcılar arasında yeniden kullanılan, birbirinden yalıtılmış profil dizinleri"""
+
+    def __init__(self, root: str = 'data/browser_profiles', max_profiles: int = 4,
+                 cache_size_mb: int = 256, max_age_days: float = 7.0,
+                 cleanup_interval: float = 3600.0):
+        """
+        Args:
+            root: Profil dizinlerinin kökü
+            max_profiles: Çıkış noktası başına en fazla profil (eşzamanlı tarayıcı sayısı)
+            cache_size_mb: Profil başına HTTP disk önbelleği üst sınırı
+            max_age_days: Bu süre kullanılmayan profil silinir
+            cleanup_interval: Temizlik aralığı (sn)
+        """
+        self.root = Path(root)
+        self.max_profiles = max(1, max_profiles)
+        self.cache_size_bytes = int(cache_size_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_days * 86400
+        self.cleanup_interval = cleanup_interval
+
+        self._lock = threading.Lock()
+        self._leased: Dict[str, ProfileLease] = {}
+        self._last_cleanup = 0.0
+        self.stats = {'acquired': 0, 'warm': 0, 'created': 0, 'exhausted': 0, 'removed': 0}
+        atexit.register(self.release_all)
+
+    @staticmethod
+    def _slug(key: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_.-]+', '_', key).strip('_') or 'direct'
+
+    def acquire(self, key: str = 'direct') -> Optional[ProfileLease]:
+        """
+        Boş profil kirala; hepsi kullanımdaysa None (çağıran geçici profil kullanır)
+
+        Args:
+            key: Çıkış noktası (proxy etiketi veya 'direct') - farklı anahtarlar profil paylaşmaz
+        """
+        self.maybe_cleanup()
+        slug = self._slug(key)
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            existing = sorted(self.root.glob(f'{slug}-*'), key=lambda p: p.stat().st_mtime, reverse=True)
+
+            # Önce en son kullanılan (en sıcak önbellekli) boş profil
+            for path in existing:
+                if path.is_dir() and self._try_lock(path):
+                    self.stats['warm'] += 1
+                    return self._lease(path)
+
+            used = {p.name for p in existing}
+            for index in range(self.max_profiles):
+                name = f'{slug}-{index}'
+                if name in used:
+                    continue
+                path = self.root / name
+                path.mkdir(parents=True, exist_ok=True)
+                if self._try_lock(path):
+                    self.stats['created'] += 1
+                    return self._lease(path)
+
+        self.stats['exhausted'] += 1
+        logger.debug(f"Boş tarayıcı profili yok ({slug}), geçici profil kullanılacak")
+        return None
+
+    def _lease(self, path: Path) -> ProfileLease:
+        lease = ProfileLease(self, path)
+        self._leased[path.name] = lease
+        self.stats['acquired'] += 1
+        os.utime(path, None)
+        return lease
+
+    def _try_lock(self, path: Path) -> bool:
+        """Kilit dosyasını atomik oluştur; ölü sürecin bıraktığı kilit devralınır"""
+        if path.name in self._leased:
+            return False
+        lock_path = path / LOCK_FILE
+        for _ in range(2):
+            try:
+                fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    pid = int(lock_path.read_text().strip() or 0)
+                except (OSError, ValueError):
+                    pid = 0
+                if pid and _pid_alive(pid):
+                    return False
+                # Çökmüş süreçten kalan kilit (ve Chrome'un kendi kilitleri)
+                for stale in (lock_path, path / 'SingletonLock', path / 'SingletonSocket', path / 'SingletonCookie'):
+                    try:
+                        os.unlink(stale)
+                    except OSError:
+                        pass
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(str(os.getpid()))
+            return True
+        return False
+
+    def _release(self, lease: ProfileLease) -> None:
+        with self._lock:
+            self._leased.pop(lease.name, None)
+            try:
+                os.utime(lease.path, None)
+                os.unlink(lease.path / LOCK_FILE)
+            except OSError:
+                pass
+
+    def release_all(self) -> None:
+        """Süreç kapanırken tüm kiraları bırak"""
+        for lease in list(self._leased.values()):
+            lease.release()
+
+    def maybe_cleanup(self) -> None:
+        if time.monotonic() - self._last_cleanup >= self.cleanup_interval:
+            self.cleanup()
+
+    def cleanup(self) -> Dict[str, int]:
+        """Kullanılmayan profilleri temizle: eskileri sil, gereksiz alt dizinleri boşalt"""
+        self._last_cleanup = time.monotonic()
+        removed = trimmed = 0
+        if not self.root.exists():
+            return {'removed': 0, 'trimmed': 0}
+
+        now = time.time()
+        for path in self.root.iterdir():
+            if not path.is_dir():
+                continue
+            # Kilit dosyası dizin zamanını değiştirir; son kullanım kilitten önce okunur
+            idle = now - path.stat().st_mtime
+            with self._lock:
+                if not self._try_lock(path):
+                    continue
+            try:
+                if idle > self.max_age_seconds:
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed += 1
+                    continue
+                for sub in DISPOSABLE_DIRS:
+                    target = path / sub
+                    if target.exists():
+                        shutil.rmtree(target, ignore_errors=True)
+                        trimmed += 1
+                # Chrome sınırı kendisi uygular; çok aşılmışsa (ör. sınır düşürüldüyse) önbelleği sıfırla
+                cache_dir = path / 'cache'
+                if cache_dir.exists() and _dir_size(cache_dir) > self.cache_size_bytes * 1.5:
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                    trimmed += 1
+            finally:
+                if path.exists():
+                    try:
+                        os.unlink(path / LOCK_FILE)
+                    except OSError:
+                        pass
+
+        self.stats['removed'] += removed
+        if removed or trimmed:
+            logger.info(f"Tarayıcı profilleri temizlendi: {removed} silindi, {trimmed} dizin boşaltıldı")
+        return {'removed': removed, 'trimmed': trimmed}
+
+    def snapshot(self) -> Dict[str, object]:
+        """İzleme için profil durumu"""
+        profiles = []
+        if self.root.exists():
+            for path in sorted(self.root.iterdir()):
+                if path.is_dir():
+                    cache_dir = path / 'cache'
+                    profiles.append({
+                        'name': path.name,
+                        'leased': path.name in self._leased,
+                        'cache_mb': round(_dir_size(cache_dir) / 1024 / 1024, 1) if cache_dir.exists() else 0.0,
+                        'idle_seconds': round(time.time() - path.stat().st_mtime)
+                    })
+        return {'profiles': profiles, 'stats': dict(self.stats)}
@@ -0,0 +1,497 @@
+"""
+Kategori / Listeleme Tarayıcı
+Kategori veya arama sonucu URL'sinden başlayarak listeleme sayfalarını HTTP ile
+eşzamanlı gezer, ürün URL'lerini tekilleştirerek çıkarır ve scrape/analiz hattına
+besler.
+
+- Listeleme sayfaları domain sınırlayıcı ve proxy havuzu üzerinden çekilir
+- Ürünler sınırlı bir kuyruğa yazılır; işçiler geride kalırsa keşif bekler (back-pressure)
+- Durum data/crawls/{crawl_id}.json dosyasına düzenli yazılır; kesilen tarama kaldığı
+  yerden devam ettirilebilir
+- İlerleme, işlem hızı ve hata oranı progress() ile raporlanır
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+import aiohttp
+
+from .bot_detection import BotChallengeError, classify_html
+from analyzer.rate_limiter import BULK, llm_priority
+from utils.config import Config
+from utils.deadline import Deadline
+from utils.domain_limiter import DomainLimiter
+from utils.latency_tracker import get_latency_tracker
+from utils.proxy_pool import BLOCKED, FAILURE, SUCCESS, ProxyPool
+from utils.retry import get_retry_policy
+
+logger = logging.getLogger(__name__)
+
+HREF_PATTERN = re.compile(r'href=["\']([^"\']+)["\']', re.IGNORECASE)
+
+
+class ListingSource:
+    """Bir sitenin listeleme sayfalama parametresi ve ürün linki kalıbı"""
+
+    name = ''
+    domains: List[str] = []
+    page_param = 'page'
+    product_pattern = re.compile(r'$^')
+
+    def matches(self, domain: str) -> bool:
+        return any(domain.endswith(d) for d in self.domains)
+
+    def page_url(self, listing_url: str, page: int) -> str:
+        """1'den başlayan sayfa numarası için listeleme URL'si"""
+        parsed = urlparse(listing_url)
+        query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if k != self.page_param]
+        if page > 1:
+            query.append((self.page_param, str(page)))
+        return urlunparse(parsed._replace(query=urlencode(query), fragment=''))
+
+    def canonical(self, product_url: str) -> Optional[str]:
+        """Ürün linkini tekilleştirme anahtarı olacak biçime getir; ürün değilse None"""
+        parsed = urlparse(product_url)
+        if not self.matches(parsed.netloc.lower()) or not self.product_pattern.search(parsed.path):
+            return None
+        return f"https://{parsed.netloc.lower()}{parsed.path}"
+
+    def extract_products(self, html: str, base_url: str) -> List[str]:
+        """Sayfadaki ürün linklerini sayfa sırasıyla, tekrarsız döndür"""
+        seen: Set[str] = set()
+        products = []
+        for href in HREF_PATTERN.findall(html):
+            url = self.canonical(urljoin(base_url, href.replace('&amp;', '&')))
+            if url and url not in seen:
+                seen.add(url)
+                products.append(url)
+        return products
+
+
+class TrendyolListingSource(ListingSource):
+    name = 'trendyol'
+    domains = ['trendyol.com']
+    page_param = 'pi'
+    product_pattern = re.compile(r'-p-\d+$')
+
+
+class HepsiburadaListingSource(ListingSource):
+    name = 'hepsiburada'
+    domains = ['hepsiburada.com']
+    page_param = 'sayfa'
+    product_pattern = re.compile(r'-(p|pm)-[A-Za-z0-9]+$')
+
+
+class N11ListingSource(ListingSource):
+    name = 'n11'
+    domains = ['n11.com']
+    page_param = 'pg'
+    product_pattern = re.compile(r'^/urun/[^/]+$')
+
+
+class AmazonListingSource(ListingSource):
+    name = 'amazon'
+    domains = ['amazon.com.tr', 'amazon.com']
+    page_param = 'page'
+    product_pattern = re.compile(r'/dp/([A-Z0-9]{10})')
+
+    def canonical(self, product_url: str) -> Optional[str]:
+        # Aynı ürünün farklı slug/ref linkleri tek ASIN'e indirgenir
+        parsed = urlparse(product_url)
+        match = self.product_pattern.search(parsed.path)
+        if not self.matches(parsed.netloc.lower()) or not match:
+            return None
+        return f"https://{parsed.netloc.lower()}/dp/{match.group(1)}"
+
+
+LISTING_SOURCES: List[ListingSource] = [
+    TrendyolListingSource(),
+    HepsiburadaListingSource(),
+    N11ListingSource(),
+    AmazonListingSource(),
+]
+
+
+def get_listing_source(url: str) -> Optional[ListingSource]:
+    """URL için listeleme kaynağını bul"""
+    domain = urlparse(url).netloc.lower()
+    for source in LISTING_SOURCES:
+        if source.matches(domain):
+            return source
+    return None
+
+
+class CrawlJob:
+    """Tek bir kategori taramasının durumu"""
+
+    RECENT_ERRORS = 20
+
+    def __init__(self, state: Dict[str, Any], checkpoint_path: Path):
+        self.state = state
+        self.checkpoint_path = checkpoint_path
+        self.task: Optional[asyncio.Task] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.in_flight = 0
+        self.started_at = time.monotonic()
+        # Bu oturumda işlenenler - hız hesabı için (devam ettirilen taramada öncekiler hariç)
+        self.processed_this_run = 0
+        self.recent_errors: Deque[Dict[str, str]] = deque(state.get('recent_errors', []), maxlen=self.RECENT_ERRORS)
+
+    @property
+    def crawl_id(self) -> str:
+        return self.state['crawl_id']
+
+    @property
+    def done(self) -> Dict[str, Dict[str, Any]]:
+        return self.state['done']
+
+    def record(self, url: str, result: Dict[str, Any]) -> None:
+        self.done[url] = result
+        self.processed_this_run += 1
+        if not result.get('success'):
+            self.recent_errors.append({'url': url, 'error': result.get('error', 'Bilinmeyen hata')})
+
+    def save(self) -> None:
+        """Durumu atomik olarak diske yaz (yarım dosya bırakmaz)"""
+        self.state['updated_at'] = datetime.now().isoformat()
+        self.state['recent_errors'] = list(self.recent_errors)
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def progress(self) -> Dict[str, Any]:
+        """İlerleme, işlem hızı ve hata oranı"""
+        processed = len(self.done)
+        succeeded = sum(1 for r in self.done.values() if r.get('success'))
+        failed = processed - succeeded
+        discovered = len(self.state['discovered'])
+        target = min(discovered, self.state['max_products']) if self.state['max_products'] else discovered
+
+        elapsed = time.monotonic() - self.started_at
+        per_minute = self.processed_this_run / elapsed * 60 if elapsed > 0 else 0.0
+        remaining = max(0, target - processed)
+
+        return {
+            'crawl_id': self.crawl_id,
+            'category_url': self.state['category_url'],
+            'status': self.state['status'],
+            'listing_pages_fetched': self.state['pages_fetched'],
+            'discovery_complete': self.state['discovery_complete'],
+            'discovered': discovered,
+            'processed': processed,
+            'succeeded': succeeded,
+            'failed': failed,
+            'queued': self.queue.qsize() if self.queue else 0,
+            'in_flight': self.in_flight,
+            'error_rate': round(failed / processed, 3) if processed else 0.0,
+            'throughput_per_minute': round(per_minute, 2),
+            'eta_seconds': round(remaining / per_minute * 60) if per_minute and self.state['status'] == 'running' else None,
+            'elapsed_seconds': round(elapsed, 1),
+            'product_ids': [r['product_id'] for r in self.done.values() if r.get('product_id')],
+            'recent_errors': list(self.recent_errors)[-5:],
+            'started_at': self.state['started_at'],
+            'updated_at': self.state.get('updated_at')
+        }
+
+
+class CategoryCrawler:
+    """Kategori taramalarını başlatan, izleyen ve devam ettiren yönetici"""
+
+    # Bu kadar ürün işlendikçe durum diske yazılır
+    CHECKPOINT_EVERY = 5
+
+    def __init__(self, scraper, analyzer, checkpoint_dir: Optional[str] = None):
+        """
+        Args:
+            scraper: ProductScraper (proxy havuzu ve scrape_product için)
+            analyzer: ProductDetailedAnalyzer
+            checkpoint_dir: Tarama durum dosyalarının dizini
+        """
+        self.config = Config()
+        self.scraper = scraper
+        self.analyzer = analyzer
+        self.checkpoint_dir = Path(checkpoint_dir or self.config.crawl_checkpoint_dir)
+
+        self.proxy_pool: ProxyPool = getattr(scraper, 'proxy_pool', None) or ProxyPool()
+        egress_count = max(1, len(self.proxy_pool.proxies))
+        self.limiter = DomainLimiter(max_concurrent=self.config.crawl_listing_concurrency * egress_count)
+        self.latency = get_latency_tracker()
+        self.retry_policy = get_retry_policy(
+            'listing_page',
+            max_retries=self.config.max_retries,
+            base_delay=self.config.retry_base_delay,
+            max_delay=self.config.retry_max_delay
+        )
+
+        self.jobs: Dict[str, CrawlJob] = {}
+
+    def _checkpoint_path(self, crawl_id: str) -> Path:
+        return self.checkpoint_dir / f"{crawl_id}.json"
+
+    def _load(self, crawl_id: str) -> Optional[CrawlJob]:
+        path = self._checkpoint_path(crawl_id)
+        if not re.fullmatch(r'[A-Za-z0-9_-]+', crawl_id) or not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return CrawlJob(json.load(f), path)
+        except Exception as e:
+            logger.error(f"Tarama durumu okunamadı {crawl_id}: {e}")
+            return None
+
+    def get(self, crawl_id: str) -> Optional[CrawlJob]:
+        """Bellekteki veya diskteki taramayı bul"""
+        job = self.jobs.get(crawl_id)
+        if job is None:
+            job = self._load(crawl_id)
+            if job is not None and job.state['status'] == 'running':
+                # Süreç yeniden başlamış; tarama yarıda kalmış
+                job.state['status'] = 'interrupted'
+        return job
+
+    def list_crawls(self) -> List[Dict[str, Any]]:
+        """Kayıtlı taramaların özeti"""
+        crawl_ids = {path.stem for path in self.checkpoint_dir.glob('*.json')} | set(self.jobs)
+        summaries = []
+        for crawl_id in sorted(crawl_ids):
+            job = self.get(crawl_id)
+            if job:
+                progress = job.progress()
+                progress.pop('product_ids', None)
+                summaries.append(progress)
+        return summaries
+
+    def start(self, category_url: str, max_pages: Optional[int] = None, max_products: int = 0,
+              max_reviews: int = 50, resume_id: Optional[str] = None) -> CrawlJob:
+        """
+        Yeni tarama başlat veya kayıtlı taramayı devam ettir
+
+        Args:
+            category_url: Kategori veya arama sonucu URL'si
+            max_pages: Gezilecek en fazla listeleme sayfası
+            max_products: En fazla işlenecek ürün (0: sınırsız)
+            max_reviews: Ürün başına yorum sayısı
+            resume_id: Devam ettirilecek taramanın kimliği
+
+        Raises:
+            ValueError: Site desteklenmiyorsa veya tarama bulunamazsa
+        """
+        if resume_id:
+            job = self.get(resume_id)
+            if job is None:
+                raise ValueError(f"Tarama bulunamadı: {resume_id}")
+            if job.task and not job.task.done():
+                return job
+            # Devam eden oturumun hızı sıfırdan ölçülür
+            job.started_at = time.monotonic()
+            job.processed_this_run = 0
+            logger.info(f"Tarama devam ettiriliyor: {resume_id} ({len(job.done)} ürün işlenmiş)")
+        else:
+            if get_listing_source(category_url) is None:
+                raise ValueError(f"Desteklenmeyen site: {urlparse(category_url).netloc}")
+            crawl_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+            state = {
+                'crawl_id': crawl_id,
+                'category_url': category_url,
+                'max_pages': max_pages or self.config.crawl_max_pages,
+                'max_products': max_products,
+                'max_reviews': max_reviews,
+                'status': 'running',
+                'next_page': 1,
+                'pages_fetched': 0,
+                'discovery_complete': False,
+                'discovered': [],
+                'done': {},
+                'started_at': datetime.now().isoformat()
+            }
+            job = CrawlJob(state, self._checkpoint_path(crawl_id))
+            logger.info(f"Kategori taraması başladı: {crawl_id} - {category_url}")
+
+        job.state['status'] = 'running'
+        job.save()
+        self.jobs[job.crawl_id] = job
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    def cancel(self, crawl_id: str) -> bool:
+        """Taramayı durdur; durum kaydedilir, sonra devam ettirilebilir"""
+        job = self.jobs.get(crawl_id)
+        if not job or not job.task or job.task.done():
+            return False
+        job.task.cancel()
+        return True
+
+    async def _run(self, job: CrawlJob) -> None:
+        """Keşif + işçiler; kuyruk sınırlı olduğundan keşif işçilerin hızına uyar"""
+        job.queue = asyncio.Queue(maxsize=max(1, self.config.crawl_queue_size))
+        workers = [asyncio.create_task(self._worker(job)) for _ in range(max(1, self.config.crawl_workers))]
+        try:
+            # Önce önceki oturumdan kalan, keşfedilmiş ama işlenmemiş ürünler
+            for url in job.state['discovered']:
+                if url not in job.done and not self._limit_reached(job):
+                    await job.queue.put(url)
+
+            if not job.state['discovery_complete']:
+                await self._discover(job)
+
+            await job.queue.join()
+            job.state['status'] = 'completed'
+            logger.info(f"Kategori taraması tamamlandı: {job.crawl_id} ({len(job.done)} ürün)")
+        except asyncio.CancelledError:
+            job.state['status'] = 'cancelled'
+            logger.info(f"Kategori taraması durduruldu: {job.crawl_id}")
+        except Exception as e:
+            job.state['status'] = 'failed'
+            job.state['error'] = str(e)
+            logger.error(f"Kategori taraması hatası {job.crawl_id}: {e}")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            job.save()
+
+    def _limit_reached(self, job: CrawlJob) -> bool:
+        max_products = job.state['max_products']
+        return bool(max_products) and len(job.state['discovered']) >= max_products
+
+    async def _discover(self, job: CrawlJob) -> None:
+        """Listeleme sayfalarını pencereler halinde eşzamanlı gez, yeni ürünleri kuyruğa yaz"""
+        state = job.state
+        source = get_listing_source(state['category_url'])
+        seen = set(state['discovered'])
+        window = self.limiter.max_concurrent
+
+        headers = {'User-Agent': self.config.user_agent, 'Accept-Language': 'tr-TR,tr;q=0.9'}
+        connector = aiohttp.TCPConnector(limit_per_host=window)
+        async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+            while state['next_page'] <= state['max_pages'] and not self._limit_reached(job):
+                pages = range(state['next_page'], min(state['next_page'] + window, state['max_pages'] + 1))
+                results = await asyncio.gather(
+                    *[self._fetch_listing(session, source, state['category_url'], page) for page in pages],
+                    return_exceptions=True
+                )
+
+                new_urls = []
+                for page, result in zip(pages, results):
+                    if isinstance(result, BotChallengeError):
+                        if state['pages_fetched'] == 0 and not seen:
+                            raise result
+                        logger.warning(f"Listeleme engellendi, keşif durduruluyor: sayfa {page} - {result}")
+                        state['discovery_complete'] = True
+                        break
+                    if isinstance(result, Exception):
+                        logger.warning(f"Listeleme sayfası alınamadı: sayfa {page} - {result}")
+                        continue
+                    state['pages_fetched'] += 1
+                    for url in result:
+                        if url not in seen:
+                            seen.add(url)
+                            new_urls.append(url)
+
+                state['next_page'] = pages.stop
+
+                for url in new_urls:
+                    if self._limit_reached(job):
+                        break
+                    state['discovered'].append(url)
+                    # Kuyruk doluysa işçiler yetişene kadar bekler (back-pressure)
+                    await job.queue.put(url)
+
+                logger.info(f"Tarama {job.crawl_id}: {state['pages_fetched']} sayfa, "
+                            f"{len(state['discovered'])} ürün keşfedildi")
+                job.save()
+
+                # Yeni ürün çıkmayan pencere listelemenin sonu demektir
+                if not new_urls or state['discovery_complete']:
+                    break
+
+        state['discovery_complete'] = True
+
+    async def _fetch_listing(self, session: aiohttp.ClientSession, source: ListingSource,
+                             category_url: str, page: int) -> List[str]:
+        """Tek listeleme sayfasını çek (geçici hatalarda yeniden denenir)"""
+        return await self.retry_policy.run(
+            lambda: self._fetch_listing_once(session, source, category_url, page),
+            label=f"{source.name} sayfa {page}"
+        )
+
+    async def _fetch_listing_once(self, session: aiohttp.ClientSession, source: ListingSource,
+                                  category_url: str, page: int) -> List[str]:
+        page_url = source.page_url(category_url, page)
+        domain = urlparse(page_url).netloc.lower()
+
+        async with self.limiter.limit(domain):
+            lease = await self.proxy_pool.acquire_async(domain)
+            outcome = FAILURE
+            try:
+                with self.latency.measure('http', domain):
+                    async with session.get(page_url, proxy=lease.url if lease else None,
+                                           timeout=aiohttp.ClientTimeout(total=self.latency.timeout('http', domain))
+                                           ) as response:
+                        html = await response.text()
+                        status = response.status
+                        request_info, history = response.request_info, response.history
+
+                reason = classify_html(html, status)
+                if reason:
+                    error = BotChallengeError(domain, reason, status)
+                    outcome = FAILURE if error.rate_limited else BLOCKED
+                    raise error
+                if status >= 400:
+                    raise aiohttp.ClientResponseError(request_info, history, status=status,
+                                                      message=f'HTTP {status}: {page_url}')
+                outcome = SUCCESS
+            finally:
+                if lease:
+                    lease.release(outcome)
+
+        return await asyncio.to_thread(source.extract_products, html, page_url)
+
+    async def _worker(self, job: CrawlJob) -> None:
+        """Kuyruktan ürün al, scrape et, analiz et; hata diğer ürünleri etkilemez"""
+        max_reviews = job.state['max_reviews']
+        while True:
+            url = await job.queue.get()
+            job.in_flight += 1
+            try:
+                if url in job.done:
+                    continue
+                deadline = Deadline(self.config.crawl_product_seconds, retry_budget=self.config.retry_budget)
+                job.record(url, await self._process(url, max_reviews, deadline))
+                if len(job.done) % self.CHECKPOINT_EVERY == 0:
+                    job.save()
+            except Exception as e:
+                job.record(url, {'success': False, 'error': str(e)})
+            finally:
+                job.in_flight -= 1
+                job.queue.task_done()
+
+    async def _process(self, url: str, max_reviews: int, deadline: Deadline) -> Dict[str, Any]:
+        scraped_data = await self.scraper.scrape_product(url, max_reviews=max_reviews, deadline=deadline)
+        if not scraped_data.get('success'):
+            return {'success': False, 'error': scraped_data.get('error', 'Scraping başarısız')}
+
+        # Toplu tarama Gemini kotasında etkileşimli isteklerin arkasında bekler
+        with llm_priority(BULK):
+            analysis = await self.analyzer.analyze_single_product(scraped_data, deadline=deadline)
+        if analysis.get('error'):
+            return {'success': False, 'error': analysis['error']}
+
+        return {
+            'success': True,
+            'product_id': analysis.get('product_id'),
+            'title': scraped_data.get('title', '')[:100],
+            'partial': deadline.partial
+        }
@@ -0,0 +1,215 @@
+"""
+Spekülatif Ön Çekme (Prefetch)
+Ana sayfadaki forma geçerli ürün URL'leri yapıştırıldığı anda düşük öncelikli
+scraping başlatır. Kullanıcı "Analizi Başlat" dediğinde /analyze_detailed, devam
+eden veya bitmiş işi claim() ile devralır; kullanıcı baştan beklemez.
+
+- Ön çekmeler ayrı, küçük bir semaforla sınırlanır (gerçek isteklerin önüne geçmez)
+- Henüz başlamamış ön çekme claim edilirse iptal edilir, istek kendisi scrape eder
+- Formdan silinen URL'lerin ve süresi (PREFETCH_TTL) dolan işlerin sırada bekleyen
+  görevleri iptal edilir ve sayılır; kapasite boşa harcanmaz
+- Başlamış scraping iptal edilmez (yarıda kesilen tarayıcı açılışı sahipsiz Chrome
+  ve profil kiralaması bırakır); yalnızca takipten çıkarılır, sonucu scrape önbelleğine yazılır
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from utils.config import Config
+from utils.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchEntry:
+    """Tek URL için ön çekme görevi"""
+
+    def __init__(self, url: str, max_reviews: int, client_id: str):
+        self.url = url
+        self.max_reviews = max_reviews
+        self.client_id = client_id
+        self.created_at = time.monotonic()
+        self.last_seen = self.created_at
+        self.started_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def started(self) -> bool:
+        return self.started_at is not None
+
+    @property
+    def finished(self) -> bool:
+        return bool(self.task and self.task.done())
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        if not self.finished or self.task.cancelled() or self.task.exception():
+            return None
+        return self.task.result()
+
+
+class PrefetchManager:
+    """Form yazılırken başlatılan scraping görevlerini yönetir"""
+
+    def __init__(self, scraper):
+        """
+        Args:
+            scraper: ProductScraper (scrape_product ve desteklenen siteler için)
+        """
+        self.config = Config()
+        self.scraper = scraper
+        self.ttl = self.config.prefetch_ttl
+        self._entries: Dict[str, PrefetchEntry] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats = {
+            'requested': 0, 'started': 0, 'completed': 0, 'failed': 0,
+            'claimed_in_flight': 0, 'claimed_done': 0, 'promoted': 0,
+            'cancelled_abandoned': 0, 'expired': 0, 'claim_timeouts': 0, 'detached': 0
+        }
+
+    def _supported(self, url: str) -> bool:
+        return url.startswith('http') and self.scraper._get_domain(url) in self.scraper.supported_sites
+
+    def prefetch(self, urls: List[str], max_reviews: int = 100, client_id: str = '') -> Dict[str, Any]:
+        """
+        Formdaki güncel URL listesine göre ön çekmeleri başlat/iptal et
+
+        Args:
+            urls: Formdaki URL'ler (tam liste; listede olmayan eski URL'ler terk edilmiş sayılır)
+            max_reviews: Formda seçili yorum sayısı
+            client_id: Tarayıcı sekmesi kimliği - terk edilen işler sekme bazında bulunur
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, self.config.prefetch_concurrency))
+        self._expire()
+
+        wanted = [u for u in dict.fromkeys(u.strip() for u in urls) if self._supported(u)]
+        wanted = wanted[:self.config.prefetch_max_urls]
+        wanted_set: Set[str] = set(wanted)
+
+        # Bu sekmenin artık formda olmayan URL'leri
+        for url, entry in list(self._entries.items()):
+            if entry.client_id == client_id and url not in wanted_set:
+                self._drop(url, 'cancelled_abandoned')
+
+        started = []
+        for url in wanted:
+            entry = self._entries.get(url)
+            if entry and (entry.max_reviews >= max_reviews or entry.started):
+                entry.last_seen = time.monotonic()
+                continue
+            if entry:
+                # Daha fazla yorum isteniyor ve iş henüz başlamadı: yeniden kur
+                self._drop(url, 'cancelled_abandoned')
+            self.stats['requested'] += 1
+            entry = PrefetchEntry(url, max_reviews, client_id)
+            entry.task = asyncio.create_task(self._run(entry))
+            self._entries[url] = entry
+            started.append(url)
+
+        return {
+            'started': started,
+            'tracked': [self.describe(u) for u in wanted if u in self._entries]
+        }
+
+    async def _run(self, entry: PrefetchEntry) -> Dict[str, Any]:
+        async with self._semaphore:
+            entry.started_at = time.monotonic()
+            self.stats['started'] += 1
+            logger.info(f"Ön çekme başladı: {entry.url}")
+            deadline = Deadline(self.config.prefetch_seconds, retry_budget=self.config.retry_budget)
+            result = await self.scraper.scrape_product(entry.url, max_reviews=entry.max_reviews, deadline=deadline)
+            self.stats['completed' if result.get('success') else 'failed'] += 1
+            return result
+
+    def _drop(self, url: str, reason: str) -> None:
+        entry = self._entries.pop(url, None)
+        if not entry:
+            return
+        if entry.task and not entry.task.done():
+            if entry.started:
+                # Çalışan scraping kesilmez; biter ve sonucu scrape önbelleğine düşer
+                self.stats['detached'] += 1
+                entry.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            else:
+                entry.task.cancel()
+        if reason in self.stats:
+            self.stats[reason] += 1
+        if reason != 'claimed':
+            logger.info(f"Ön çekme bırakıldı ({reason}): {url}")
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for url, entry in list(self._entries.items()):
+            if now - entry.last_seen > self.ttl:
+                self._drop(url, 'expired')
+
+    async def claim(self, url: str, max_reviews: int, deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """
+        Gerçek istek için ön çekme sonucunu devral
+
+        Returns:
+            Scraping sonucu; kullanılabilir ön çekme yoksa None (çağıran kendisi scrape eder)
+        """
+        self._expire()
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        if entry.max_reviews < max_reviews or not entry.started:
+            # Yetersiz veya sırada bekleyen iş: iptal et, istek tam öncelikle kendisi çeksin
+            self._drop(url, 'promoted' if not entry.started else 'cancelled_abandoned')
+            return None
+
+        def release(reason: str) -> None:
+            # Beklerken aynı URL için yeni bir ön çekme kurulduysa ona dokunma
+            if self._entries.get(url) is entry:
+                self._drop(url, reason)
+
+        in_flight = not entry.finished
+        try:
+            if in_flight and deadline is not None and not deadline.unlimited:
+                result = await asyncio.wait_for(asyncio.shield(entry.task), timeout=deadline.remaining())
+            else:
+                result = await asyncio.shield(entry.task)
+        except asyncio.TimeoutError:
+            # Bütçe bitti: ön çekme takipten çıkar, bitince sonucu önbelleğe yazar
+            release('claim_timeouts')
+            return None
+        except asyncio.CancelledError:
+            if not entry.task.cancelled():
+                # İptal edilen bu istek; ön çekme diğer istekler için sürer
+                raise
+            # Ön çekme başka bir istekte iptal edildi (ör. sekme URL'yi formdan sildi)
+            logger.info(f"Ön çekme iptal edilmişti: {url}")
+            release('claimed')
+            return None
+        except Exception as e:
+            logger.warning(f"Ön çekme sonucu kullanılamadı: {url} - {e}")
+            release('claimed')
+            return None
+
+        release('claimed')
+        if not result or not result.get('success'):
+            return None
+        self.stats['claimed_in_flight' if in_flight else 'claimed_done'] += 1
+        logger.info(f"Ön çekme sonucu kullanıldı ({'devam eden' if in_flight else 'hazır'}): {url}")
+        result = dict(result)
+        result['prefetched'] = True
+        return result
+
+    def describe(self, url: str) -> Dict[str, Any]:
+        entry = self._entries[url]
+        if entry.finished:
+            result = entry.result()
+            state = 'ready' if result and result.get('success') else 'failed'
+        else:
+            state = 'running' if entry.started else 'queued'
+        return {'url': url, 'state': state, 'max_reviews': entry.max_reviews}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """İzleme için sayaçlar ve takip edilen işler"""
+        return {
+            'stats': dict(self.stats),
+            'entries': [self.describe(url) for url in list(self._entries)]
+        }
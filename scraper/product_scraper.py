@@ -14,26 +14,99 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import re
 import time
 import logging
+from contextvars import ContextVar
 from urllib.parse import urlparse
 
 from .advanced_review_scraper_v3 import AdvancedReviewScraperV3
+from .bot_detection import BotChallengeError, check_driver, check_response
+from .browser_profiles import BrowserProfilePool
+from .cdp_browser import CDPBrowserManager
+from .remote_browser import RemoteBrowserGrid
+from .review_api_fetcher import ReviewAPIFetcher
+from .scrape_cache import ScrapeCache
+from utils.config import Config
+from utils.circuit_breaker import CircuitBreakerRegistry
+from utils.deadline import Deadline, ensure_deadline
+from utils.latency_tracker import get_latency_tracker
+from utils.proxy_pool import BLOCKED, FAILURE, SUCCESS, ProxyLease, ProxyPool
+from utils.retry import classify_result, get_retry_policy, retry_stats
+from utils.sequential_sampling import SequentialSampler
 
 logger = logging.getLogger(__name__)
 
+# Aktif scraping görevinin kiraladığı proxy (driver ve HTTP çağrıları buradan okur)
+_current_lease: ContextVar[Optional[ProxyLease]] = ContextVar('current_proxy_lease', default=None)
+
 
 class ProductScraper:
     """Çoklu pazaryeri ürün scraper'ı"""
     
+    # Tarayıcı yolunu denemek için gereken en az zaman bütçesi (sn)
+    MIN_BROWSER_BUDGET = 15.0
+    
     def __init__(self):
+        self.config = Config()
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
         
+        # Kalıcı profil + disk önbelleği: statik dosyalar ürünler arasında yeniden indirilmez
+        self.profile_pool = BrowserProfilePool(
+            root=self.config.browser_profile_dir,
+            max_profiles=self.config.browser_profile_max,
+            cache_size_mb=self.config.browser_cache_size_mb,
+            max_age_days=self.config.browser_profile_max_age_days
+        ) if self.config.browser_profiles_enabled else None
+        
+        # Doğrudan CDP backend'i (BROWSER_BACKEND=cdp) - tarayıcı süreci sıcak tutulur
+        self.cdp_manager = CDPBrowserManager(
+            user_agent=self.session.headers['User-Agent'], profile_pool=self.profile_pool
+        )
+        
+        # Uzak tarayıcı backend'i (BROWSER_BACKEND=remote) - oturumlar Selenium Grid'den alınır
+        self.remote_grid = RemoteBrowserGrid(
+            self.config.selenium_grid_url,
+            queue_timeout=self.config.grid_queue_timeout,
+            status_interval=self.config.grid_status_interval
+        ) if self.config.browser_backend == 'remote' else None
+        
+        # Sorunlu sitelerde tarayıcıyı atlayan domain bazlı devre kesiciler
+        self.circuit_breakers = CircuitBreakerRegistry(
+            failure_threshold=self.config.circuit_failure_threshold,
+            latency_threshold=self.config.circuit_latency_threshold,
+            recovery_timeout=self.config.circuit_recovery_timeout
+        )
+        self.scrape_cache = ScrapeCache(ttl=self.config.scrape_cache_ttl)
+        
+        # Domain bazlı gecikme histogramları - timeout'lar bunlardan türetilir
+        self.latency = get_latency_tracker()
+        
+        # HTTP istemcisi ve tarayıcıların paylaştığı proxy havuzu (PROXY_URLS)
+        self.proxy_pool = ProxyPool(
+            self.config.proxy_urls,
+            max_concurrent_per_proxy=self.config.proxy_max_concurrent,
+            cooldown=self.config.proxy_cooldown,
+            sticky_ttl=self.config.proxy_sticky_ttl
+        )
+        
+        # Geçici hatalarda üstel bekleme + jitter ile yeniden deneme (MAX_RETRIES)
+        self.retry_policy = get_retry_policy(
+            'scrape',
+            max_retries=self.config.max_retries,
+            base_delay=self.config.retry_base_delay,
+            max_delay=self.config.retry_max_delay
+        )
+        
+        # Sayfalı yorum listelerini tarayıcısız çeken HTTP istemcisi (REVIEW_FETCH_MODE)
+        self.review_fetcher = ReviewAPIFetcher(
+            user_agent=self.session.headers['User-Agent'], proxy_pool=self.proxy_pool
+        )
+        
         # Desteklenen siteler
         self.supported_sites = {
             'amazon.com.tr': self._scrape_amazon,
@@ -44,6 +117,18 @@ class ProductScraper:
             'gittigidiyor.com': self._scrape_gittigidiyor
         }
     
+    def get_circuit_status(self) -> Dict[str, Any]:
+        """Devre kesici ve önbellek durumunu döndür (izleme için)"""
+        return {
+            'circuits': self.circuit_breakers.snapshot(),
+            'open_circuits': self.circuit_breakers.open_circuits(),
+            'proxies': self.proxy_pool.snapshot(),
+            'retries': retry_stats(),
+            'browser_profiles': self.profile_pool.snapshot() if self.profile_pool else None,
+            'remote_grid': self.remote_grid.snapshot() if self.remote_grid else None,
+            'scrape_cache': self.scrape_cache.stats()
+        }
+    
     def get_supported_sites(self) -> List[str]:
         """Desteklenen sitelerin listesini döndür"""
         return list(self.supported_sites.keys())
@@ -53,8 +138,91 @@ class ProductScraper:
         return urlparse(url).netloc.lower().replace('www.', '')
     
     def _get_driver(self) -> webdriver.Chrome:
-        """Selenium driver oluştur"""
+        """Yapılandırılmış backend'e göre tarayıcı driver'ı oluştur"""
+        lease = _current_lease.get()
+        if self.remote_grid is not None:
+            return self._get_remote_driver(lease)
+        if self.config.browser_backend == 'cdp':
+            try:
+                return self.cdp_manager.new_driver(proxy_url=lease.url if lease else None)
+            except Exception as e:
+                logger.warning(f"CDP backend başlatılamadı, Selenium kullanılıyor: {e}")
+        
+        return self._get_selenium_driver(lease)
+    
+    async def _open_driver(self, deadline: Deadline) -> webdriver.Chrome:
+        """
+        Driver'ı event loop'u bloklamadan (thread'de) aç; uzak backend'de önce grid'de
+        boş slot beklenir
+        
+        Raises:
+            GridCapacityError: Zaman bütçesi/kuyruk süresi içinde boş slot bulunamazsa
+        """
+        if self.remote_grid is None:
+            return await self._start_driver()
+        async with self.remote_grid.reserve(timeout=deadline.cap(self.remote_grid.queue_timeout)):
+            return await self._start_driver()
+    
+    async def _start_driver(self) -> webdriver.Chrome:
+        """
+        _get_driver'ı thread'de çalıştır
+        
+        Bekleyen görev iptal edilse de thread Chrome'u açmaya devam eder; o zaman açılan
+        driver kapatılır (aksi halde sahipsiz Chrome süreci ve profil kiralaması kalır).
+        """
+        opener = asyncio.ensure_future(asyncio.to_thread(self._get_driver))
+        try:
+            return await asyncio.shield(opener)
+        except asyncio.CancelledError:
+            opener.add_done_callback(self._quit_orphaned_driver)
+            raise
+    
+    @staticmethod
+    def _quit_orphaned_driver(opener: asyncio.Future) -> None:
+        if opener.cancelled() or opener.exception() is not None:
+            return
+        logger.info("İptal edilen istek için açılan tarayıcı kapatılıyor")
+        asyncio.get_running_loop().run_in_executor(None, opener.result().quit)
+    
+    def _request_proxies(self) -> Optional[Dict[str, str]]:
+        """Aktif görevin proxy'si için requests proxies parametresi"""
+        lease = _current_lease.get()
+        return lease.requests_proxies if lease else None
+    
+    async def _call_with_proxy(self, domain: str, deadline: Deadline, func, *args, **kwargs) -> Dict[str, Any]:
+        """
+        func'u havuzdan kiralanan proxy üzerinden çalıştır ve sonucu proxy skoruna işle
+        
+        Havuz boşsa veya süre içinde proxy boşalmazsa doğrudan bağlantı kullanılır.
+        """
+        lease = await self.proxy_pool.acquire_async(domain, timeout=deadline.cap(30.0))
+        if self.proxy_pool.enabled and lease is None:
+            logger.warning(f"Uygun proxy bulunamadı, doğrudan bağlanılıyor: {domain}")
+        
+        token = _current_lease.set(lease)
+        outcome = FAILURE
+        try:
+            result = await func(*args, **kwargs)
+            if isinstance(result, dict) and result.get('success'):
+                outcome = SUCCESS
+            return result
+        except BotChallengeError as e:
+            # Salt hız sınırı (429/503) proxy'yi engellenmiş saymaz
+            outcome = FAILURE if e.rate_limited else BLOCKED
+            raise
+        finally:
+            _current_lease.reset(token)
+            if lease:
+                lease.release(outcome)
+    
+    def _chrome_options(self, lease: Optional[ProxyLease] = None) -> Options:
+        """Yerel ve uzak tarayıcıların ortak Chrome ayarları"""
         chrome_options = Options()
+        if lease:
+            # Chrome, --proxy-server ile kimlik bilgisi kabul etmez (CDP backend'i destekler)
+            if lease.proxy.credentials:
+                logger.warning(f"Selenium kimlik doğrulamalı proxy desteklemiyor: {lease.proxy.label}")
+            chrome_options.add_argument(f'--proxy-server={lease.proxy.server}')
         chrome_options.add_argument('--headless')
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
@@ -76,15 +244,54 @@ class ProductScraper:
         chrome_options.add_argument('--silent')
         chrome_options.add_argument('--disable-default-apps')
         chrome_options.add_argument('--disable-sync')
+        return chrome_options
+    
+    def _get_remote_driver(self, lease: Optional[ProxyLease] = None) -> webdriver.Remote:
+        """Selenium Grid'de driver oluştur (profiller grid node'unda yerel olmadığından kullanılmaz)"""
+        try:
+            driver = self.remote_grid.new_driver(self._chrome_options(lease))
+        except Exception as e:
+            logger.error(f"Grid oturumu açılamadı: {e}")
+            raise
+        try:
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        except Exception:
+            # Açık kalan oturum grid slotunu süre dolana kadar işgal eder
+            driver.quit()
+            raise
+        return driver
+    
+    def _get_selenium_driver(self, lease: Optional[ProxyLease] = None) -> webdriver.Chrome:
+        """Selenium driver oluştur"""
+        chrome_options = self._chrome_options(lease)
+        # Çıkış noktasına özel kalıcı profil; hepsi kullanımdaysa Chrome geçici profil açar
+        profile = self.profile_pool.acquire(lease.proxy.label if lease else 'direct') if self.profile_pool else None
+        if profile:
+            for argument in profile.chrome_args():
+                chrome_options.add_argument(argument)
         
         try:
             service = Service(ChromeDriverManager().install())
             driver = webdriver.Chrome(service=service, options=chrome_options)
             driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            return driver
         except Exception as e:
+            if profile:
+                profile.release()
             logger.error(f"Chrome driver oluşturulamadı: {e}")
             raise e
+        
+        if profile:
+            # Profil, tarayıcı kapanınca bir sonraki driver'a iade edilir
+            original_quit = driver.quit
+            
+            def quit_and_release():
+                try:
+                    original_quit()
+                finally:
+                    profile.release()
+            
+            driver.quit = quit_and_release
+        return driver
     
     async def scrape_multiple_products(self, urls: List[str]) -> List[Dict[str, Any]]:
         """Birden fazla ürünü paralel olarak scrape et"""
@@ -105,8 +312,20 @@ class ProductScraper:
         
         return valid_results
     
-    async def scrape_product(self, url: str, max_reviews: int = 100) -> Dict[str, Any]:
-        """Tek bir ürünü scrape et"""
+    async def scrape_product(self, url: str, max_reviews: int = 100,
+                             deadline: Optional[Deadline] = None,
+                             sampler: Optional[SequentialSampler] = None) -> Dict[str, Any]:
+        """
+        Tek bir ürünü scrape et
+        
+        Args:
+            url: Ürün URL'si
+            max_reviews: Maksimum yorum sayısı (uyarlanabilir modda üst bütçe)
+            deadline: Uçtan uca zaman bütçesi; azaldığında opsiyonel adımlar atlanır
+            sampler: Uyarlanabilir yorum sayısı - güven aralıkları hedefe inince yorum
+                çekme durur; sonuca 'sampling' özeti eklenir
+        """
+        deadline = ensure_deadline(deadline)
         try:
             domain = self._get_domain(url)
             
@@ -118,28 +337,116 @@ class ProductScraper:
                 }
             
             logger.info(f"Scraping başlatılıyor: {url}")
+            breaker = self.circuit_breakers.get(domain)
             
-            # İlk olarak Selenium ile dene
-            try:
-                scraper_func = self.supported_sites[domain]
-                result = await scraper_func(url, max_reviews=max_reviews)
-                result['url'] = url
-                result['domain'] = domain
+            # Bütçe tarayıcıya yetmiyorsa doğrudan ucuz yola geç
+            browser_allowed = deadline.has_time(self.MIN_BROWSER_BUDGET)
+            if not browser_allowed:
+                logger.warning(f"Zaman bütçesi az ({deadline.remaining():.0f} sn), tarayıcı atlanıyor: {domain}")
+                deadline.skip('browser_scrape')
+            
+            # Sayfalı yorum listesi modu: yorumlar tarayıcı açmadan HTTP ile çekilir
+            if self.config.review_fetch_mode in ('api', 'auto') and self.review_fetcher.supports(url):
+                try:
+                    api_result = await self._scrape_via_review_api(url, domain, max_reviews, deadline, sampler)
+                    if api_result.get('success'):
+                        self._attach_sampling(api_result, sampler)
+                        api_result['partial'] = deadline.partial
+                        api_result['time_budget'] = deadline.to_dict()
+                        self.scrape_cache.put(url, api_result)
+                        logger.info(f"Yorum listesi ile scraping başarılı: {domain}")
+                        return api_result
+                    logger.warning(f"Yorum listesi alınamadı: {api_result.get('error')}")
+                except BotChallengeError as e:
+                    breaker.record_failure(str(e), trip_immediately=True)
                 
-                if result.get('success'):
-                    logger.info(f"Selenium scraping başarılı: {domain}")
-                    return result
-                else:
-                    logger.warning(f"Selenium scraping başarısız, fallback deneniyor: {domain}")
-            except Exception as e:
-                logger.warning(f"Selenium hatası, fallback deneniyor: {e}")
+                if self.config.review_fetch_mode == 'api':
+                    browser_allowed = False
+            
+            # İlk olarak Selenium ile dene (devre açıksa tarayıcıyı hiç başlatma)
+            if browser_allowed and breaker.allow_request():
+                started = time.monotonic()
+                try:
+                    scraper_func = self.supported_sites[domain]
+                    # Geçici hatalarda (timeout, 5xx, 429) bekleyip yeniden dene; captcha'da dur
+                    result = await self.retry_policy.run(
+                        lambda: self._call_with_proxy(
+                            domain, deadline, scraper_func, url,
+                            max_reviews=max_reviews, deadline=deadline, sampler=sampler
+                        ),
+                        deadline=deadline,
+                        min_attempt_seconds=self.MIN_BROWSER_BUDGET,
+                        result_classifier=classify_result,
+                        label=domain
+                    )
+                    result['url'] = url
+                    result['domain'] = domain
+                    result['partial'] = deadline.partial
+                    result['time_budget'] = deadline.to_dict()
+                    
+                    if result.get('success'):
+                        breaker.record_success(time.monotonic() - started)
+                        self._attach_sampling(result, sampler)
+                        self.scrape_cache.put(url, result)
+                        logger.info(f"Selenium scraping başarılı: {domain}")
+                        return result
+                    else:
+                        breaker.record_failure(result.get('error', 'Başarısız sonuç'), time.monotonic() - started)
+                        logger.warning(f"Selenium scraping başarısız, fallback deneniyor: {domain}")
+                except BotChallengeError as e:
+                    # Engel sayfası: eşiği beklemeden devreyi aç, önbelleğe/ucuz yola geç
+                    breaker.record_failure(str(e), time.monotonic() - started, trip_immediately=True)
+                    cached = self.scrape_cache.get(url, max_age=self.config.scrape_cache_stale_ttl)
+                    if cached:
+                        logger.info(f"Bot engeli nedeniyle önbellekteki sonuç kullanılıyor: {url}")
+                        cached['from_cache'] = True
+                        cached['circuit_state'] = breaker.state
+                        self._attach_sampling(cached, sampler)
+                        return cached
+                except Exception as e:
+                    breaker.record_failure(str(e), time.monotonic() - started)
+                    logger.warning(f"Selenium hatası, fallback deneniyor: {e}")
+                except BaseException:
+                    # İptal (prefetch düşürme, SSE kopması, crawl/refresh durdurma): sonuç yok,
+                    # yarı açık devrenin deneme slotu bırakılmazsa domain kalıcı olarak atlanır
+                    breaker.release_probe()
+                    raise
+            else:
+                if browser_allowed:
+                    logger.warning(f"Devre açık, tarayıcı atlanıyor: {domain}")
+                cached = self.scrape_cache.get(url, max_age=self.config.scrape_cache_stale_ttl)
+                if cached:
+                    logger.info(f"Önbellekteki sonuç kullanılıyor: {url}")
+                    cached['from_cache'] = True
+                    cached['circuit_state'] = breaker.state
+                    self._attach_sampling(cached, sampler)
+                    return cached
             
             # Fallback: Basit HTTP request ile dene
             try:
-                fallback_result = await self._fallback_scrape(url, domain)
+                fallback_result = await self.retry_policy.run(
+                    lambda: self._call_with_proxy(
+                        domain, deadline, self._fallback_scrape, url, domain, deadline=deadline
+                    ),
+                    deadline=deadline,
+                    result_classifier=classify_result,
+                    label=f"{domain} fallback"
+                )
                 if fallback_result.get('success'):
+                    self._attach_sampling(fallback_result, sampler)
+                    fallback_result['partial'] = deadline.partial
+                    fallback_result['time_budget'] = deadline.to_dict()
                     logger.info(f"Fallback scraping başarılı: {domain}")
                     return fallback_result
+            except BotChallengeError as e:
+                result = {
+                    'success': False,
+                    'error': str(e),
+                    'url': url,
+                    'domain': domain
+                }
+                result.update(e.to_dict())
+                return result
             except Exception as e:
                 logger.error(f"Fallback scraping hatası: {e}")
             
@@ -159,10 +466,73 @@ class ProductScraper:
                 'url': url
             }
     
-    async def _fallback_scrape(self, url: str, domain: str) -> Dict[str, Any]:
+    def _attach_sampling(self, result: Dict[str, Any], sampler: Optional[SequentialSampler]) -> None:
+        """Uyarlanabilir modda ulaşılan güven düzeyini sonuca ekle"""
+        if sampler is None:
+            return
+        if sampler.n == 0 or result.get('from_cache'):
+            # Yorumlar yükleyici dışından geldi (önbellek, selector taraması): son listeden ölç
+            sampler.reset()
+            sampler.add(result.get('reviews') or [])
+            sampler.stop_reason = sampler.stop_reason or ('cache' if result.get('from_cache') else 'exhausted')
+        result['sampling'] = sampler.report()
+        logger.info(
+            f"Örnekleme: {sampler.n} yorum, duygu ±{(result['sampling']['proportion_margin'] or 0) * 100:.1f} puan, "
+            f"güven %{result['sampling']['achieved_confidence'] * 100:.0f} ({sampler.stop_reason})"
+        )
+    
+    async def _scrape_via_review_api(self, url: str, domain: str, max_reviews: int,
+                                     deadline: Deadline,
+                                     sampler: Optional[SequentialSampler] = None) -> Dict[str, Any]:
+        """Yorumları sayfalı listeden, ürün bilgisini basit HTTP ile çek (tarayıcısız)"""
+        reviews_result = await self.review_fetcher.fetch_reviews(
+            url, max_reviews=max_reviews, deadline=deadline, sampler=sampler
+        )
+        if not reviews_result.get('success'):
+            return {
+                'success': False,
+                'error': reviews_result.get('error', 'Yorum listesi boş'),
+                'url': url,
+                'domain': domain
+            }
+        
+        reviews = reviews_result['reviews']
+        
+        # Başlık ve fiyat ürün sayfasından; engel/hata yorumları geçersiz kılmaz
+        try:
+            product = await self._call_with_proxy(
+                domain, deadline, self._fallback_scrape, url, domain, deadline=deadline
+            )
+        except BotChallengeError:
+            product = {}
+        
+        # Rating: yorum puanlarının ortalaması
+        rating = "Rating bulunamadı"
+        ratings = [float(r['rating']) for r in reviews if str(r.get('rating', '')).isdigit()]
+        if ratings:
+            rating = f"{round(sum(ratings) / len(ratings), 1)} yıldız"
+        
+        return {
+            'success': True,
+            'title': product.get('title', 'Başlık bulunamadı'),
+            'price': product.get('price', 'Fiyat bulunamadı'),
+            'rating': rating,
+            'reviews': reviews,
+            'images': [],
+            'review_count': len(reviews),
+            'url': url,
+            'domain': domain,
+            'scraping_method': 'review_api',
+            'review_pages': reviews_result.get('pages_fetched', 0)
+        }
+    
+    async def _fallback_scrape(self, url: str, domain: str,
+                               deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Basit HTTP request ile fallback scraping"""
+        deadline = ensure_deadline(deadline)
         try:
-            response = self.session.get(url, timeout=10)
+            response = await self._http_get(url, domain, deadline)
+            check_response(response, domain)
             soup = BeautifulSoup(response.content, 'html.parser')
             
             # Basit title alma
@@ -201,6 +571,8 @@ class ProductScraper:
                 'scraping_method': 'fallback'
             }
             
+        except BotChallengeError:
+            raise
         except Exception as e:
             logger.error(f"Fallback scraping hatası: {e}")
             return {
@@ -208,85 +580,82 @@ class ProductScraper:
                 'error': f'Fallback scraping hatası: {str(e)}'
             }
     
-    async def _scrape_amazon(self, url: str, max_reviews: int = 100) -> Dict[str, Any]:
+    async def _http_get(self, url: str, domain: str, deadline: Deadline) -> requests.Response:
+        """Sayfayı requests ile thread'de çek (event loop bloklanmaz)"""
+        timeout = deadline.cap(self.latency.timeout('http', domain))
+        proxies = self._request_proxies()
+        
+        def get() -> requests.Response:
+            with self.latency.measure('http', domain):
+                return self.session.get(url, timeout=timeout, proxies=proxies)
+        
+        return await asyncio.to_thread(get)
+    
+    async def _load_page(self, driver, url: str, domain: str, deadline: Deadline) -> None:
+        """
+        Sayfayı tarayıcıda thread'de yükle ve bot engeli kontrolü yap
+        
+        Selenium çağrıları bloklayıcıdır; event loop'ta yapılırsa iş hattındaki diğer
+        scrape ve analiz işleri sayfa yüklenene kadar bekler.
+        
+        Raises:
+            BotChallengeError: Sayfa engel/captcha sayfasıysa
+        """
+        # Timeout geçmiş gecikmelerden türetilir
+        timeout = deadline.cap(self.latency.timeout('page_load', domain))
+        
+        def load() -> None:
+            driver.set_page_load_timeout(timeout)
+            with self.latency.measure('page_load', domain):
+                driver.get(url)
+            check_driver(driver, domain)
+        
+        await asyncio.to_thread(load)
+    
+    @staticmethod
+    def _collect_images(driver, keep: Callable[[str], bool], limit: int = 3) -> List[str]:
+        """Sayfadaki ilk `limit` img elementinden koşula uyan kaynaklar"""
+        images = []
+        try:
+            img_elements = driver.find_elements(By.CSS_SELECTOR, "img")
+            for img in img_elements[:limit]:
+                src = img.get_attribute("src")
+                if src and keep(src):
+                    images.append(src)
+        except:
+            pass
+        return images
+    
+    async def _scrape_amazon(self, url: str, max_reviews: int = 100,
+                             deadline: Optional[Deadline] = None,
+                             sampler: Optional[SequentialSampler] = None) -> Dict[str, Any]:
         """Amazon ürün scraping"""
+        deadline = ensure_deadline(deadline)
         driver = None
         try:
-            driver = self._get_driver()
-            driver.set_page_load_timeout(30)
+            domain = self._get_domain(url)
+            driver = await self._open_driver(deadline)
             
             logger.info(f"Amazon sayfası yükleniyor: {url}")
-            driver.get(url)
+            await self._load_page(driver, url, domain, deadline)
             
             # Sayfanın yüklenmesi için bekle
-            time.sleep(3)
-            
-            # Ürün başlığı - çoklu selector ile
-            title = "Başlık bulunamadı"
-            title_selectors = [
-                "#productTitle",
-                ".product-title",
-                "h1[class*='title']",
-                "h1"
-            ]
-            
-            for selector in title_selectors:
-                try:
-                    title_element = driver.find_element(By.CSS_SELECTOR, selector)
-                    title = title_element.text.strip()
-                    if title and len(title) > 5:
-                        break
-                except:
-                    continue
+            await asyncio.sleep(min(3, deadline.remaining()))
             
-            # Fiyat - çoklu selector ile
-            price = "Fiyat bulunamadı"
-            price_selectors = [
-                ".a-price-whole",
-                ".a-price .a-offscreen",
-                "#price_inside_buybox",
-                ".a-price-range",
-                "[class*='price']"
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    price_element = driver.find_element(By.CSS_SELECTOR, selector)
-                    price_text = price_element.text.strip()
-                    if price_text and any(char.isdigit() for char in price_text):
-                        price = price_text
-                        break
-                except:
-                    continue
-            
-            # Rating
-            rating = "Rating bulunamadı"
-            try:
-                rating_selectors = [
-                    "[data-hook='average-star-rating'] .a-icon-alt",
-                    ".a-icon-alt",
-                    "[class*='rating']"
-                ]
-                
-                for selector in rating_selectors:
-                    try:
-                        rating_element = driver.find_element(By.CSS_SELECTOR, selector)
-                        rating_text = rating_element.get_attribute("textContent") or rating_element.text
-                        if rating_text and any(char.isdigit() for char in rating_text):
-                            rating = rating_text
-                            break
-                    except:
-                        continue
-            except:
-                pass
+            # Başlık, fiyat ve puan selector denemeleri thread'de (her deneme bir tarayıcı çağrısı)
+            title, price, rating = await asyncio.to_thread(self._read_amazon_summary, driver)
             
             # GELİŞMİŞ YORUM SİSTEMİ v3
             reviews = []
             try:
                 logger.info("Amazon gelişmiş yorum scraper v3 başlatılıyor...")
                 advanced_scraper = AdvancedReviewScraperV3(driver)
-                reviews = await advanced_scraper.scrape_all_reviews(url, max_reviews=max_reviews)
+                reviews = await advanced_scraper.scrape_all_reviews(
+                    url, max_reviews=max_reviews, deadline=deadline, sampler=sampler
+                )
                 logger.info(f"Toplam {len(reviews)} Amazon yorumu çekildi")
+            except BotChallengeError:
+                raise
             except Exception as e:
                 logger.error(f"Amazon gelişmiş yorum scraper hatası: {e}")
                 # Fallback basit yorum sistemi
@@ -298,15 +667,9 @@ class ProductScraper:
                     pass
             
             # Resimler
-            images = []
-            try:
-                img_elements = driver.find_elements(By.CSS_SELECTOR, "img")
-                for img in img_elements[:3]:
-                    src = img.get_attribute("src")
-                    if src and ("images-amazon" in src or "ssl-images" in src):
-                        images.append(src)
-            except:
-                pass
+            images = await asyncio.to_thread(
+                self._collect_images, driver, lambda src: "images-amazon" in src or "ssl-images" in src
+            )
             
             result = {
                 'success': True,
@@ -321,6 +684,8 @@ class ProductScraper:
             logger.info(f"Amazon scraping başarılı: {title[:50]} - {len(reviews)} yorum")
             return result
             
+        except BotChallengeError:
+            raise
         except Exception as e:
             logger.error(f"Amazon scraping hatası: {e}")
             return {
@@ -336,10 +701,73 @@ class ProductScraper:
         finally:
             if driver:
                 try:
-                    driver.quit()
+                    await asyncio.to_thread(driver.quit)
                 except:
                     pass
     
+    def _read_amazon_summary(self, driver) -> Tuple[str, str, str]:
+        """Amazon başlık, fiyat ve puanı (bloklayıcı - thread'de çağrılır)"""
+        # Ürün başlığı - çoklu selector ile
+        title = "Başlık bulunamadı"
+        title_selectors = [
+            "#productTitle",
+            ".product-title",
+            "h1[class*='title']",
+            "h1"
+        ]
+        
+        for selector in title_selectors:
+            try:
+                title_element = driver.find_element(By.CSS_SELECTOR, selector)
+                title = title_element.text.strip()
+                if title and len(title) > 5:
+                    break
+            except:
+                continue
+        
+        # Fiyat - çoklu selector ile
+        price = "Fiyat bulunamadı"
+        price_selectors = [
+            ".a-price-whole",
+            ".a-price .a-offscreen",
+            "#price_inside_buybox",
+            ".a-price-range",
+            "[class*='price']"
+        ]
+        
+        for selector in price_selectors:
+            try:
+                price_element = driver.find_element(By.CSS_SELECTOR, selector)
+                price_text = price_element.text.strip()
+                if price_text and any(char.isdigit() for char in price_text):
+                    price = price_text
+                    break
+            except:
+                continue
+        
+        # Rating
+        rating = "Rating bulunamadı"
+        try:
+            rating_selectors = [
+                "[data-hook='average-star-rating'] .a-icon-alt",
+                ".a-icon-alt",
+                "[class*='rating']"
+            ]
+        
+            for selector in rating_selectors:
+                try:
+                    rating_element = driver.find_element(By.CSS_SELECTOR, selector)
+                    rating_text = rating_element.get_attribute("textContent") or rating_element.text
+                    if rating_text and any(char.isdigit() for char in rating_text):
+                        rating = rating_text
+                        break
+                except:
+                    continue
+        except:
+            pass
+        
+        return title, price, rating
+    
     def _get_amazon_reviews(self, driver) -> List[Dict[str, str]]:
         """Amazon yorumlarını al"""
         reviews = []
@@ -390,151 +818,36 @@ class ProductScraper:
         
         return images
     
-    async def _scrape_trendyol(self, url: str, max_reviews: int = 100) -> Dict[str, Any]:
+    async def _scrape_trendyol(self, url: str, max_reviews: int = 100,
+                               deadline: Optional[Deadline] = None,
+                               sampler: Optional[SequentialSampler] = None) -> Dict[str, Any]:
         """Trendyol ürün scraping"""
+        deadline = ensure_deadline(deadline)
         driver = None
         try:
-            driver = self._get_driver()
+            domain = self._get_domain(url)
+            driver = await self._open_driver(deadline)
             
-            # Trendyol için özel ayarlar
-            driver.set_page_load_timeout(30)
             logger.info(f"Trendyol sayfası yükleniyor: {url}")
-            
-            driver.get(url)
+            await self._load_page(driver, url, domain, deadline)
             
             # Sayfanın yüklenmesi için bekle
-            time.sleep(5)
+            await asyncio.sleep(min(5, deadline.remaining()))
             
-            # Başlık için farklı selector'ları dene
-            title = "Başlık bulunamadı"
-            title_selectors = [
-                ".pr-new-br h1",
-                "h1[class*='title']",
-                ".product-name",
-                ".pr-new-br span",
-                "h1"
-            ]
-            
-            for selector in title_selectors:
-                try:
-                    title_element = driver.find_element(By.CSS_SELECTOR, selector)
-                    title = title_element.text.strip()
-                    if title and len(title) > 3:  # Geçerli bir başlık
-                        break
-                except:
-                    continue
-            
-            # Fiyat için farklı selector'ları dene
-            price = "Fiyat bulunamadı"
-            price_selectors = [
-                ".prc-dsc",
-                ".prc-slg", 
-                ".price-current",
-                "[class*='price']",
-                ".product-price"
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    price_element = driver.find_element(By.CSS_SELECTOR, selector)
-                    price_text = price_element.text.strip()
-                    if price_text and any(char.isdigit() for char in price_text):
-                        price = price_text
-                        break
-                except:
-                    continue
-            
-            # Rating - Trendyol için geliştirilmiş
-            rating = "Rating bulunamadı"
-            try:
-                # Trendyol 2024 rating selectorları
-                rating_selectors = [
-                    # Ana rating alanları
-                    ".rating-score", ".product-rating-score", 
-                    "[class*='rating-score']", "[data-testid*='rating']",
-                    
-                    # Yıldız rating'leri
-                    ".stars", ".star-rating", "[class*='star']",
-                    ".ratings-reviews-summary [class*='rating']",
-                    
-                    # Puan alanları  
-                    ".point", ".score", "[class*='point']",
-                    ".product-info .rating", ".pr-rating",
-                    
-                    # Genel rating containerları
-                    "[class*='rating']", "[class*='score']",
-                    ".product-reviews .rating"
-                ]
-                
-                for selector in rating_selectors:
-                    try:
-                        rating_element = driver.find_element(By.CSS_SELECTOR, selector)
-                        rating_text = rating_element.text.strip()
-                        
-                        # Rating text'i temizle ve kontrol et
-                        if rating_text:
-                            # Sayı varsa al
-                            import re
-                            numbers = re.findall(r'(\d+[.,]?\d*)', rating_text)
-                            if numbers:
-                                rating_val = float(numbers[0].replace(',', '.'))
-                                if 0 <= rating_val <= 5:
-                                    rating = f"{rating_val} yıldız"
-                                    break
-                            
-                            # "4.5 üzerinden 5" gibi format
-                            if "üzerinden" in rating_text or "out of" in rating_text:
-                                numbers = re.findall(r'(\d+[.,]?\d*)', rating_text)
-                                if len(numbers) >= 1:
-                                    rating = f"{numbers[0].replace(',', '.')} yıldız"
-                                    break
-                        
-                    except:
-                        continue
-                
-                # Eğer rating bulunamadıysa, sayfa içeriğinden tahmin et
-                if rating == "Rating bulunamadı":
-                    try:
-                        page_source = driver.page_source.lower()
-                        
-                        # Sayfa içerisinde rating değerleri ara
-                        rating_patterns = [
-                            r'rating["\':]\s*(\d+[.,]?\d*)',
-                            r'score["\':]\s*(\d+[.,]?\d*)', 
-                            r'(\d+[.,]?\d*)\s*yıldız',
-                            r'(\d+[.,]?\d*)\s*puan',
-                            r'(\d+[.,]?\d*)\s*/\s*5'
-                        ]
-                        
-                        for pattern in rating_patterns:
-                            matches = re.findall(pattern, page_source)
-                            if matches:
-                                rating_val = float(matches[0].replace(',', '.'))
-                                if 1 <= rating_val <= 5:
-                                    rating = f"{rating_val} yıldız"
-                                    break
-                    except:
-                        pass
-                
-                # Son çare: Gerçekçi rating üret
-                if rating == "Rating bulunamadı":
-                    import random
-                    realistic_ratings = [4.5, 4.3, 4.4, 4.2, 4.1, 4.0, 3.9, 3.8]
-                    rating = f"{random.choice(realistic_ratings)} yıldız"
-                        
-            except Exception as e:
-                logger.debug(f"Rating çıkarma hatası: {e}")
-                # Fallback realistic rating
-                import random
-                rating = f"{round(random.uniform(3.8, 4.6), 1)} yıldız"
+            # Başlık, fiyat ve puan selector denemeleri thread'de (her deneme bir tarayıcı çağrısı)
+            title, price, rating = await asyncio.to_thread(self._read_trendyol_summary, driver)
             
             # GELİŞMİŞ YORUM SİSTEMİ v3
             reviews = []
             try:
                 logger.info("Gelişmiş yorum scraper v3 başlatılıyor...")
                 advanced_scraper = AdvancedReviewScraperV3(driver)
-                reviews = await advanced_scraper.scrape_all_reviews(url, max_reviews=max_reviews)
+                reviews = await advanced_scraper.scrape_all_reviews(
+                    url, max_reviews=max_reviews, deadline=deadline, sampler=sampler
+                )
                 logger.info(f"Toplam {len(reviews)} yorum çekildi")
+            except BotChallengeError:
+                raise
             except Exception as e:
                 logger.error(f"Gelişmiş yorum scraper hatası: {e}")
                 # Fallback basit yorum sistemi
@@ -546,15 +859,7 @@ class ProductScraper:
                     pass
             
             # Resimler
-            images = []
-            try:
-                img_elements = driver.find_elements(By.CSS_SELECTOR, "img")
-                for img in img_elements[:3]:
-                    src = img.get_attribute("src")
-                    if src and "product" in src.lower():
-                        images.append(src)
-            except:
-                pass
+            images = await asyncio.to_thread(self._collect_images, driver, lambda src: "product" in src.lower())
             
             result = {
                 'success': True,
@@ -569,6 +874,8 @@ class ProductScraper:
             logger.info(f"Trendyol scraping başarılı: {title[:50]} - {len(reviews)} yorum")
             return result
             
+        except BotChallengeError:
+            raise
         except Exception as e:
             logger.error(f"Trendyol scraping hatası: {e}")
             return {
@@ -584,9 +891,136 @@ class ProductScraper:
         finally:
             if driver:
                 try:
-                    driver.quit()
+                    await asyncio.to_thread(driver.quit)
+                except:
+                    pass
+    
+    def _read_trendyol_summary(self, driver) -> Tuple[str, str, str]:
+        """Trendyol başlık, fiyat ve puanı (bloklayıcı - thread'de çağrılır)"""
+        # Başlık için farklı selector'ları dene
+        title = "Başlık bulunamadı"
+        title_selectors = [
+            ".pr-new-br h1",
+            "h1[class*='title']",
+            ".product-name",
+            ".pr-new-br span",
+            "h1"
+        ]
+        
+        for selector in title_selectors:
+            try:
+                title_element = driver.find_element(By.CSS_SELECTOR, selector)
+                title = title_element.text.strip()
+                if title and len(title) > 3:  # Geçerli bir başlık
+                    break
+            except:
+                continue
+        
+        # Fiyat için farklı selector'ları dene
+        price = "Fiyat bulunamadı"
+        price_selectors = [
+            ".prc-dsc",
+            ".prc-slg", 
+            ".price-current",
+            "[class*='price']",
+            ".product-price"
+        ]
+        
+        for selector in price_selectors:
+            try:
+                price_element = driver.find_element(By.CSS_SELECTOR, selector)
+                price_text = price_element.text.strip()
+                if price_text and any(char.isdigit() for char in price_text):
+                    price = price_text
+                    break
+            except:
+                continue
+        
+        # Rating - Trendyol için geliştirilmiş
+        rating = "Rating bulunamadı"
+        try:
+            # Trendyol 2024 rating selectorları
+            rating_selectors = [
+                # Ana rating alanları
+                ".rating-score", ".product-rating-score", 
+                "[class*='rating-score']", "[data-testid*='rating']",
+        
+                # Yıldız rating'leri
+                ".stars", ".star-rating", "[class*='star']",
+                ".ratings-reviews-summary [class*='rating']",
+        
+                # Puan alanları  
+                ".point", ".score", "[class*='point']",
+                ".product-info .rating", ".pr-rating",
+        
+                # Genel rating containerları
+                "[class*='rating']", "[class*='score']",
+                ".product-reviews .rating"
+            ]
+        
+            for selector in rating_selectors:
+                try:
+                    rating_element = driver.find_element(By.CSS_SELECTOR, selector)
+                    rating_text = rating_element.text.strip()
+        
+                    # Rating text'i temizle ve kontrol et
+                    if rating_text:
+                        # Sayı varsa al
+                        import re
+                        numbers = re.findall(r'(\d+[.,]?\d*)', rating_text)
+                        if numbers:
+                            rating_val = float(numbers[0].replace(',', '.'))
+                            if 0 <= rating_val <= 5:
+                                rating = f"{rating_val} yıldız"
+                                break
+        
+                        # "4.5 üzerinden 5" gibi format
+                        if "üzerinden" in rating_text or "out of" in rating_text:
+                            numbers = re.findall(r'(\d+[.,]?\d*)', rating_text)
+                            if len(numbers) >= 1:
+                                rating = f"{numbers[0].replace(',', '.')} yıldız"
+                                break
+        
+                except:
+                    continue
+        
+            # Eğer rating bulunamadıysa, sayfa içeriğinden tahmin et
+            if rating == "Rating bulunamadı":
+                try:
+                    page_source = driver.page_source.lower()
+        
+                    # Sayfa içerisinde rating değerleri ara
+                    rating_patterns = [
+                        r'rating["\':]\s*(\d+[.,]?\d*)',
+                        r'score["\':]\s*(\d+[.,]?\d*)', 
+                        r'(\d+[.,]?\d*)\s*yıldız',
+                        r'(\d+[.,]?\d*)\s*puan',
+                        r'(\d+[.,]?\d*)\s*/\s*5'
+                    ]
+        
+                    for pattern in rating_patterns:
+                        matches = re.findall(pattern, page_source)
+                        if matches:
+                            rating_val = float(matches[0].replace(',', '.'))
+                            if 1 <= rating_val <= 5:
+                                rating = f"{rating_val} yıldız"
+                                break
                 except:
                     pass
+        
+            # Son çare: Gerçekçi rating üret
+            if rating == "Rating bulunamadı":
+                import random
+                realistic_ratings = [4.5, 4.3, 4.4, 4.2, 4.1, 4.0, 3.9, 3.8]
+                rating = f"{random.choice(realistic_ratings)} yıldız"
+        
+        except Exception as e:
+            logger.debug(f"Rating çıkarma hatası: {e}")
+            # Fallback realistic rating
+            import random
+            rating = f"{round(random.uniform(3.8, 4.6), 1)} yıldız"
+        
+        return title, price, rating
     
     def _get_trendyol_reviews(self, driver) -> List[Dict[str, str]]:
         """Trendyol yorumlarını al"""
@@ -629,10 +1063,15 @@ class ProductScraper:
         
         return images
     
-    async def _scrape_hepsiburada(self, url: str) -> Dict[str, Any]:
+    async def _scrape_hepsiburada(self, url: str, max_reviews: int = 100,
+                                  deadline: Optional[Deadline] = None,
+                                  sampler: Optional[SequentialSampler] = None) -> Dict[str, Any]:
         """Hepsiburada ürün scraping"""
+        deadline = ensure_deadline(deadline)
         try:
-            response = self.session.get(url)
+            domain = self._get_domain(url)
+            response = await self._http_get(url, domain, deadline)
+            check_response(response, domain)
             soup = BeautifulSoup(response.content, 'html.parser')
             
             # Ürün başlığı
@@ -660,10 +1099,15 @@ class ProductScraper:
         except Exception as e:
             raise e
     
-    async def _scrape_n11(self, url: str) -> Dict[str, Any]:
+    async def _scrape_n11(self, url: str, max_reviews: int = 100,
+                          deadline: Optional[Deadline] = None,
+                          sampler: Optional[SequentialSampler] = None) -> Dict[str, Any]:
         """N11 ürün scraping"""
+        deadline = ensure_deadline(deadline)
         try:
-            response = self.session.get(url)
+            domain = self._get_domain(url)
+            response = await self._http_get(url, domain, deadline)
+            check_response(response, domain)
             soup = BeautifulSoup(response.content, 'html.parser')
             
             # Ürün başlığı
@@ -687,10 +1131,15 @@ class ProductScraper:
         except Exception as e:
             raise e
     
-    async def _scrape_gittigidiyor(self, url: str) -> Dict[str, Any]:
+    async def _scrape_gittigidiyor(self, url: str, max_reviews: int = 100,
+                                   deadline: Optional[Deadline] = None,
+                                   sampler: Optional[SequentialSampler] = None) -> Dict[str, Any]:
         """GittiGidiyor ürün scraping"""
+        deadline = ensure_deadline(deadline)
         try:
-            response = self.session.get(url)
+            domain = self._get_domain(url)
+            response = await self._http_get(url, domain, deadline)
+            check_response(response, domain)
             soup = BeautifulSoup(response.content, 'html.parser')
             
             # Ürün başlığı
@@ -0,0 +1,459 @@
+"""
+Fiyat/Puan İzleme Zamanlayıcısı
+data/products altındaki kayıtlı ürünleri arka planda öncelik sırasıyla yeniler.
+
+Öncelik = bayatlık × (1 + oynaklık) × (1 + popülerlik)
+- Oynaklık: geçmiş fiyat/puan örneklerinin değişim oranı ve değişim sıklığı
+- Bayatlık: son kontrolden bu yana geçen süre / temel yenileme aralığı
+- Popülerlik: ürün detay görüntüleme ve yeniden analiz sayısı
+
+Her yenileme önce ucuz bir tazelik yoklaması (koşullu GET: ETag/Last-Modified,
+yoksa sayfaya gömülü fiyat/puan alanlarının özeti) yapar; tam scrape + analiz
+sadece bir şey değiştiyse çalışır. Saatlik yenileme bütçesi token bucket ile
+sınırlanır; binlerce ürün izlenirken scraping kapasitesi aşılmaz.
+
+Geçmiş data/monitoring/{product_id}.json dosyalarında tutulur.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .bot_detection import check_response
+from analyzer.rate_limiter import BULK, llm_priority
+from utils.config import Config
+from utils.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+# Sayfaya gömülü durumda (JSON-LD, __NEXT_DATA__, initial state) fiyat/puan alanları
+STATE_FIELD_PATTERN = re.compile(
+    r'"(price|sellingPrice|discountedPrice|lowPrice|ratingValue|averageRating|ratingScore|'
+    r'reviewCount|ratingCount|totalRatingCount|totalCommentCount|availability|stock)"\s*:\s*"?([^",}\]]{1,40})',
+    re.IGNORECASE
+)
+
+# Ürün başına tutulacak en fazla örnek
+MAX_SAMPLES = 50
+
+
+class TokenBucket:
+    """Saatlik yenileme bütçesi - kısa patlamalara izin verir, ortalamayı sınırlar"""
+
+    def __init__(self, per_hour: float, burst: Optional[float] = None):
+        self.rate = max(0.0, per_hour) / 3600.0
+        self.capacity = burst if burst is not None else max(1.0, per_hour / 12)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def try_consume(self, amount: float = 1.0) -> bool:
+        self._refill()
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+
+def state_fingerprint(html: str) -> Optional[str]:
+    """Sayfadaki fiyat/puan alanlarının özeti; alan bulunamazsa None (karar verilemez)"""
+    fields = sorted({(name.lower(), value.strip()) for name, value in STATE_FIELD_PATTERN.findall(html or '')})
+    if not fields:
+        return None
+    return hashlib.sha1(json.dumps(fields, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class MonitoredProduct:
+    """İzlenen ürünün geçmişi ve yenileme durumu"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+
+    @classmethod
+    def new(cls, product_id: str, url: str) -> 'MonitoredProduct':
+        return cls({
+            'product_id': product_id,
+            'url': url,
+            'samples': [],
+            'last_checked': 0.0,
+            'last_changed': None,
+            'etag': None,
+            'last_modified': None,
+            'state_hash': None,
+            'views': 0,
+            'probes': 0,
+            'refreshes': 0,
+            'changes': 0,
+            'consecutive_errors': 0,
+            'last_error': None
+        })
+
+    @property
+    def product_id(self) -> str:
+        return self.data['product_id']
+
+    @property
+    def url(self) -> str:
+        return self.data['url']
+
+    @property
+    def domain(self) -> str:
+        return urlparse(self.url).netloc.lower().replace('www.', '')
+
+    def add_sample(self, price: Optional[float], rating: Optional[float], review_count: Optional[int]) -> bool:
+        """Yeni örneği ekle; önceki örneğe göre fiyat/puan değiştiyse True"""
+        samples = self.data['samples']
+        previous = samples[-1] if samples else None
+        samples.append({
+            'timestamp': datetime.now().isoformat(),
+            'price': price,
+            'rating': rating,
+            'review_count': review_count
+        })
+        del samples[:-MAX_SAMPLES]
+
+        changed = bool(previous) and (previous.get('price') != price or previous.get('rating') != rating)
+        if changed:
+            self.data['changes'] += 1
+            self.data['last_changed'] = time.time()
+        return changed
+
+    def volatility(self) -> float:
+        """0..~2 arası: göreli fiyat oynaklığı + puan değişimi + değişim sıklığı"""
+        prices = [s['price'] for s in self.data['samples'] if s.get('price')]
+        ratings = [s['rating'] for s in self.data['samples'] if s.get('rating') is not None]
+
+        price_score = 0.0
+        if len(prices) >= 2:
+            mean = sum(prices) / len(prices)
+            variance = sum((p - mean) ** 2 for p in prices) / len(prices)
+            price_score = min(1.0, math.sqrt(variance) / mean * 10) if mean else 0.0
+
+        rating_score = min(1.0, (max(ratings) - min(ratings)) / 0.5) if len(ratings) >= 2 else 0.0
+
+        refreshes = self.data['refreshes']
+        change_rate = self.data['changes'] / refreshes if refreshes else 0.0
+
+        return price_score + 0.5 * rating_score + 0.5 * change_rate
+
+    def priority(self, now: float, base_interval: float) -> float:
+        """Yüksek = önce yenilenmeli"""
+        staleness = (now - self.data['last_checked']) / base_interval
+        popularity = math.log1p(self.data['views'])
+        # Art arda hata alan ürünler geri plana itilir
+        error_penalty = 2 ** min(self.data['consecutive_errors'], 6)
+        return staleness * (1.0 + self.volatility()) * (1.0 + popularity) / error_penalty
+
+
+class RefreshScheduler:
+    """Kayıtlı ürünleri öncelik kuyruğu ve saatlik bütçe ile yenileyen arka plan görevi"""
+
+    def __init__(self, scraper, analyzer, monitoring_dir: Optional[str] = None):
+        """
+        Args:
+            scraper: ProductScraper
+            analyzer: ProductDetailedAnalyzer (kayıtlı ürünler ve yeniden analiz)
+            monitoring_dir: Geçmiş dosyalarının dizini
+        """
+        self.config = Config()
+        self.scraper = scraper
+        self.analyzer = analyzer
+        self.monitoring_dir = Path(monitoring_dir or self.config.monitor_dir)
+
+        self.base_interval = self.config.monitor_base_interval
+        self.min_interval = self.config.monitor_min_interval
+        self.bucket = TokenBucket(self.config.monitor_refresh_per_hour)
+        self.probe_cost = self.config.monitor_probe_cost
+
+        self.products: Dict[str, MonitoredProduct] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self.stats = {'ticks': 0, 'probes': 0, 'unchanged': 0, 'refreshes': 0,
+                      'changes': 0, 'errors': 0, 'budget_waits': 0}
+
+        self._load()
+
+    # --- Kalıcılık ---
+
+    def _path(self, product_id: str) -> Path:
+        return self.monitoring_dir / f"{product_id}.json"
+
+    def _load(self) -> None:
+        if not self.monitoring_dir.exists():
+            return
+        for path in self.monitoring_dir.glob('*.json'):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    product = MonitoredProduct(json.load(f))
+                self.products[product.product_id] = product
+            except Exception as e:
+                logger.warning(f"İzleme geçmişi okunamadı {path.name}: {e}")
+
+    def _save(self, product: MonitoredProduct) -> None:
+        try:
+            self.monitoring_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(product.product_id)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(product.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"İzleme geçmişi kaydedilemedi {product.product_id}: {e}")
+
+    # --- Ürün listesi ---
+
+    def sync_products(self) -> int:
+        """data/products altındaki yeni ürünleri izlemeye al; eklenen sayısını döndür"""
+        added = 0
+        for product_id in self.analyzer.get_all_product_ids():
+            if product_id in self.products:
+                continue
+            analysis = self.analyzer.get_product_analysis(product_id)
+            url = (analysis or {}).get('url', '')
+            if not url.startswith('http'):
+                continue
+            product = MonitoredProduct.new(product_id, url)
+            product.data['last_checked'] = self._analysis_time(analysis)
+            self._record_analysis(product, analysis)
+            self.products[product_id] = product
+            self._save(product)
+            added += 1
+        if added:
+            logger.info(f"İzlemeye {added} ürün eklendi (toplam {len(self.products)})")
+        return added
+
+    @staticmethod
+    def _analysis_time(analysis: Dict[str, Any]) -> float:
+        try:
+            return datetime.fromisoformat(analysis.get('timestamp', '')).timestamp()
+        except (TypeError, ValueError):
+            return 0.0
+
+    @staticmethod
+    def _record_analysis(product: MonitoredProduct, analysis: Dict[str, Any]) -> bool:
+        price = (analysis.get('price_analysis') or {}).get('numeric_value')
+        rating = (analysis.get('rating_analysis') or {}).get('numeric_value')
+        review_count = (analysis.get('raw_data') or {}).get('review_count')
+        return product.add_sample(price, rating, review_count)
+
+    def observe(self, analysis: Dict[str, Any]) -> None:
+        """Kullanıcı ürünü yeniden analiz etti: yeni örnek + popülerlik"""
+        product = self.products.get(analysis.get('product_id', ''))
+        if not product:
+            return
+        product.data['views'] += 1
+        product.data['last_checked'] = time.time()
+        self._record_analysis(product, analysis)
+        self._save(product)
+
+    def record_view(self, product_id: str) -> None:
+        """Ürün detayı görüntülendi / yeniden analiz edildi - popülerlik sayacı"""
+        product = self.products.get(product_id)
+        if product:
+            product.data['views'] += 1
+
+    # --- Zamanlama ---
+
+    def start(self) -> None:
+        """Arka plan döngüsünü başlat (event loop içinden çağrılmalı)"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"İzleme zamanlayıcısı başladı: saatte {self.config.monitor_refresh_per_hour} yenileme bütçesi")
+
+    async def stop(self) -> None:
+        tasks = [t for t in [self._task, *self._running.values()] if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"İzleme döngüsü hatası: {e}")
+            await asyncio.sleep(self.config.monitor_tick_seconds)
+
+    def due_queue(self, now: Optional[float] = None) -> List[Tuple[float, str]]:
+        """Yenilenme zamanı gelmiş ürünlerin öncelik kuyruğu (heap; en öncelikli başta)"""
+        now = now or time.time()
+        heap = []
+        for product in self.products.values():
+            if product.product_id in self._running or now - product.data['last_checked'] < self.min_interval:
+                continue
+            heap.append((-product.priority(now, self.base_interval), product.product_id))
+        heapq.heapify(heap)
+        return heap
+
+    async def tick(self) -> int:
+        """Bütçe yettiği kadar en öncelikli ürünü yenilemeye gönder; başlatılan sayısını döndür"""
+        self.stats['ticks'] += 1
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, self.config.monitor_concurrency))
+        self.sync_products()
+
+        heap = self.due_queue()
+        started = 0
+        while heap and len(self._running) < self.config.monitor_concurrency:
+            # Yoklama ucuzdur ama bedava değildir; tam yenileme ayrıca 1 token harcar
+            if not self.bucket.try_consume(self.probe_cost):
+                self.stats['budget_waits'] += 1
+                break
+            _, product_id = heapq.heappop(heap)
+            task = asyncio.create_task(self._refresh(self.products[product_id]))
+            self._running[product_id] = task
+            task.add_done_callback(lambda _t, pid=product_id: self._running.pop(pid, None))
+            started += 1
+        return started
+
+    # --- Yenileme ---
+
+    async def _refresh(self, product: MonitoredProduct) -> Dict[str, Any]:
+        async with self._semaphore:
+            outcome: Dict[str, Any] = {'product_id': product.product_id}
+            try:
+                changed, validators = await self.probe(product)
+                outcome['probe'] = 'changed' if changed else 'unchanged'
+                if not changed:
+                    self.stats['unchanged'] += 1
+                    product.data.update(validators)
+                elif self.bucket.try_consume(1.0):
+                    outcome['price_changed'] = await self._full_refresh(product)
+                    # Doğrulayıcılar ancak yenileme başarılıysa kaydedilir; aksi halde sonraki
+                    # yoklama 304/aynı özet görüp değişikliği kaçırırdı
+                    product.data.update(validators)
+                else:
+                    # Değişiklik var ama bütçe yok: bir sonraki turda ilk sıralarda olur
+                    self.stats['budget_waits'] += 1
+                    outcome['probe'] = 'changed_deferred'
+                    return outcome
+                product.data['last_checked'] = time.time()
+                product.data['consecutive_errors'] = 0
+                product.data['last_error'] = None
+            except Exception as e:
+                self.stats['errors'] += 1
+                product.data['last_checked'] = time.time()
+                product.data['consecutive_errors'] += 1
+                product.data['last_error'] = str(e)
+                outcome['error'] = str(e)
+                logger.warning(f"İzleme yenilemesi başarısız {product.product_id}: {e}")
+            finally:
+                self._save(product)
+            return outcome
+
+    async def probe(self, product: MonitoredProduct) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Ucuz tazelik yoklaması (ürün kaydını değiştirmez)
+
+        Returns:
+            (sayfa değişmiş veya karar verilemiyor ise True,
+             kaydedilecek etag / last_modified / state_hash)
+        """
+        self.stats['probes'] += 1
+        product.data['probes'] += 1
+
+        headers = {}
+        if product.data.get('etag'):
+            headers['If-None-Match'] = product.data['etag']
+        if product.data.get('last_modified'):
+            headers['If-Modified-Since'] = product.data['last_modified']
+
+        domain = urlparse(product.url).netloc.lower()
+        timeout = self.scraper.latency.timeout('http', domain)
+
+        def _get():
+            with self.scraper.latency.measure('http', domain):
+                return self.scraper.session.get(product.url, headers=headers, timeout=timeout,
+                                                proxies=self.scraper._request_proxies())
+
+        response = await asyncio.to_thread(_get)
+        if response.status_code == 304:
+            return False, {}
+        check_response(response, domain)
+        response.raise_for_status()
+
+        fingerprint = await asyncio.to_thread(state_fingerprint, response.text)
+        previous = product.data.get('state_hash')
+        validators = {
+            'etag': response.headers.get('ETag') or product.data.get('etag'),
+            'last_modified': response.headers.get('Last-Modified') or product.data.get('last_modified'),
+            'state_hash': fingerprint or previous
+        }
+        if fingerprint is None or previous is None:
+            # Karşılaştıracak özet yok: güvenli taraf tam yenileme
+            return True, validators
+        return fingerprint != previous, validators
+
+    async def _full_refresh(self, product: MonitoredProduct) -> bool:
+        """Tam scrape + analiz; fiyat/puan değiştiyse True"""
+        deadline = Deadline(self.config.crawl_product_seconds, retry_budget=self.config.retry_budget)
+        scraped = await self.scraper.scrape_product(product.url, max_reviews=self.config.monitor_max_reviews,
+                                                    deadline=deadline)
+        if not scraped.get('success'):
+            raise RuntimeError(scraped.get('error', 'Scraping başarısız'))
+
+        with llm_priority(BULK):
+            analysis = await self.analyzer.analyze_single_product(scraped, deadline=deadline)
+        if analysis.get('error'):
+            raise RuntimeError(analysis['error'])
+
+        self.stats['refreshes'] += 1
+        product.data['refreshes'] += 1
+        changed = self._record_analysis(product, analysis)
+        if changed:
+            self.stats['changes'] += 1
+            logger.info(f"Fiyat/puan değişti: {product.product_id}")
+        return changed
+
+    # --- İzleme ---
+
+    def history(self, product_id: str) -> Optional[Dict[str, Any]]:
+        product = self.products.get(product_id)
+        if not product:
+            return None
+        return dict(product.data, volatility=round(product.volatility(), 4))
+
+    def snapshot(self, top: int = 20) -> Dict[str, Any]:
+        """Bütçe, sayaçlar ve sıradaki en öncelikli ürünler"""
+        now = time.time()
+        heap = self.due_queue(now)
+        upcoming = [heapq.heappop(heap) for _ in range(min(top, len(heap)))]
+        return {
+            'running': bool(self._task and not self._task.done()),
+            'monitored_products': len(self.products),
+            'due_products': len(upcoming) + len(heap),
+            'refreshing': list(self._running),
+            'refresh_per_hour': self.config.monitor_refresh_per_hour,
+            'budget_tokens': round(self.bucket.available(), 2),
+            'stats': dict(self.stats),
+            'next_up': [{
+                'product_id': product_id,
+                'priority': round(-score, 3),
+                'volatility': round(self.products[product_id].volatility(), 3),
+                'views': self.products[product_id].data['views'],
+                'hours_since_check': round((now - self.products[product_id].data['last_checked']) / 3600, 1)
+            } for score, product_id in upcoming]
+        }
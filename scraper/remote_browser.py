@@ -0,0 +1,216 @@
+"""
+Uzak Tarayıcı Backend'i (Selenium Grid)
+BROWSER_BACKEND=remote iken tarayıcılar web uygulamasıyla aynı makinede değil,
+Selenium Grid uyumlu bir uç noktadan (hub, standalone veya Selenoid) alınan
+oturumlarda çalışır. Tarayıcı kapasitesi grid'e node eklenerek yatayda ölçeklenir.
+
+- Grid /status ile node ve slot durumu okunur (kısa süre önbelleklenir)
+- Boş slot yoksa istek yerel kuyrukta bekler; süre dolarsa GridCapacityError
+- Aynı süreçteki eşzamanlı istekler aynı boş slotu iki kez saymaz (rezervasyon)
+- Node bazlı slot doluluğu ve oturum/kuyruk sayaçları snapshot() ile izlenir
+
+Yerel test grid'i: docker compose -f docker-compose.grid.yml up --scale chrome=2
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from selenium import webdriver
+
+logger = logging.getLogger(__name__)
+
+
+class GridCapacityError(Exception):
+    """Grid'de bekleme süresi içinde boş tarayıcı slotu bulunamadı"""
+
+    retry_class = 'retryable'
+
+    def __init__(self, waited: float, free_slots: int):
+        self.waited = waited
+        self.free_slots = free_slots
+        super().__init__(f"Selenium Grid dolu: {waited:.0f} sn içinde boş slot bulunamadı")
+
+
+def parse_grid_status(payload: Dict[str, Any], browser_name: str = 'chrome') -> Dict[str, Any]:
+    """
+    Grid /status yanıtını node ve slot özetine çevir
+
+    Selenium 4 (value.nodes[].slots[]) ve Selenoid (total/used/queued) biçimlerini tanır.
+    """
+    value = payload.get('value', payload) if isinstance(payload, dict) else {}
+    nodes: List[Dict[str, Any]] = []
+
+    if 'nodes' in value:
+        for node in value.get('nodes') or []:
+            slots = [
+                slot for slot in node.get('slots') or []
+                if (slot.get('stereotype') or {}).get('browserName', browser_name) == browser_name
+            ]
+            busy = sum(1 for slot in slots if slot.get('session'))
+            up = node.get('availability', 'UP') == 'UP'
+            nodes.append({
+                'id': node.get('id'),
+                'uri': node.get('uri'),
+                'availability': node.get('availability', 'UP'),
+                'slots': len(slots),
+                'busy': busy,
+                'free': max(0, len(slots) - busy) if up else 0,
+                'max_sessions': node.get('maxSessions', len(slots)),
+                'version': node.get('version')
+            })
+    elif 'total' in value:
+        # Selenoid: node ayrımı yok, tek havuz
+        total = int(value.get('total') or 0)
+        busy = int(value.get('used') or 0) + int(value.get('pending') or 0)
+        nodes.append({
+            'id': 'selenoid', 'uri': None, 'availability': 'UP',
+            'slots': total, 'busy': busy, 'free': max(0, total - busy),
+            'max_sessions': total, 'version': None
+        })
+
+    return {
+        'ready': bool(value.get('ready', True)),
+        'nodes': nodes,
+        'slots': sum(n['slots'] for n in nodes),
+        'busy': sum(n['busy'] for n in nodes),
+        'free': sum(n['free'] for n in nodes),
+        'queued': int(value.get('queued') or 0)
+    }
+
+
+class RemoteBrowserGrid:
+    """Selenium Grid oturumlarını slot farkındalığıyla açan istemci"""
+
+    def __init__(self, url: str, queue_timeout: float = 60.0, status_interval: float = 2.0,
+                 browser_name: str = 'chrome'):
+        """
+        Args:
+            url: Grid adresi (ör. http://localhost:4444; eski hub'lar için /wd/hub dahil)
+            queue_timeout: Boş slot için en uzun bekleme (sn)
+            status_interval: /status önbellek süresi ve kuyrukta yoklama aralığı (sn)
+            browser_name: Slotları sayılacak tarayıcı
+        """
+        self.url = url.rstrip('/')
+        self.queue_timeout = queue_timeout
+        self.status_interval = max(0.2, status_interval)
+        self.browser_name = browser_name
+
+        self._status: Optional[Dict[str, Any]] = None
+        self._status_at = 0.0
+        self._status_error: Optional[str] = None
+        self._reserved = 0
+        self._waiting = 0
+        self.stats = {
+            'sessions_created': 0, 'session_failures': 0, 'queued': 0,
+            'queue_timeouts': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0,
+            'status_errors': 0
+        }
+
+    @property
+    def status_url(self) -> str:
+        base = self.url[:-len('/wd/hub')] if self.url.endswith('/wd/hub') else self.url
+        return f'{base}/status'
+
+    async def refresh_status(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Grid durumunu oku; status_interval içinde önbellekten döner, ulaşılamazsa None"""
+        if not force and self._status is not None and time.monotonic() - self._status_at < self.status_interval:
+            return self._status
+        try:
+            timeout = aiohttp.ClientTimeout(total=5)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(self.status_url) as response:
+                    payload = await response.json(content_type=None)
+            self._status = parse_grid_status(payload, self.browser_name)
+            self._status_error = None
+        except Exception as e:
+            self.stats['status_errors'] += 1
+            self._status_error = str(e) or type(e).__name__
+            logger.debug(f"Grid durumu okunamadı: {self.status_url} - {e}")
+            self._status = None
+        self._status_at = time.monotonic()
+        return self._status
+
+    def _available(self) -> Optional[int]:
+        """Yerel rezervasyonlar düşülmüş boş slot sayısı (durum bilinmiyorsa None)"""
+        if self._status is None:
+            return None
+        return self._status['free'] - self._reserved
+
+    @asynccontextmanager
+    async def reserve(self, timeout: Optional[float] = None):
+        """
+        Boş slot bulunana kadar bekle ve oturum açılırken slotu bu süreç için ayır
+
+        Grid durumu okunamıyorsa beklenmez; oturum isteği doğrudan grid'e gider
+        (grid'in kendi kuyruğu devreye girer).
+
+        Raises:
+            GridCapacityError: timeout içinde boş slot çıkmazsa
+        """
+        timeout = self.queue_timeout if timeout is None else timeout
+        started = time.monotonic()
+        queued = False
+        try:
+            while True:
+                await self.refresh_status(force=queued)
+                available = self._available()
+                if available is None or available > 0:
+                    break
+                waited = time.monotonic() - started
+                if waited >= timeout:
+                    self.stats['queue_timeouts'] += 1
+                    raise GridCapacityError(waited, self._status['free'] if self._status else 0)
+                if not queued:
+                    queued = True
+                    self._waiting += 1
+                    self.stats['queued'] += 1
+                    logger.info(f"Grid'de boş slot yok ({self._status['busy']}/{self._status['slots']} dolu), kuyrukta bekleniyor")
+                await asyncio.sleep(min(self.status_interval, max(0.05, timeout - waited)))
+        finally:
+            if queued:
+                self._waiting -= 1
+                waited = time.monotonic() - started
+                self.stats['wait_seconds'] += waited
+                self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+
+        self._reserved += 1
+        try:
+            yield
+        finally:
+            self._reserved -= 1
+            # Açılan oturum slotu doldurdu: bir sonraki istek güncel durumu okusun
+            self._status_at = 0.0
+
+    def new_driver(self, options: webdriver.ChromeOptions) -> webdriver.Remote:
+        """Grid'de yeni tarayıcı oturumu aç (senkron; thread'de çağrılmalı)"""
+        started = time.monotonic()
+        try:
+            driver = webdriver.Remote(command_executor=self.url, options=options)
+        except Exception:
+            self.stats['session_failures'] += 1
+            raise
+        self.stats['sessions_created'] += 1
+        logger.info(f"Grid oturumu açıldı ({time.monotonic() - started:.1f} sn): {driver.session_id}")
+        return driver
+
+    def snapshot(self) -> Dict[str, Any]:
+        """İzleme için node bazlı slot durumu ve sayaçlar"""
+        status = self._status or {}
+        return {
+            'url': self.url,
+            'reachable': self._status is not None,
+            'error': self._status_error,
+            'ready': status.get('ready'),
+            'slots': status.get('slots', 0),
+            'busy': status.get('busy', 0),
+            'free': status.get('free', 0),
+            'reserved': self._reserved,
+            'waiting': self._waiting,
+            'nodes': status.get('nodes', []),
+            'stats': dict(self.stats, wait_seconds=round(self.stats['wait_seconds'], 1),
+                          max_wait_seconds=round(self.stats['max_wait_seconds'], 1))
+        }
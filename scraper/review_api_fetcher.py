@@ -0,0 +1,388 @@
+"""
+Sayfalı Yorum Çekici (HTTP)
+Yorumları render edilmiş sayfayı kaydırarak değil, sitelerin sayfalı yorum
+listelerini doğrudan HTTP ile okuyarak toplar. Sayfalar domain sınırlayıcı
+altında eşzamanlı çekilir, havuzdaki parser thread'lerinde ayrıştırılır ve
+sayfa sırasına göre birleştirilir. Tarayıcı gerekmez.
+
+Desteklenen kaynaklar:
+- Trendyol: ürün yorum API'si (JSON, 0 tabanlı sayfa)
+- Amazon: /product-reviews/{ASIN}?pageNumber=N sayfaları (HTML)
+- Hepsiburada: onaylı kullanıcı içerikleri API'si (JSON, offset tabanlı)
+"""
+
+import asyncio
+import json
+import logging
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from .bot_detection import BotChallengeError, classify_html
+from utils.config import Config
+from utils.deadline import Deadline, ensure_deadline
+from utils.domain_limiter import DomainLimiter
+from utils.latency_tracker import get_latency_tracker
+from utils.proxy_pool import BLOCKED, FAILURE, SUCCESS, ProxyPool
+from utils.retry import get_retry_policy
+from utils.sequential_sampling import SequentialSampler
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewSource:
+    """Bir sitenin sayfalı yorum listesi tanımı"""
+
+    name = ''
+    page_size = 20
+    # URL şablonu alanları: {origin} {product_id} {page} {page_index} {offset} {size}
+    default_url_template = ''
+
+    def __init__(self, url_template: Optional[str] = None):
+        self.url_template = url_template or self.default_url_template
+
+    def matches(self, domain: str) -> bool:
+        return self.name in domain
+
+    def extract_product_id(self, url: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def page_url(self, product_url: str, product_id: str, page_index: int) -> str:
+        parsed = urlparse(product_url)
+        return self.url_template.format(
+            origin=f"{parsed.scheme}://{parsed.netloc}",
+            product_id=product_id,
+            page=page_index + 1,
+            page_index=page_index,
+            offset=page_index * self.page_size,
+            size=self.page_size
+        )
+
+    def parse(self, body: str) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Sayfa gövdesini ayrıştır (parser havuzunda çalışır)
+
+        Returns:
+            (yorumlar, toplam sayfa sayısı - bilinmiyorsa None)
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _review(text: Any, rating: Any, date: Any, source: str) -> Dict[str, Any]:
+        text = str(text or '').strip()
+        try:
+            rating = str(int(float(str(rating).replace(',', '.'))))
+        except (TypeError, ValueError):
+            rating = 'Bilgi yok'
+        return {
+            'text': text,
+            'rating': rating,
+            'date': str(date).strip() if date else 'Tarih yok',
+            'length': len(text),
+            'source': source
+        }
+
+
+class TrendyolReviewSource(ReviewSource):
+    name = 'trendyol'
+    page_size = 20
+    default_url_template = (
+        'https://public-mdc.trendyol.com/discovery-web-socialgw-service/api/review/'
+        '{product_id}?page={page_index}&size={size}'
+    )
+
+    def extract_product_id(self, url: str) -> Optional[str]:
+        match = re.search(r'-p-(\d+)', url)
+        return match.group(1) if match else None
+
+    def parse(self, body: str) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        data = json.loads(body)
+        product_reviews = (data.get('result') or {}).get('productReviews') or {}
+        reviews = [
+            self._review(item.get('comment'), item.get('rate'),
+                         item.get('commentDateISOtype') or item.get('lastModifiedDate'), 'trendyol_api')
+            for item in product_reviews.get('content') or []
+        ]
+        return reviews, product_reviews.get('totalPages')
+
+
+class AmazonReviewSource(ReviewSource):
+    name = 'amazon'
+    page_size = 10
+    default_url_template = '{origin}/product-reviews/{product_id}/?pageNumber={page}&sortBy=recent'
+
+    def extract_product_id(self, url: str) -> Optional[str]:
+        match = re.search(r'/(?:dp|gp/product|product-reviews)/([A-Z0-9]{10})', url)
+        return match.group(1) if match else None
+
+    def parse(self, body: str) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        soup = BeautifulSoup(body, 'lxml')
+        reviews = []
+        for element in soup.select("[data-hook='review']"):
+            text_elem = element.select_one("[data-hook='review-body'] span") or element.select_one("[data-hook='review-body']")
+            rating_elem = element.select_one("[data-hook='review-star-rating'] .a-icon-alt, "
+                                             "[data-hook='cmps-review-star-rating'] .a-icon-alt")
+            date_elem = element.select_one("[data-hook='review-date']")
+
+            rating = None
+            if rating_elem:
+                match = re.search(r'(\d+)[.,]?\d*', rating_elem.get_text())
+                rating = match.group(1) if match else None
+
+            reviews.append(self._review(
+                text_elem.get_text(' ', strip=True) if text_elem else '',
+                rating,
+                date_elem.get_text(strip=True) if date_elem else None,
+                'amazon_api'
+            ))
+
+        # Amazon toplam sayfayı vermez; boş sayfa sonu gösterir
+        return reviews, None
+
+
+class HepsiburadaReviewSource(ReviewSource):
+    name = 'hepsiburada'
+    page_size = 10
+    default_url_template = (
+        'https://user-content-gw-hermes.hepsiburada.com/queryapi/v2/ApprovedUserContents'
+        '?sku={product_id}&from={offset}&size={size}'
+    )
+
+    def extract_product_id(self, url: str) -> Optional[str]:
+        match = re.search(r'-p(?:m)?-([A-Za-z0-9]+)', url)
+        return match.group(1).upper() if match else None
+
+    def parse(self, body: str) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        data = (json.loads(body) or {}).get('data') or {}
+        content = data.get('approvedUserContent') or {}
+        reviews = [
+            self._review((item.get('review') or {}).get('content'), item.get('star'),
+                         item.get('createdAt'), 'hepsiburada_api')
+            for item in content.get('approvedUserContentList') or []
+        ]
+        total_items = data.get('totalItemCount')
+        total_pages = math.ceil(total_items / self.page_size) if isinstance(total_items, int) else None
+        return reviews, total_pages
+
+
+class ReviewAPIFetcher:
+    """Sayfalı yorum listelerini eşzamanlı çeken HTTP istemcisi"""
+
+    # Ayrıştırma CPU işidir; event loop'u bloklamamak için paylaşılan havuz
+    _parser_pool: Optional[ThreadPoolExecutor] = None
+
+    def __init__(self, limiter: Optional[DomainLimiter] = None,
+                 url_templates: Optional[Dict[str, str]] = None,
+                 user_agent: Optional[str] = None,
+                 proxy_pool: Optional[ProxyPool] = None):
+        """
+        Args:
+            limiter: Domain bazlı istek sınırlayıcı
+            url_templates: Kaynak adı -> URL şablonu (test/fixture sunucusu için)
+            proxy_pool: Sayfa isteklerinin dağıtılacağı proxy havuzu
+        """
+        self.config = Config()
+        self.proxy_pool = proxy_pool or ProxyPool()
+        # Domain sınırı çıkış IP'si başınadır; proxy sayısıyla birlikte ölçeklenir
+        egress_count = max(1, len(self.proxy_pool.proxies))
+        self.limiter = limiter or DomainLimiter(
+            max_concurrent=self.config.review_fetch_concurrency * egress_count,
+            min_interval=self.config.review_fetch_interval / egress_count
+        )
+        self.latency = get_latency_tracker()
+        self.retry_policy = get_retry_policy(
+            'review_page',
+            max_retries=self.config.max_retries,
+            base_delay=self.config.retry_base_delay,
+            max_delay=self.config.retry_max_delay
+        )
+        self.user_agent = user_agent or self.config.user_agent
+
+        templates = {
+            'trendyol': self.config.review_api_trendyol_url,
+            'amazon': self.config.review_api_amazon_url,
+            'hepsiburada': self.config.review_api_hepsiburada_url,
+        }
+        templates.update(url_templates or {})
+        self.sources: List[ReviewSource] = [
+            TrendyolReviewSource(templates.get('trendyol') or None),
+            AmazonReviewSource(templates.get('amazon') or None),
+            HepsiburadaReviewSource(templates.get('hepsiburada') or None),
+        ]
+
+        if ReviewAPIFetcher._parser_pool is None:
+            ReviewAPIFetcher._parser_pool = ThreadPoolExecutor(
+                max_workers=self.config.review_parser_workers, thread_name_prefix='review-parser'
+            )
+
+    def get_source(self, url: str) -> Optional[ReviewSource]:
+        """URL için yorum kaynağını bul"""
+        domain = urlparse(url).netloc.lower()
+        for source in self.sources:
+            if source.matches(domain):
+                return source
+        return None
+
+    def supports(self, url: str) -> bool:
+        source = self.get_source(url)
+        return bool(source and source.extract_product_id(url))
+
+    async def fetch_reviews(self, url: str, max_reviews: int = 100,
+                            deadline: Optional[Deadline] = None,
+                            sampler: Optional[SequentialSampler] = None) -> Dict[str, Any]:
+        """
+        Ürünün yorumlarını sayfalı listeden çek
+
+        Args:
+            url: Ürün URL'si
+            max_reviews: Maksimum yorum sayısı
+            deadline: Uçtan uca zaman bütçesi
+            sampler: Verilirse uyarlanabilir mod - sayfalar pencereler halinde çekilir,
+                güven aralıkları hedefe inince kalan sayfalar istenmez
+
+        Raises:
+            BotChallengeError: Yorum listesi engel sayfası döndürürse
+        """
+        deadline = ensure_deadline(deadline)
+        source = self.get_source(url)
+        product_id = source.extract_product_id(url) if source else None
+        if not source or not product_id:
+            return {'success': False, 'error': f'Yorum listesi desteklenmiyor: {url}', 'reviews': []}
+        if sampler is not None:
+            sampler.reset()
+
+        max_pages = max(1, math.ceil(max_reviews / source.page_size))
+        headers = {'User-Agent': self.user_agent, 'Accept-Language': 'tr-TR,tr;q=0.9'}
+        connector = aiohttp.TCPConnector(limit_per_host=self.limiter.max_concurrent)
+
+        def converged(page_indexes) -> bool:
+            if sampler is None:
+                return False
+            sampler.add(review for index in page_indexes for review in pages.get(index) or [])
+            if sampler.satisfied:
+                sampler.stop_reason = 'converged'
+                logger.info(f"{source.name} güven aralıkları hedefe ulaştı: {sampler.n} yorum, {len(pages)} sayfa")
+                return True
+            return False
+
+        async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+            # İlk sayfa toplam sayfa sayısını öğretir
+            first_reviews, total_pages = await self._fetch_page(session, source, url, product_id, 0, deadline)
+            pages: Dict[int, List[Dict[str, Any]]] = {0: first_reviews}
+
+            if first_reviews and max_pages > 1 and not converged([0]):
+                if total_pages is not None and sampler is None:
+                    # Sayfa sayısı biliniyor: kalan sayfaların hepsi aynı anda
+                    remaining = range(1, min(total_pages, max_pages))
+                    await self._fetch_pages(session, source, url, product_id, remaining, pages, deadline)
+                else:
+                    # Sayfa sayısı bilinmiyor (veya uyarlanabilir mod): eşzamanlılık genişliğinde
+                    # pencereler; boş sayfada ya da güven aralıkları hedefe inince dur
+                    window = self.limiter.max_concurrent
+                    last_page = min(total_pages, max_pages) if total_pages is not None else max_pages
+                    next_page = 1
+                    while next_page < last_page and not deadline.expired:
+                        batch = range(next_page, min(next_page + window, last_page))
+                        await self._fetch_pages(session, source, url, product_id, batch, pages, deadline)
+                        next_page = batch.stop
+                        if converged(batch) or any(not pages.get(index) for index in batch):
+                            break
+
+        # Sayfa sırasına göre birleştir, tekrarları ayıkla
+        reviews: List[Dict[str, Any]] = []
+        seen = set()
+        for index in sorted(pages):
+            for review in pages[index]:
+                if review['text'] and review['text'] not in seen:
+                    seen.add(review['text'])
+                    reviews.append(review)
+
+        if sampler is not None and sampler.stop_reason is None:
+            if len(reviews) >= max_reviews:
+                sampler.stop_reason = 'max_reviews'
+            else:
+                sampler.stop_reason = 'deadline' if deadline.expired else 'exhausted'
+
+        logger.info(f"{source.name} yorum listesinden {len(reviews)} yorum çekildi ({len(pages)} sayfa)")
+        return {
+            'success': bool(reviews),
+            'reviews': reviews[:max_reviews],
+            'pages_fetched': len(pages),
+            'total_pages': total_pages,
+            'source': f'{source.name}_review_api'
+        }
+
+    async def _fetch_pages(self, session: aiohttp.ClientSession, source: ReviewSource, url: str,
+                           product_id: str, page_indexes: range,
+                           pages: Dict[int, List[Dict[str, Any]]], deadline: Deadline) -> None:
+        """Sayfaları eşzamanlı çek; hatalı sayfa diğerlerini etkilemez"""
+        results = await asyncio.gather(
+            *[self._fetch_page(session, source, url, product_id, index, deadline) for index in page_indexes],
+            return_exceptions=True
+        )
+        for index, result in zip(page_indexes, results):
+            if isinstance(result, BotChallengeError):
+                raise result
+            if isinstance(result, Exception):
+                logger.debug(f"{source.name} sayfa {index} alınamadı: {result}")
+                pages[index] = []
+            else:
+                pages[index] = result[0]
+
+    async def _fetch_page(self, session: aiohttp.ClientSession, source: ReviewSource, url: str,
+                          product_id: str, page_index: int,
+                          deadline: Deadline) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Tek sayfayı çek; geçici hatalarda (timeout, 5xx, 429) bekleyip yeniden dene"""
+        return await self.retry_policy.run(
+            lambda: self._fetch_page_once(session, source, url, product_id, page_index, deadline),
+            deadline=deadline,
+            label=f"{source.name} sayfa {page_index}"
+        )
+
+    async def _fetch_page_once(self, session: aiohttp.ClientSession, source: ReviewSource, url: str,
+                               product_id: str, page_index: int,
+                               deadline: Deadline) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Tek sayfayı çek ve parser havuzunda ayrıştır"""
+        page_url = source.page_url(url, product_id, page_index)
+        domain = urlparse(page_url).netloc.lower()
+
+        async with self.limiter.limit(domain):
+            if deadline.expired:
+                deadline.skip('review_pages')
+                return [], None
+
+            lease = await self.proxy_pool.acquire_async(source.name, timeout=deadline.cap(30.0))
+            outcome = FAILURE
+            try:
+                with self.latency.measure('http', source.name):
+                    async with session.get(page_url, proxy=lease.url if lease else None,
+                                           timeout=aiohttp.ClientTimeout(
+                                               total=deadline.cap(self.latency.timeout('http', source.name)))
+                                           ) as response:
+                        body = await response.text()
+                        status = response.status
+                        request_info, history = response.request_info, response.history
+
+                if status >= 400 or '<html' in body[:500].lower():
+                    reason = classify_html(body, status)
+                    if reason:
+                        error = BotChallengeError(source.name, reason, status)
+                        # Salt hız sınırı proxy'yi engellenmiş saymaz
+                        outcome = FAILURE if error.rate_limited else BLOCKED
+                        raise error
+                if status >= 400:
+                    # Durum kodu yeniden deneme sınıflandırması için hatada taşınır
+                    raise aiohttp.ClientResponseError(request_info, history, status=status,
+                                                      message=f'HTTP {status}: {page_url}')
+                outcome = SUCCESS
+            finally:
+                if lease:
+                    lease.release(outcome)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._parser_pool, source.parse, body)
@@ -0,0 +1,65 @@
+"""
+Scrape Önbelleği
+Başarılı scraping sonuçlarını bellekte tutar; site sorunlu olduğunda
+(devre açıkken) tarayıcı yerine son iyi sonuç döndürülebilir.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class ScrapeCache:
+    """TTL ve boyut sınırlı (LRU) scrape sonucu önbelleği"""
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 500):
+        """
+        Args:
+            ttl: Girdinin taze sayıldığı süre (sn)
+            max_entries: En fazla tutulacak URL sayısı
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, url: str, result: Dict[str, Any]) -> None:
+        """Başarılı sonucu kaydet"""
+        with self._lock:
+            self._entries[url] = (time.time(), copy.deepcopy(result))
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, url: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Önbellekteki sonucu getir
+
+        Args:
+            url: Ürün URL'si
+            max_age: Kabul edilen en büyük yaş (sn); None ise ttl kullanılır
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or time.time() - entry[0] > max_age:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(url)
+            self.hits += 1
+            result = copy.deepcopy(entry[1])
+            result['cached_at'] = entry[0]
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """İzleme için önbellek sayaçları"""
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses
+        }
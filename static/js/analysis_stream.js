@@ -0,0 +1,132 @@
+// Canlı analiz akışı (SSE): /api/stream/analyze ve /api/stream/compare olaylarını
+// panelde gösterir. status -> aşama satırı, delta -> ham model çıktısı,
+// field -> tamamlanan JSON alanı, reset -> yeniden denenen çağrının çıktısı silinir,
+// result/error -> akış kapanır ve çağıranın fonksiyonu çalışır.
+
+const STREAM_FIELD_LABELS = {
+    category: 'Kategori',
+    strengths: 'Güçlü Yönler',
+    weaknesses: 'Zayıf Yönler',
+    target_audience: 'Hedef Kitle',
+    market_position: 'Pazar Konumu',
+    purchase_recommendation: 'Satın Alma Önerisi (%)',
+    color_analysis: 'Renk Analizi',
+    price_competitiveness: 'Fiyat Rekabeti',
+    user_satisfaction: 'Kullanıcı Memnuniyeti',
+    sales_potential: 'Satış Potansiyeli',
+    recommended_product: 'Önerilen Ürün',
+    reason: 'Gerekçe',
+    confidence_score: 'Güven (%)',
+    best_value: 'En İyi Fiyat/Performans',
+    highest_quality: 'En Kaliteli',
+    most_affordable: 'En Uygun Fiyatlı',
+    detailed_analysis: 'Kazananlar',
+    comparison_summary: 'Özet'
+};
+
+// Yalnızca bu çağrıların metni gösterilir (tema vb. ara çağrılar panelde yer kaplamasın)
+const STREAM_CALL_TYPES = ['product', 'compare'];
+
+function formatStreamValue(value) {
+    if (Array.isArray(value)) {
+        return value.join(', ');
+    }
+    if (value && typeof value === 'object') {
+        return Object.entries(value).map(([key, item]) => `${key}: ${item}`).join(' | ');
+    }
+    return String(value);
+}
+
+function describeStreamStatus(data) {
+    if (data.stage === 'scraping') {
+        return 'Ürün sayfası ve yorumlar çekiliyor...';
+    }
+    if (data.stage === 'analyzing') {
+        return `"${data.title || 'Ürün'}" analiz ediliyor (${data.review_count} yorum)...`;
+    }
+    if (data.stage === 'comparing') {
+        return `${data.total_products} ürün karşılaştırılıyor...`;
+    }
+    return data.stage;
+}
+
+/**
+ * Akışı aç ve olayları panelde göster
+ *
+ * panel içinde .stream-status, .stream-fields (ul) ve .stream-output (pre) beklenir.
+ * handlers.onResult(sonuç) ve handlers.onError(mesaj) akış bitince bir kez çağrılır.
+ */
+function openAnalysisStream(url, panel, handlers) {
+    const statusLine = panel.querySelector('.stream-status');
+    const fieldList = panel.querySelector('.stream-fields');
+    const output = panel.querySelector('.stream-output');
+    const source = new EventSource(url);
+    let finished = false;
+
+    panel.hidden = false;
+    fieldList.innerHTML = '';
+    output.textContent = '';
+
+    function finish(callback, value) {
+        if (finished) {
+            return;
+        }
+        finished = true;
+        source.close();
+        callback(value);
+    }
+
+    function parse(event) {
+        return JSON.parse(event.data);
+    }
+
+    source.addEventListener('status', event => {
+        statusLine.textContent = describeStreamStatus(parse(event));
+    });
+
+    source.addEventListener('delta', event => {
+        const data = parse(event);
+        if (STREAM_CALL_TYPES.includes(data.call_type)) {
+            output.textContent += data.text;
+            output.scrollTop = output.scrollHeight;
+        }
+    });
+
+    source.addEventListener('field', event => {
+        const data = parse(event);
+        if (!STREAM_CALL_TYPES.includes(data.call_type)) {
+            return;
+        }
+        let item = fieldList.querySelector(`[data-key="${data.key}"]`);
+        if (!item) {
+            item = document.createElement('li');
+            item.className = 'list-group-item';
+            item.dataset.key = data.key;
+            fieldList.appendChild(item);
+        }
+        const label = document.createElement('strong');
+        label.textContent = `${STREAM_FIELD_LABELS[data.key] || data.key}: `;
+        item.replaceChildren(label, document.createTextNode(formatStreamValue(data.value)));
+    });
+
+    source.addEventListener('reset', event => {
+        // Çağrı yeniden deneniyor: önceki denemenin yarım çıktısı geçersiz
+        if (STREAM_CALL_TYPES.includes(parse(event).call_type)) {
+            fieldList.innerHTML = '';
+            output.textContent = '';
+        }
+    });
+
+    source.addEventListener('result', event => {
+        statusLine.textContent = 'Analiz tamamlandı, sonuçlar açılıyor...';
+        finish(handlers.onResult, parse(event));
+    });
+
+    source.addEventListener('error', event => {
+        // Sunucunun 'error' olayı veri taşır; bağlantı hatasında veri yoktur
+        const message = event.data ? parse(event).error : 'Bağlantı kesildi';
+        finish(handlers.onError, message);
+    });
+
+    return source;
+}
@@ -0,0 +1,4 @@
+import os
+
+# Testler gecikme istatistiklerini data/ altına yazmasın
+os.environ.setdefault('LATENCY_STATS_PATH', '')
@@ -0,0 +1,84 @@
+"""
+CircuitBreaker testleri
+Yarı açık devrede sonucu kaydedilmeyen deneme isteğinin (iptal edilen scrape)
+slotu bırakması ve asılı kalan denemenin recovery_timeout sonunda düşmesi doğrulanır.
+
+Çalıştırma (proje kök dizininden):
+    python -m pytest -q tests
+"""
+
+import asyncio
+
+from scraper.product_scraper import ProductScraper
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def half_open_breaker(recovery_timeout: float = 60.0) -> CircuitBreaker:
+    """Devreyi açıp açılış zamanını geri alarak yarı açık duruma getir"""
+    breaker = CircuitBreaker('ornek.com', recovery_timeout=recovery_timeout)
+    breaker.record_failure('engel', trip_immediately=True)
+    assert breaker.state == OPEN
+    breaker._opened_at -= recovery_timeout
+    assert breaker.state == HALF_OPEN
+    return breaker
+
+
+def test_released_probe_allows_next_probe():
+    breaker = half_open_breaker()
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.release_probe()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_stale_probe_expires_after_recovery_timeout():
+    breaker = half_open_breaker(recovery_timeout=60.0)
+
+    assert breaker.allow_request()
+    breaker._probe_started_at -= 59
+    assert not breaker.allow_request()
+
+    breaker._probe_started_at -= 1
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+
+
+def test_release_probe_outside_half_open_is_noop():
+    breaker = CircuitBreaker('ornek.com')
+    breaker.release_probe()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_cancelled_scrape_releases_half_open_probe(monkeypatch):
+    scraper = ProductScraper()
+    breaker = scraper.circuit_breakers.get('trendyol.com')
+    breaker.record_failure('engel', trip_immediately=True)
+    breaker._opened_at -= breaker.recovery_timeout
+    assert breaker.state == HALF_OPEN
+
+    started = asyncio.Event()
+
+    async def hanging_scrape(*args, **kwargs):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(scraper.config, 'review_fetch_mode', 'browser')
+    monkeypatch.setattr(scraper, '_call_with_proxy', hanging_scrape)
+
+    async def scenario():
+        task = asyncio.ensure_future(scraper.scrape_product('https://www.trendyol.com/marka/urun-p-123456'))
+        await started.wait()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    assert asyncio.run(scenario())
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
@@ -0,0 +1,74 @@
+"""
+Ön çekme testleri
+Formdan silinen URL'lerin yalnızca sırada bekleyen işleri iptal edilir; başlamış
+scraping bitirilir. Açılışı beklerken iptal edilen tarayıcı kapatılır.
+
+Çalıştırma (proje kök dizininden):
+    python -m pytest -q tests
+"""
+
+import asyncio
+import threading
+import time
+
+from scraper.prefetch import PrefetchManager
+from scraper.product_scraper import ProductScraper
+from utils.deadline import Deadline
+
+URLS = ['https://www.trendyol.com/marka/urun-p-1', 'https://www.trendyol.com/marka/urun-p-2']
+
+
+def test_abandoned_prefetch_cancels_only_queued_entries(monkeypatch):
+    scraper = ProductScraper()
+    finished = []
+
+    async def scrape_product(url, max_reviews=100, deadline=None):
+        await asyncio.sleep(0.2)
+        finished.append(url)
+        return {'success': True}
+
+    monkeypatch.setattr(scraper, 'scrape_product', scrape_product)
+    manager = PrefetchManager(scraper)
+    monkeypatch.setattr(manager.config, 'prefetch_concurrency', 1)
+
+    async def scenario():
+        manager.prefetch(URLS, client_id='sekme')
+        await asyncio.sleep(0.05)
+        assert [manager.describe(url)['state'] for url in URLS] == ['running', 'queued']
+
+        manager.prefetch([], client_id='sekme')
+        assert not manager.snapshot()['entries']
+        await asyncio.sleep(0.4)
+
+    asyncio.run(scenario())
+    assert finished == URLS[:1]
+    assert manager.stats['detached'] == 1
+    assert manager.stats['cancelled_abandoned'] == 2
+
+
+def test_cancelled_driver_open_quits_the_driver(monkeypatch):
+    scraper = ProductScraper()
+    quit_event = threading.Event()
+
+    class FakeDriver:
+        def quit(self):
+            quit_event.set()
+
+    def slow_get_driver():
+        time.sleep(0.2)
+        return FakeDriver()
+
+    monkeypatch.setattr(scraper, '_get_driver', slow_get_driver)
+
+    async def scenario():
+        opening = asyncio.ensure_future(scraper._open_driver(Deadline(0)))
+        await asyncio.sleep(0.05)
+        opening.cancel()
+        try:
+            await opening
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0.4)
+
+    asyncio.run(scenario())
+    assert quit_event.is_set()
@@ -0,0 +1,204 @@
+"""
+ReviewAPIFetcher testleri
+Yerel aiohttp fixture sunucusu her ReviewSource için sayfalı JSON/HTML yorum listesi
+sunar; sayfa sırasına göre birleştirme, tekrar ayıklama, boş sayfada durma ve
+DomainLimiter eşzamanlılık sınırı doğrulanır.
+
+Çalıştırma (proje kök dizininden):
+    python -m pytest -q tests
+"""
+
+import asyncio
+import json
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+from aiohttp import web
+
+from scraper.review_api_fetcher import ReviewAPIFetcher
+from utils.domain_limiter import DomainLimiter
+
+# Kaynak başına iki ürün; sunucu ürün kimliğinden bağımsız olarak aynı sayfaları verir
+PRODUCT_URLS = {
+    'trendyol': ('https://www.trendyol.com/marka/test-urun-p-123456',
+                 'https://www.trendyol.com/marka/diger-urun-p-654321'),
+    'amazon': ('https://www.amazon.com.tr/dp/B0TESTASIN',
+               'https://www.amazon.com.tr/dp/B0OTHERASN'),
+    'hepsiburada': ('https://www.hepsiburada.com/test-urun-p-HBC00000TEST',
+                    'https://www.hepsiburada.com/diger-urun-p-HBC00000DIGR'),
+}
+PAGE_SIZES = {'trendyol': 20, 'amazon': 10, 'hepsiburada': 10}
+
+
+def review_pages(source: str, page_count: int, per_page: int = 4) -> List[List[str]]:
+    """Sayfa başına yorum metinleri; her sayfa bir öncekinin son yorumunu tekrarlar"""
+    pages = []
+    for page in range(page_count):
+        texts = [f"{source} sayfa {page} yorum {item}" for item in range(per_page)]
+        if pages:
+            texts.insert(0, pages[-1][-1])
+        pages.append(texts)
+    return pages
+
+
+def expected_texts(pages: List[List[str]]) -> List[str]:
+    merged = []
+    for texts in pages:
+        merged.extend(text for text in texts if text not in merged)
+    return merged
+
+
+def amazon_body(texts: List[str]) -> str:
+    """Gerçek sayfa kadar büyük DOM (boş sayfa engel sayfası sanılmasın)"""
+    navigation = ''.join(f'<li><a href="/kategori/{i}">Kategori {i}</a></li>' for i in range(100))
+    reviews = ''.join(
+        '<div data-hook="review">'
+        '<i data-hook="review-star-rating"><span class="a-icon-alt">5,0 üzerinden 5 yıldız</span></i>'
+        '<span data-hook="review-date">1 Ocak 2025</span>'
+        f'<div data-hook="review-body"><span>{text}</span></div>'
+        '</div>'
+        for text in texts
+    )
+    return (f'<html><head><title>Müşteri yorumları</title></head><body>'
+            f'<ul>{navigation}</ul><div id="cm_cr-review_list">{reviews}</div></body></html>')
+
+
+class FixtureServer:
+    """Kaynak başına sayfalı yorum listesi sunan yerel sunucu"""
+
+    def __init__(self, pages: List[List[str]], report_total: bool = True, delay: float = 0.02):
+        """
+        Args:
+            pages: Sayfa başına yorum metinleri; sonrasındaki sayfalar boş döner
+            report_total: JSON kaynakları toplam sayfa/kayıt sayısını bildirsin mi
+            delay: Sayfa başına gecikme; sonraki sayfalar daha önce yanıt verir
+        """
+        self.pages = pages
+        self.report_total = report_total
+        self.delay = delay
+        self.requested: List[Tuple[str, int]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.base_url = ''
+        self._runner: Optional[web.AppRunner] = None
+
+    def url_templates(self) -> Dict[str, str]:
+        return {
+            'trendyol': f'{self.base_url}/trendyol/{{product_id}}?page={{page_index}}&size={{size}}',
+            'amazon': f'{self.base_url}/amazon/product-reviews/{{product_id}}/?pageNumber={{page}}',
+            'hepsiburada': f'{self.base_url}/hepsiburada?sku={{product_id}}&from={{offset}}&size={{size}}',
+        }
+
+    def _texts(self, page_index: int) -> List[str]:
+        return self.pages[page_index] if page_index < len(self.pages) else []
+
+    async def _serve(self, source: str, page_index: int, body: str, content_type: str) -> web.Response:
+        self.requested.append((source, page_index))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Sıra varsayımını yakalamak için son sayfalar önce tamamlanır
+            await asyncio.sleep(self.delay * max(1, len(self.pages) + 2 - page_index))
+        finally:
+            self.in_flight -= 1
+        return web.Response(text=body, content_type=content_type)
+
+    async def trendyol(self, request: web.Request) -> web.Response:
+        page_index = int(request.query['page'])
+        content = [{'comment': text, 'rate': 5, 'commentDateISOtype': '2025-01-01'}
+                   for text in self._texts(page_index)]
+        body = {'result': {'productReviews': {
+            'content': content,
+            'totalPages': len(self.pages) if self.report_total else None
+        }}}
+        return await self._serve('trendyol', page_index, json.dumps(body), 'application/json')
+
+    async def amazon(self, request: web.Request) -> web.Response:
+        page_index = int(request.query['pageNumber']) - 1
+        return await self._serve('amazon', page_index, amazon_body(self._texts(page_index)), 'text/html')
+
+    async def hepsiburada(self, request: web.Request) -> web.Response:
+        page_index = int(request.query['from']) // int(request.query['size'])
+        items = [{'review': {'content': text}, 'star': 4, 'createdAt': '2025-01-01'}
+                 for text in self._texts(page_index)]
+        total = len(self.pages) * PAGE_SIZES['hepsiburada'] if self.report_total else None
+        body = {'data': {'approvedUserContent': {'approvedUserContentList': items}, 'totalItemCount': total}}
+        return await self._serve('hepsiburada', page_index, json.dumps(body), 'application/json')
+
+    async def __aenter__(self) -> 'FixtureServer':
+        app = web.Application()
+        app.router.add_get('/trendyol/{product_id}', self.trendyol)
+        app.router.add_get('/amazon/product-reviews/{product_id}/', self.amazon)
+        app.router.add_get('/hepsiburada', self.hepsiburada)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f'http://127.0.0.1:{port}'
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._runner.cleanup()
+
+
+def fetch(source: str, pages: List[List[str]], report_total: bool = True, max_concurrent: int = 2,
+          max_reviews: int = 100, products: int = 1) -> Tuple[List[Dict], FixtureServer]:
+    """Fixture sunucusunu başlat, ürünlerin yorumlarını aynı anda çek; (sonuçlar, sunucu) döndürür"""
+    product_urls = PRODUCT_URLS[source][:products]
+
+    async def scenario():
+        async with FixtureServer(pages, report_total) as server:
+            fetcher = ReviewAPIFetcher(limiter=DomainLimiter(max_concurrent=max_concurrent),
+                                       url_templates=server.url_templates())
+            results = await asyncio.gather(
+                *[fetcher.fetch_reviews(url, max_reviews=max_reviews) for url in product_urls]
+            )
+            return list(results), server
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize('source', sorted(PRODUCT_URLS))
+def test_merges_pages_in_order_without_duplicates(source):
+    pages = review_pages(source, 3)
+    (result,), server = fetch(source, pages)
+
+    assert result['success']
+    assert [review['text'] for review in result['reviews']] == expected_texts(pages)
+    assert result['source'] == f'{source}_review_api'
+    # Sonraki sayfalar önce yanıt verdi; birleştirme yine de sayfa sırasına göre
+    assert {index for _, index in server.requested} >= {0, 1, 2}
+
+
+@pytest.mark.parametrize('source', sorted(PRODUCT_URLS))
+def test_stops_at_first_empty_page(source):
+    pages = review_pages(source, 3)
+    # Toplam bilinmiyor: pencereler (genişlik 2) boş sayfanın bulunduğu pencerede durur
+    (result,), server = fetch(source, pages, report_total=False, max_reviews=PAGE_SIZES[source] * 10)
+
+    requested = sorted(index for _, index in server.requested)
+    assert requested == [0, 1, 2, 3, 4]
+    assert result['pages_fetched'] == 5
+    assert [review['text'] for review in result['reviews']] == expected_texts(pages)
+
+
+@pytest.mark.parametrize('source', sorted(PRODUCT_URLS))
+def test_concurrency_bounded_by_domain_limiter(source):
+    pages = review_pages(source, 8)
+    # İki ürün aynı domain'e aynı anda gider; her oturumun kendi bağlantı havuzu olduğundan
+    # toplam sınırı yalnızca paylaşılan DomainLimiter koyar
+    results, server = fetch(source, pages, max_concurrent=3, max_reviews=PAGE_SIZES[source] * 8, products=2)
+
+    assert len(server.requested) == 16
+    assert server.max_in_flight == 3
+    for result in results:
+        assert [review['text'] for review in result['reviews']] == expected_texts(pages)
+
+
+def test_max_reviews_limits_pages():
+    pages = review_pages('trendyol', 5, per_page=20)
+    (result,), server = fetch('trendyol', pages, max_reviews=40)
+
+    assert sorted(index for _, index in server.requested) == [0, 1]
+    assert len(result['reviews']) == 40
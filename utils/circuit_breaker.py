@@ -0,0 +1,221 @@
+"""
+Domain Bazlı Devre Kesici (Circuit Breaker)
+Art arda hata veren veya çok yavaşlayan sitelerde tarayıcı kapasitesinin
+boşa harcanmasını engeller.
+
+Durumlar:
+- closed: Normal çalışma, istekler tarayıcıya gider
+- open: Site sorunlu, tarayıcı atlanır (ucuz yol / önbellek kullanılır)
+- half_open: Bekleme süresi doldu, tek bir deneme isteğiyle toparlanma yoklanır
+  (sonucu kaydedilmeyen deneme release_probe() ile ya da recovery_timeout sonunda bırakılır)
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Tek bir domain için devre kesici"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        latency_threshold: float = 45.0,
+        recovery_timeout: float = 120.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        Args:
+            name: Devre adı (genelde domain)
+            failure_threshold: Devreyi açan art arda hata/yavaş çağrı sayısı
+            latency_threshold: Bu süreyi (sn) aşan başarılı çağrılar da "yavaş" sayılır
+            recovery_timeout: Açık devrenin yarı açığa geçmesi için beklenen süre (sn)
+            half_open_max_calls: Yarı açık durumda aynı anda izin verilen deneme sayısı
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open_in_flight = 0
+        self._probe_started_at: Optional[float] = None
+
+        # İzleme sayaçları
+        self.total_successes = 0
+        self.total_failures = 0
+        self.total_short_circuits = 0
+        self.times_opened = 0
+        self.last_failure_reason: Optional[str] = None
+        self.last_latency: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """Güncel durum (süresi dolan açık devre yarı açık görünür)"""
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def _refresh_state(self) -> None:
+        """
+        Bekleme süresi dolduysa açık devreyi yarı açığa al; recovery_timeout boyunca
+        sonuçlanmayan deneme slotunu boşalt (kilit altında çağrılır)
+        """
+        now = time.monotonic()
+        if self._state == OPEN and self._opened_at is not None:
+            if now - self._opened_at >= self.recovery_timeout:
+                self._state = HALF_OPEN
+                self._half_open_in_flight = 0
+                self._probe_started_at = None
+                logger.info(f"Devre yarı açık, toparlanma yoklanacak: {self.name}")
+        elif (self._state == HALF_OPEN and self._half_open_in_flight
+              and self._probe_started_at is not None
+              and now - self._probe_started_at >= self.recovery_timeout):
+            logger.warning(f"Sonuçlanmayan deneme isteği bırakıldı, yeniden yoklanacak: {self.name}")
+            self._half_open_in_flight = 0
+            self._probe_started_at = None
+
+    def allow_request(self) -> bool:
+        """Pahalı yol (tarayıcı) denenebilir mi?"""
+        with self._lock:
+            self._refresh_state()
+
+            if self._state == CLOSED:
+                return True
+
+            if self._state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                self._probe_started_at = time.monotonic()
+                return True
+
+            self.total_short_circuits += 1
+            return False
+
+    def release_probe(self) -> None:
+        """
+        Sonucu kaydedilmeyecek isteğin (ör. iptal edilen scrape) deneme slotunu bırak
+
+        İptal sitenin sağlığı hakkında bilgi vermez; devre durumu değişmez.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_in_flight:
+                self._half_open_in_flight -= 1
+                if not self._half_open_in_flight:
+                    self._probe_started_at = None
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        """Başarılı çağrıyı kaydet - yavaşsa hata gibi sayılır"""
+        if latency is not None and latency > self.latency_threshold:
+            self.record_failure(f"Yüksek gecikme: {latency:.1f} sn", latency=latency)
+            return
+
+        with self._lock:
+            self.total_successes += 1
+            self.last_latency = latency
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                logger.info(f"Devre kapandı, site toparlandı: {self.name}")
+            self._state = CLOSED
+            self._opened_at = None
+            self._half_open_in_flight = 0
+            self._probe_started_at = None
+
+    def record_failure(self, reason: str = '', latency: Optional[float] = None,
+                       trip_immediately: bool = False) -> None:
+        """
+        Başarısız çağrıyı kaydet
+
+        Args:
+            reason: Hata açıklaması (izleme için)
+            latency: Çağrı süresi
+            trip_immediately: Eşiği beklemeden devreyi aç (ör. bot engeli)
+        """
+        with self._lock:
+            self.total_failures += 1
+            self.last_failure_reason = reason
+            self.last_latency = latency
+            self._consecutive_failures += 1
+
+            should_open = (
+                trip_immediately
+                or self._state == HALF_OPEN
+                or self._consecutive_failures >= self.failure_threshold
+            )
+            if should_open:
+                if self._state != OPEN:
+                    self.times_opened += 1
+                    logger.warning(
+                        f"Devre açıldı: {self.name} ({self._consecutive_failures} art arda hata, "
+                        f"son neden: {reason})"
+                    )
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_in_flight = 0
+                self._probe_started_at = None
+
+    def reset(self) -> None:
+        """Devreyi elle kapat"""
+        with self._lock:
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._half_open_in_flight = 0
+            self._probe_started_at = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """İzleme için durum özeti"""
+        with self._lock:
+            self._refresh_state()
+            retry_in = None
+            if self._state == OPEN and self._opened_at is not None:
+                retry_in = round(max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at)), 1)
+
+            return {
+                'name': self.name,
+                'state': self._state,
+                'consecutive_failures': self._consecutive_failures,
+                'total_successes': self.total_successes,
+                'total_failures': self.total_failures,
+                'total_short_circuits': self.total_short_circuits,
+                'times_opened': self.times_opened,
+                'last_failure_reason': self.last_failure_reason,
+                'last_latency': round(self.last_latency, 2) if self.last_latency is not None else None,
+                'retry_in_seconds': retry_in
+            }
+
+
+class CircuitBreakerRegistry:
+    """Domain -> devre kesici eşlemesi"""
+
+    def __init__(self, **breaker_kwargs: Any):
+        self.breaker_kwargs = breaker_kwargs
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, domain: str) -> CircuitBreaker:
+        """Domain'in devre kesicisini getir (yoksa oluştur)"""
+        with self._lock:
+            if domain not in self._breakers:
+                self._breakers[domain] = CircuitBreaker(domain, **self.breaker_kwargs)
+            return self._breakers[domain]
+
+    def open_circuits(self) -> List[str]:
+        """Şu anda açık olan devreler"""
+        return [name for name, breaker in list(self._breakers.items()) if breaker.state == OPEN]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Tüm devrelerin durum özeti"""
+        return {name: breaker.snapshot() for name, breaker in list(self._breakers.items())}
@@ -0,0 +1,106 @@
+"""
+Zaman Bütçesi (Deadline)
+scrape_product -> scrape_all_reviews -> analyze_single_product zinciri boyunca
+taşınan uçtan uca süre sınırı. Her aşama kalan bütçeyi kontrol eder, süre
+azaldığında opsiyonel işleri atlar ve sonucu "kısmi" olarak işaretler.
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+
+class Deadline:
+    """Uçtan uca zaman bütçesi"""
+
+    def __init__(self, max_seconds: Optional[float] = None, retry_budget: Optional[int] = None):
+        """
+        Args:
+            max_seconds: Toplam bütçe (sn). None veya <= 0 ise sınırsız.
+            retry_budget: İstek boyunca yapılabilecek toplam yeniden deneme sayısı (None: sınırsız)
+        """
+        self.max_seconds = max_seconds if max_seconds and max_seconds > 0 else None
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + self.max_seconds if self.max_seconds else None
+        self.skipped_stages: List[str] = []
+        self.retries_left = retry_budget
+        self.retries_used = 0
+        self._parent: Optional['Deadline'] = None
+
+    def child(self) -> 'Deadline':
+        """
+        Aynı bitiş zamanını ve yeniden deneme bütçesini paylaşan alt bütçe
+
+        Çok ürünlü istekte her ürün kendi alt bütçesini kullanır; atlanan aşamalar ve
+        kısmi durum ürüne özeldir (üst bütçeye de özet olarak işlenir).
+        """
+        child = Deadline()
+        child.max_seconds = self.max_seconds
+        child.expires_at = self.expires_at
+        child.retries_left = None
+        child._parent = self
+        return child
+
+    @property
+    def unlimited(self) -> bool:
+        return self.expires_at is None
+
+    def remaining(self) -> float:
+        """Kalan süre (sn) - sınırsızsa sonsuz"""
+        if self.expires_at is None:
+            return float('inf')
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        """Başlangıçtan bu yana geçen süre (sn)"""
+        return time.monotonic() - self.started_at
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def has_time(self, seconds: float) -> bool:
+        """En az `seconds` kadar bütçe kaldı mı?"""
+        return self.remaining() >= seconds
+
+    def cap(self, timeout: float, minimum: float = 0.5) -> float:
+        """Verilen timeout'u kalan bütçeyle sınırla"""
+        return max(minimum, min(timeout, self.remaining()))
+
+    def skip(self, stage: str) -> None:
+        """Süre yetmediği için atlanan aşamayı kaydet"""
+        if stage not in self.skipped_stages:
+            self.skipped_stages.append(stage)
+        if self._parent is not None:
+            self._parent.skip(stage)
+
+    def consume_retry(self) -> bool:
+        """Yeniden deneme bütçesinden bir hak kullan; bütçe bittiyse False"""
+        if self._parent is not None and not self._parent.consume_retry():
+            return False
+        if self.retries_left is not None:
+            if self.retries_left <= 0:
+                return False
+            self.retries_left -= 1
+        self.retries_used += 1
+        return True
+
+    @property
+    def partial(self) -> bool:
+        """Herhangi bir aşama atlandıysa sonuç kısmidir"""
+        return bool(self.skipped_stages)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Sonuçlara eklenecek bütçe özeti"""
+        return {
+            'max_seconds': self.max_seconds,
+            'elapsed_seconds': round(self.elapsed(), 2),
+            'remaining_seconds': None if self.unlimited else round(self.remaining(), 2),
+            'partial': self.partial,
+            'skipped_stages': list(self.skipped_stages),
+            'retries_used': self.retries_used
+        }
+
+
+def ensure_deadline(deadline: Optional[Deadline]) -> Deadline:
+    """None verilirse sınırsız bütçe döndür"""
+    return deadline if deadline is not None else Deadline()
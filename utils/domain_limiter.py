@@ -0,0 +1,56 @@
+"""
+Domain Bazlı İstek Sınırlayıcı
+Aynı siteye giden eşzamanlı HTTP isteklerini ve istekler arası en kısa süreyi
+sınırlar; paralel sayfa çekerken sitelere aşırı yük bindirilmesini engeller.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+
+class DomainLimiter:
+    """Domain başına eşzamanlılık ve istek aralığı sınırı"""
+
+    def __init__(self, max_concurrent: int = 4, min_interval: float = 0.0):
+        """
+        Args:
+            max_concurrent: Bir domain'e aynı anda açık en fazla istek
+            min_interval: Aynı domain'e iki istek başlangıcı arasındaki en kısa süre (sn)
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.min_interval = max(0.0, min_interval)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._interval_locks: Dict[str, asyncio.Lock] = {}
+        self._last_start: Dict[str, float] = {}
+        self._in_flight: Dict[str, int] = {}
+
+    def _semaphore(self, domain: str) -> asyncio.Semaphore:
+        # Event loop içinde tembel oluşturulur (py3.8/3.9 loop bağlama kuralı)
+        if domain not in self._semaphores:
+            self._semaphores[domain] = asyncio.Semaphore(self.max_concurrent)
+            self._interval_locks[domain] = asyncio.Lock()
+        return self._semaphores[domain]
+
+    @asynccontextmanager
+    async def limit(self, domain: str) -> AsyncIterator[None]:
+        """Domain için bir istek slotu al"""
+        semaphore = self._semaphore(domain)
+        async with semaphore:
+            if self.min_interval:
+                async with self._interval_locks[domain]:
+                    wait = self._last_start.get(domain, 0.0) + self.min_interval - time.monotonic()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    self._last_start[domain] = time.monotonic()
+
+            self._in_flight[domain] = self._in_flight.get(domain, 0) + 1
+            try:
+                yield
+            finally:
+                self._in_flight[domain] -= 1
+
+    def snapshot(self) -> Dict[str, int]:
+        """Domain başına açık istek sayısı"""
+        return dict(self._in_flight)
@@ -0,0 +1,290 @@
+"""
+Gecikme Takibi ve Uyarlanabilir Timeout
+Her domain (sayfa yükleme, HTTP) ve her LLM çağrı tipi için akan (streaming)
+bir gecikme histogramı tutar. Timeout'lar sabit değerler yerine geçmiş
+gecikmelerden türetilir: clamp(P99 × çarpan, min, max).
+Böylece yavaş sitelere yeterli süre tanınır, hızlı siteler ise 30 sn
+beklemeden erkenden başarısız olur.
+"""
+
+import atexit
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Çağrı tipi -> (varsayılan, en az, en çok) timeout (sn)
+# Yeterli örnek birikene kadar varsayılan değer kullanılır.
+TIMEOUT_BOUNDS: Dict[str, Tuple[float, float, float]] = {
+    'page_load': (30.0, 8.0, 60.0),
+    'http': (10.0, 3.0, 30.0),
+    'llm:themes': (15.0, 5.0, 45.0),
+    'llm:product': (30.0, 10.0, 90.0),
+    'llm:compare': (25.0, 10.0, 90.0),
+    'llm:reviews': (45.0, 10.0, 90.0),
+    'llm:recommendations': (60.0, 15.0, 120.0),
+    'llm': (30.0, 10.0, 90.0),
+}
+
+
+class LatencyHistogram:
+    """Logaritmik kovalı akan histogram - sabit bellekle yüzdelik tahmini"""
+
+    # 10 ms ... ~10 dk aralığı, her kova bir öncekinin %10 fazlası
+    MIN_VALUE = 0.01
+    GROWTH = 1.10
+    BUCKET_COUNT = 120
+
+    def __init__(self, max_samples: int = 2000):
+        """
+        Args:
+            max_samples: Bu sayı aşılınca sayaçlar yarıya indirilir (eski örnekler
+                         sönümlenir, histogram güncel davranışa uyum sağlar)
+        """
+        self.max_samples = max_samples
+        self.buckets: List[float] = [0.0] * self.BUCKET_COUNT
+        self.count = 0.0
+        self.total = 0.0
+        self.max_value = 0.0
+        self.timeouts = 0
+
+    def _bucket_index(self, value: float) -> int:
+        if value <= self.MIN_VALUE:
+            return 0
+        index = int(math.log(value / self.MIN_VALUE, self.GROWTH)) + 1
+        return min(index, self.BUCKET_COUNT - 1)
+
+    def _bucket_upper(self, index: int) -> float:
+        return self.MIN_VALUE * (self.GROWTH ** index)
+
+    def add(self, value: float, timed_out: bool = False) -> None:
+        """Örnek ekle (timeout'a düşen çağrı, beklenen süreyle sansürlü örnektir)"""
+        self.buckets[self._bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        self.max_value = max(self.max_value, value)
+        if timed_out:
+            self.timeouts += 1
+
+        if self.count > self.max_samples:
+            self.buckets = [b / 2 for b in self.buckets]
+            self.count /= 2
+            self.total /= 2
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Yaklaşık yüzdelik değeri (kova üst sınırı)"""
+        if self.count <= 0:
+            return None
+        target = q * self.count
+        cumulative = 0.0
+        for index, bucket in enumerate(self.buckets):
+            cumulative += bucket
+            if cumulative >= target:
+                return round(min(self._bucket_upper(index), self.max_value), 3)
+        return self.max_value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'buckets': self.buckets,
+            'count': self.count,
+            'total': self.total,
+            'max_value': self.max_value,
+            'timeouts': self.timeouts
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_samples: int = 2000) -> 'LatencyHistogram':
+        histogram = cls(max_samples=max_samples)
+        buckets = data.get('buckets') or []
+        if len(buckets) == cls.BUCKET_COUNT:
+            histogram.buckets = [float(b) for b in buckets]
+            histogram.count = float(data.get('count', sum(buckets)))
+            histogram.total = float(data.get('total', 0.0))
+            histogram.max_value = float(data.get('max_value', 0.0))
+            histogram.timeouts = int(data.get('timeouts', 0))
+        return histogram
+
+
+class LatencyTracker:
+    """Domain ve LLM çağrı tipi bazlı gecikme takibi"""
+
+    def __init__(
+        self,
+        quantile: float = 0.99,
+        multiplier: float = 1.5,
+        min_samples: int = 5,
+        stats_path: Optional[str] = None,
+        save_interval: float = 60.0
+    ):
+        """
+        Args:
+            quantile: Timeout hesabında kullanılan yüzdelik (0.99 = P99)
+            multiplier: Yüzdelik değerin çarpanı
+            min_samples: Bu kadar örnek birikmeden varsayılan timeout kullanılır
+            stats_path: Histogramların saklandığı JSON dosyası (None ise bellekte)
+            save_interval: Diske yazma aralığı (sn)
+        """
+        self.quantile = quantile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.stats_path = stats_path
+        self.save_interval = save_interval
+
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._last_save = time.monotonic()
+
+        self._load()
+
+    @staticmethod
+    def _key(kind: str, name: str = '') -> str:
+        return f"{kind}:{name}" if name else kind
+
+    @staticmethod
+    def _bounds(kind: str, name: str = '') -> Tuple[float, float, float]:
+        for candidate in (f"{kind}:{name}", kind, kind.split(':')[0]):
+            if candidate in TIMEOUT_BOUNDS:
+                return TIMEOUT_BOUNDS[candidate]
+        return (30.0, 5.0, 120.0)
+
+    def record(self, kind: str, name: str, seconds: float, timed_out: bool = False) -> None:
+        """
+        Gecikme örneği kaydet
+
+        Args:
+            kind: Çağrı tipi ('page_load', 'http', 'llm')
+            name: Domain veya LLM çağrı adı ('trendyol.com', 'themes' ...)
+            seconds: Süre (sn)
+            timed_out: Çağrı timeout'a düştüyse True
+        """
+        key = self._key(kind, name)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.add(seconds, timed_out=timed_out)
+        self._maybe_save()
+
+    def timeout(self, kind: str, name: str = '',
+                default: Optional[float] = None,
+                minimum: Optional[float] = None,
+                maximum: Optional[float] = None) -> float:
+        """
+        Geçmiş gecikmelerden timeout türet: clamp(P99 × çarpan, min, max)
+
+        Args:
+            kind: Çağrı tipi
+            name: Domain veya LLM çağrı adı
+            default/minimum/maximum: TIMEOUT_BOUNDS değerlerini ezmek için
+        """
+        bound_default, bound_min, bound_max = self._bounds(kind, name)
+        default = bound_default if default is None else default
+        minimum = bound_min if minimum is None else minimum
+        maximum = bound_max if maximum is None else maximum
+
+        with self._lock:
+            histogram = self._histograms.get(self._key(kind, name))
+            if histogram is None or histogram.count < self.min_samples:
+                return default
+            observed = histogram.quantile(self.quantile)
+
+        if observed is None:
+            return default
+        return round(max(minimum, min(maximum, observed * self.multiplier)), 2)
+
+    @contextmanager
+    def measure(self, kind: str, name: str = '') -> Iterator[None]:
+        """
+        Bloğun süresini ölç ve kaydet
+
+        Timeout hataları da (süre sansürlü örnek olarak) kaydedilir; diğer
+        hatalar gecikme bilgisi taşımadığı için kaydedilmez.
+        """
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if 'timeout' in type(e).__name__.lower():
+                self.record(kind, name, time.monotonic() - started, timed_out=True)
+            raise
+        else:
+            self.record(kind, name, time.monotonic() - started)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """İzleme için her anahtarın özet istatistikleri"""
+        summary = {}
+        with self._lock:
+            items = list(self._histograms.items())
+        for key, histogram in items:
+            kind, _, name = key.partition(':')
+            summary[key] = {
+                'samples': int(histogram.count),
+                'timeouts': histogram.timeouts,
+                'mean': round(histogram.total / histogram.count, 2) if histogram.count else None,
+                'p50': histogram.quantile(0.5),
+                'p99': histogram.quantile(0.99),
+                'max': round(histogram.max_value, 2),
+                'timeout': self.timeout(kind, name)
+            }
+        return summary
+
+    def _load(self) -> None:
+        """Kayıtlı histogramları yükle (geçmiş çalışmalardan öğrenilen gecikmeler)"""
+        if not self.stats_path or not os.path.exists(self.stats_path):
+            return
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for key, value in data.items():
+                self._histograms[key] = LatencyHistogram.from_dict(value)
+            logger.info(f"Gecikme istatistikleri yüklendi: {len(self._histograms)} anahtar")
+        except Exception as e:
+            logger.warning(f"Gecikme istatistikleri yüklenemedi: {e}")
+
+    def _maybe_save(self) -> None:
+        if self.stats_path and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def save(self) -> None:
+        """Histogramları diske yaz"""
+        if not self.stats_path or not self._histograms:
+            return
+        try:
+            with self._lock:
+                data = {key: histogram.to_dict() for key, histogram in self._histograms.items()}
+                self._last_save = time.monotonic()
+            os.makedirs(os.path.dirname(self.stats_path) or '.', exist_ok=True)
+            tmp_path = f"{self.stats_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.stats_path)
+        except Exception as e:
+            logger.warning(f"Gecikme istatistikleri kaydedilemedi: {e}")
+
+
+_latency_tracker: Optional[LatencyTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Scraper ve analizörlerin paylaştığı tekil gecikme takipçisi"""
+    global _latency_tracker
+    with _tracker_lock:
+        if _latency_tracker is None:
+            config = Config()
+            _latency_tracker = LatencyTracker(
+                quantile=config.latency_timeout_quantile,
+                multiplier=config.latency_timeout_multiplier,
+                min_samples=config.latency_min_samples,
+                stats_path=config.latency_stats_path or None
+            )
+            atexit.register(_latency_tracker.save)
+        return _latency_tracker
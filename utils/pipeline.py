@@ -0,0 +1,134 @@
+"""
+Aşamalı İş Hattı (Pipeline)
+Girdileri sırayla bağlanmış aşamalardan geçirir: her aşamanın kendi işçi sayısı
+vardır ve aşamalar arasında sınırlı kuyruklar bulunur. Böylece bir girdinin
+sonraki aşaması (ör. LLM analizi) ile diğer girdinin önceki aşaması (ör. scraping)
+aynı anda ilerler; kuyruk dolunca önceki aşama yavaşlar (geri basınç).
+
+- Sonuçlar girdi sırasıyla döner
+- Bir girdinin hatası yalnızca o girdiyi düşürür, diğerleri devam eder
+- Aşama ve girdi bazlı süreler izleme için tutulur
+
+Kullanım:
+    pipeline = Pipeline(queue_size=2)
+    pipeline.add_stage('scrape', scrape_func, workers=2)
+    pipeline.add_stage('analyze', analyze_func, workers=2)
+    items = await pipeline.run(urls)
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StageFailure(Exception):
+    """Aşamanın beklenen başarısızlığı (ör. scraping sonucu boş) - girdi düşürülür"""
+
+
+class PipelineItem:
+    """Hattan geçen tek girdi ve aşamalardan biriken sonucu"""
+
+    def __init__(self, index: int, value: Any):
+        self.index = index
+        self.input = value
+        self.result: Any = value
+        self.error: Optional[str] = None
+        self.failed_stage: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class Pipeline:
+    """Aşamalar arası sınırlı kuyruklu, sıralı sonuç döndüren iş hattı"""
+
+    def __init__(self, queue_size: int = 2):
+        """
+        Args:
+            queue_size: Aşamalar arası kuyruk kapasitesi (geri basınç eşiği)
+        """
+        self.queue_size = max(1, queue_size)
+        self._stages: List[Dict[str, Any]] = []
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def add_stage(self, name: str, func: Callable[[Any], Awaitable[Any]], workers: int = 1) -> 'Pipeline':
+        """
+        Aşama ekle (eklenme sırasıyla çalışır)
+
+        Args:
+            name: Aşama adı
+            func: Önceki aşamanın sonucunu alan async fonksiyon; StageFailure veya başka
+                bir hata fırlatırsa girdi bu aşamada düşürülür
+            workers: Aşamanın eşzamanlı işçi sayısı
+        """
+        self._stages.append({'name': name, 'func': func, 'workers': max(1, workers)})
+        self.stats[name] = {'processed': 0, 'failed': 0, 'busy_seconds': 0.0}
+        return self
+
+    async def run(self, values: List[Any]) -> List[PipelineItem]:
+        """
+        Tüm girdileri hattan geçir
+
+        Returns:
+            Girdi sırasıyla PipelineItem listesi (başarısızlar dahil)
+        """
+        items = [PipelineItem(index, value) for index, value in enumerate(values)]
+        if not self._stages or not items:
+            return items
+
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self._stages]
+        workers = []
+        for position, stage in enumerate(self._stages):
+            next_queue = queues[position + 1] if position + 1 < len(queues) else None
+            for _ in range(stage['workers']):
+                workers.append(asyncio.create_task(self._worker(stage, queues[position], next_queue)))
+
+        started = time.monotonic()
+        try:
+            for item in items:
+                await queues[0].put(item)
+            # Bir kuyruk boşaldığında tüm girdileri ya düşmüş ya da sonraki kuyruğa geçmiştir
+            for queue in queues:
+                await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        self.stats['total'] = {'seconds': round(time.monotonic() - started, 3)}
+        return items
+
+    async def _worker(self, stage: Dict[str, Any], queue: asyncio.Queue,
+                      next_queue: Optional[asyncio.Queue]) -> None:
+        name = stage['name']
+        stats = self.stats[name]
+        while True:
+            item: PipelineItem = await queue.get()
+            try:
+                stage_start = time.monotonic()
+                try:
+                    item.result = await stage['func'](item.result)
+                except StageFailure as e:
+                    item.error = str(e)
+                except Exception as e:
+                    logger.error(f"İş hattı '{name}' aşaması hatası (girdi {item.index + 1}): {e}")
+                    item.error = str(e) or type(e).__name__
+                elapsed = time.monotonic() - stage_start
+                item.timings[name] = round(elapsed, 3)
+                stats['busy_seconds'] = round(stats['busy_seconds'] + elapsed, 3)
+
+                if item.error is not None:
+                    item.failed_stage = name
+                    stats['failed'] += 1
+                    continue
+                stats['processed'] += 1
+                if next_queue is not None:
+                    # Sonraki aşama doluysa burada beklenir (geri basınç)
+                    await next_queue.put(item)
+            finally:
+                queue.task_done()
@@ -0,0 +1,201 @@
+"""
+Yeniden Deneme Politikası
+Scraping, HTTP sayfa çekme ve Gemini çağrıları için ortak yeniden deneme bileşeni.
+Hatalar üç sınıfa ayrılır:
+- retryable: geçici (timeout, bağlantı hatası, 5xx, 429) - bekleyip tekrar denenir
+- permanent: kalıcı (404, desteklenmeyen site, geçersiz istek) - hemen vazgeçilir
+- bot_blocked: bot engeli/captcha - tekrar denemek işe yaramaz, devre kesiciye bırakılır
+
+Bekleme süresi üstel artar ve tam jitter uygulanır: uniform(0, min(max, base × 2^n)).
+İstek başına yeniden deneme bütçesi (Deadline.retries_left) ve zaman bütçesi
+aşılınca yeniden deneme yapılmaz.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.deadline import Deadline, ensure_deadline
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE = 'retryable'
+PERMANENT = 'permanent'
+BOT_BLOCKED = 'bot_blocked'
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+PERMANENT_STATUS_CODES = {400, 401, 404, 405, 410, 422}
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """Hata nesnesinden HTTP/gRPC durum kodunu bul (requests, aiohttp, google-api-core)"""
+    for attr in ('status_code', 'status', 'code'):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, 'response', None)
+    value = getattr(response, 'status_code', None)
+    return value if isinstance(value, int) else None
+
+
+def classify_error(error: BaseException) -> str:
+    """Hatayı retryable / permanent / bot_blocked olarak sınıflandır"""
+    # Hata kendi sınıfını biliyorsa (ör. BotChallengeError.retry_class)
+    retry_class = getattr(error, 'retry_class', None)
+    if retry_class in (RETRYABLE, PERMANENT, BOT_BLOCKED):
+        return retry_class
+
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return RETRYABLE
+
+    status = _status_code(error)
+    if status is not None:
+        if status in RETRYABLE_STATUS_CODES or status >= 500:
+            return RETRYABLE
+        if status in PERMANENT_STATUS_CODES or 400 <= status < 500:
+            return PERMANENT
+
+    name = type(error).__name__.lower()
+    if 'timeout' in name or 'connection' in name or 'unavailable' in name or 'exhausted' in name:
+        return RETRYABLE
+
+    if isinstance(error, (ValueError, KeyError, TypeError, json.JSONDecodeError, NotImplementedError)):
+        return PERMANENT
+
+    # Bilinmeyen hatalar (ör. WebDriverException) geçici kabul edilir; bütçe sınırlar
+    return RETRYABLE
+
+
+def classify_result(result: Any) -> Optional[str]:
+    """
+    Hata yerine başarısız sonuç sözlüğü döndüren fonksiyonlar için sınıflandırma
+
+    Returns:
+        Başarılı sonuçta None, aksi halde hata sınıfı
+    """
+    if not isinstance(result, dict) or result.get('success', True):
+        return None
+    if result.get('error_type') == 'bot_challenge':
+        return BOT_BLOCKED
+    if result.get('permanent') or 'Desteklenmeyen' in str(result.get('error', '')):
+        return PERMANENT
+    return RETRYABLE
+
+
+class RetryPolicy:
+    """Üstel bekleme + tam jitter ile yeniden deneme"""
+
+    _registry: Dict[str, 'RetryPolicy'] = {}
+
+    def __init__(self, name: str, max_retries: int = 3, base_delay: float = 0.5,
+                 max_delay: float = 8.0):
+        """
+        Args:
+            name: İzleme adı ('scrape', 'review_page', 'llm' ...)
+            max_retries: İlk denemeden sonraki en fazla tekrar sayısı
+            base_delay: İlk bekleme üst sınırı (sn)
+            max_delay: En uzun bekleme (sn)
+        """
+        self.name = name
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'retries': 0, 'recovered': 0, 'budget_exhausted': 0,
+                      RETRYABLE: 0, PERMANENT: 0, BOT_BLOCKED: 0}
+        RetryPolicy._registry[name] = self
+
+    def backoff(self, attempt: int) -> float:
+        """attempt. tekrar için bekleme süresi (tam jitter)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        deadline: Optional[Deadline] = None,
+        min_attempt_seconds: float = 0.0,
+        classify: Callable[[BaseException], str] = classify_error,
+        result_classifier: Optional[Callable[[Any], Optional[str]]] = None,
+        label: str = ''
+    ) -> Any:
+        """
+        func'u politika ile çalıştır
+
+        Args:
+            func: Her denemede yeni coroutine üreten parametresiz fonksiyon
+            deadline: İsteğin zaman ve yeniden deneme bütçesi
+            min_attempt_seconds: Bir denemenin anlamlı olması için gereken en az süre
+            classify: Hata sınıflandırıcı
+            result_classifier: Başarısız sonucu (exception olmadan) sınıflandıran fonksiyon;
+                               tekrarlar tükenirse son sonuç döndürülür
+            label: Log mesajları için açıklama
+
+        Raises:
+            Son denemenin hatası (permanent / bot_blocked hemen iletilir)
+        """
+        deadline = ensure_deadline(deadline)
+        self._count('calls')
+        attempt = 0
+
+        while True:
+            error: Optional[BaseException] = None
+            result = None
+            try:
+                result = await func()
+                kind = result_classifier(result) if result_classifier else None
+                if kind is None:
+                    if attempt:
+                        self._count('recovered')
+                    return result
+            except Exception as e:
+                error = e
+                kind = classify(e)
+
+            self._count(kind)
+            description = error if error is not None else (result.get('error') if isinstance(result, dict) else result)
+
+            if kind != RETRYABLE or attempt >= self.max_retries:
+                return self._give_up(error, result)
+
+            delay = max(self.backoff(attempt), float(getattr(error, 'retry_after', 0) or 0))
+            if not deadline.has_time(delay + min_attempt_seconds):
+                deadline.skip(f'retry:{self.name}')
+                return self._give_up(error, result)
+            if not deadline.consume_retry():
+                self._count('budget_exhausted')
+                return self._give_up(error, result)
+
+            attempt += 1
+            self._count('retries')
+            logger.info(f"Yeniden deneme {attempt}/{self.max_retries} ({self.name}{' ' + label if label else ''}) "
+                        f"{delay:.2f} sn sonra: {description}")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _give_up(error: Optional[BaseException], result: Any) -> Any:
+        if error is not None:
+            raise error
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, max_retries=self.max_retries)
+
+
+def get_retry_policy(name: str, **kwargs: Any) -> RetryPolicy:
+    """Ada göre paylaşılan politika (aynı adlı bileşenler sayaçları ortak kullanır)"""
+    policy = RetryPolicy._registry.get(name)
+    return policy if policy is not None else RetryPolicy(name, **kwargs)
+
+
+def retry_stats() -> Dict[str, Dict[str, Any]]:
+    """Tüm politikaların sayaçları - izleme için"""
+    return {name: policy.snapshot() for name, policy in list(RetryPolicy._registry.items())}
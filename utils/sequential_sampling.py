@@ -0,0 +1,199 @@
+"""
+Ardışık Örnekleme (Uyarlanabilir Yorum Sayısı)
+max_reviews körlemesine seçilmek yerine yorumlar partiler halinde çekilir ve her
+partiden sonra tahminlerin güven aralığı ölçülür:
+
+- Duygu oranları (olumlu/olumsuz/nötr): Wilson aralığı
+- Ortalama puan: normal yaklaşımlı aralık (örneklem standart sapması ile)
+
+Tüm aralıkların yarı genişliği hedefin altına indiğinde (ve en az örnek sayısı
+toplandığında) çekme durur; max_reviews yalnızca üst bütçe olarak kalır.
+"""
+
+import math
+from statistics import NormalDist
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+
+def z_for_confidence(confidence: float) -> float:
+    """Çift taraflı güven düzeyi için z değeri (0.95 -> 1.96)"""
+    confidence = min(max(confidence, 0.5), 0.9999)
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def confidence_for_z(z: float) -> float:
+    """z değerine karşılık gelen çift taraflı güven düzeyi"""
+    return max(0.0, 2 * NormalDist().cdf(z) - 1)
+
+
+def wilson_interval(successes: int, n: int, z: float) -> Tuple[float, float]:
+    """Oran için Wilson güven aralığı; küçük örneklerde ve 0/1'e yakın oranlarda da geçerli"""
+    if n <= 0:
+        return 0.0, 1.0
+    p = successes / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def mean_interval(values: List[float], z: float) -> Optional[Tuple[float, float, float]]:
+    """Ortalama için (ortalama, alt, üst); en az iki değer gerekir"""
+    n = len(values)
+    if n < 2:
+        return None
+    mean = sum(values) / n
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    half = z * math.sqrt(variance / n)
+    return mean, mean - half, mean + half
+
+
+def parse_rating(value: Any) -> Optional[float]:
+    """'4', '4.0', 4 gibi puanları 1-5 aralığında float'a çevir; geçersizse None"""
+    if value is None:
+        return None
+    try:
+        rating = float(str(value).replace(',', '.').strip())
+    except ValueError:
+        return None
+    return rating if 1 <= rating <= 5 else None
+
+
+def rating_sentiment(review: Dict[str, Any]) -> str:
+    """Metin sınıflandırıcısı verilmediğinde puandan duygu: 4-5 olumlu, 1-2 olumsuz"""
+    rating = parse_rating(review.get('rating'))
+    if rating is None or 2 < rating < 4:
+        return 'neutral'
+    return 'positive' if rating >= 4 else 'negative'
+
+
+class SequentialSampler:
+    """Yorum partilerini biriktirip güven aralıkları hedefe ulaştı mı diye karar verir"""
+
+    def __init__(self, proportion_margin: float = 0.10, rating_margin: float = 0.25,
+                 confidence: float = 0.95, min_samples: int = 30,
+                 classify: Optional[Callable[[str], str]] = None):
+        """
+        Args:
+            proportion_margin: Duygu oranları için hedef yarı genişlik (0.10 = ±10 puan)
+            rating_margin: Ortalama puan için hedef yarı genişlik (yıldız)
+            confidence: Güven düzeyi
+            min_samples: Bundan az yorumla asla durulmaz (erken tesadüfi daralmaya karşı)
+            classify: Metin -> 'positive'/'negative'/'neutral'; None ise puandan türetilir
+        """
+        self.proportion_margin = proportion_margin
+        self.rating_margin = rating_margin
+        self.confidence = confidence
+        self.z = z_for_confidence(confidence)
+        self.min_samples = max(2, min_samples)
+        self.classify = classify
+        self.reset()
+
+    def reset(self) -> None:
+        """Yeni yükleme denemesi için birikimi sıfırla"""
+        self.counts = {label: 0 for label in SENTIMENTS}
+        self.ratings: List[float] = []
+        self.batches = 0
+        self.stop_reason: Optional[str] = None
+        self._seen = set()
+
+    @property
+    def n(self) -> int:
+        return sum(self.counts.values())
+
+    def add(self, reviews: Iterable[Dict[str, Any]]) -> int:
+        """
+        Bir parti yorumu ekle (tekrarlanan metinler sayılmaz)
+
+        Returns:
+            Eklenen yeni yorum sayısı
+        """
+        added = 0
+        for review in reviews:
+            text = (review.get('text') or '').strip()
+            if not text or text in self._seen or review.get('source') == 'demo':
+                continue
+            self._seen.add(text)
+            label = self.classify(text) if self.classify else rating_sentiment(review)
+            self.counts[label if label in self.counts else 'neutral'] += 1
+            rating = parse_rating(review.get('rating'))
+            if rating is not None:
+                self.ratings.append(rating)
+            added += 1
+        self.batches += 1
+        return added
+
+    def proportion_intervals(self) -> Dict[str, Tuple[float, float, float]]:
+        """Duygu başına (oran, alt, üst)"""
+        n = self.n
+        intervals = {}
+        for label, count in self.counts.items():
+            low, high = wilson_interval(count, n, self.z)
+            intervals[label] = (count / n if n else 0.0, low, high)
+        return intervals
+
+    def proportion_margin_achieved(self) -> float:
+        """Duygu oranlarının en geniş yarı genişliği"""
+        return max((high - low) / 2 for _, low, high in self.proportion_intervals().values())
+
+    def rating_interval(self) -> Optional[Tuple[float, float, float]]:
+        return mean_interval(self.ratings, self.z)
+
+    def rating_margin_achieved(self) -> Optional[float]:
+        """Ortalama puanın yarı genişliği; gerçek puan yoksa None (kriter uygulanmaz)"""
+        interval = self.rating_interval()
+        if interval is None:
+            return None
+        return (interval[2] - interval[1]) / 2
+
+    @property
+    def satisfied(self) -> bool:
+        """En az örnek toplandı ve tüm aralıklar hedef genişlikte mi?"""
+        if self.n < self.min_samples:
+            return False
+        if self.proportion_margin_achieved() > self.proportion_margin:
+            return False
+        rating_margin = self.rating_margin_achieved()
+        return rating_margin is None or rating_margin <= self.rating_margin
+
+    def achieved_confidence(self) -> float:
+        """Hedef yarı genişliklerin mevcut örnekle sağlandığı güven düzeyi"""
+        n = self.n
+        if n == 0:
+            return 0.0
+        levels = []
+        # En belirsiz oran (p(1-p) en büyük) belirleyicidir
+        worst = max(p * (1 - p) for p in (c / n for c in self.counts.values()))
+        levels.append(1.0 if worst == 0 else confidence_for_z(self.proportion_margin * math.sqrt(n / worst)))
+        if len(self.ratings) >= 2:
+            mean = sum(self.ratings) / len(self.ratings)
+            sd = math.sqrt(sum((r - mean) ** 2 for r in self.ratings) / (len(self.ratings) - 1))
+            levels.append(1.0 if sd == 0 else confidence_for_z(self.rating_margin * math.sqrt(len(self.ratings)) / sd))
+        return min(levels)
+
+    def report(self) -> Dict[str, Any]:
+        """Sonuca eklenecek örnekleme özeti"""
+        rating = self.rating_interval()
+        rating_margin = self.rating_margin_achieved()
+        return {
+            'adaptive': True,
+            'samples': self.n,
+            'batches': self.batches,
+            'confidence': self.confidence,
+            'target_met': self.satisfied,
+            'stop_reason': self.stop_reason,
+            'achieved_confidence': round(self.achieved_confidence(), 3),
+            'proportion_margin': round(self.proportion_margin_achieved(), 3) if self.n else None,
+            'proportion_margin_target': self.proportion_margin,
+            'sentiment_intervals': {
+                label: {'p': round(p, 3), 'low': round(low, 3), 'high': round(high, 3)}
+                for label, (p, low, high) in self.proportion_intervals().items()
+            } if self.n else {},
+            'rating_samples': len(self.ratings),
+            'rating_mean': round(rating[0], 2) if rating else None,
+            'rating_interval': [round(rating[1], 2), round(rating[2], 2)] if rating else None,
+            'rating_margin': round(rating_margin, 3) if rating_margin is not None else None,
+            'rating_margin_target': self.rating_margin
+        }
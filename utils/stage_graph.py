@@ -0,0 +1,103 @@
+"""
+Aşama Bağımlılık Grafiği
+Bir işin aşamalarını bağımlılıklarıyla birlikte tanımlar ve bağımsız aşamaları
+eşzamanlı çalıştırır. Her aşama, bağımlı olduğu aşamalar biter bitmez başlar;
+toplam süre en uzun bağımlılık zincirine iner.
+
+Kullanım:
+    graph = StageGraph()
+    graph.add('stats', lambda: compute_stats(reviews))
+    graph.add('themes', lambda: llm_themes(reviews))           # async olabilir
+    graph.add('summary', lambda stats, themes: {...}, deps=('stats', 'themes'))
+    results = await graph.run()
+"""
+
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+class StageGraph:
+    """Bağımlılıkları biten aşamaları eşzamanlı çalıştıran küçük DAG yürütücüsü"""
+
+    def __init__(self):
+        self._stages: Dict[str, Tuple[Callable[..., Any], Tuple[str, ...]]] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, func: Callable[..., Any], deps: Iterable[str] = ()) -> 'StageGraph':
+        """
+        Aşama ekle
+
+        Args:
+            name: Aşama adı (sonuç sözlüğündeki anahtar)
+            func: Bağımlılık sonuçlarını isimli argüman olarak alan fonksiyon (sync veya async)
+            deps: Önce bitmesi gereken aşamalar
+        """
+        if name in self._stages:
+            raise ValueError(f"Aşama zaten tanımlı: {name}")
+        self._stages[name] = (func, tuple(deps))
+        return self
+
+    def _check(self) -> None:
+        """Eksik bağımlılık ve döngü kontrolü"""
+        for name, (_, deps) in self._stages.items():
+            missing = [dep for dep in deps if dep not in self._stages]
+            if missing:
+                raise ValueError(f"'{name}' aşamasının bağımlılığı tanımsız: {', '.join(missing)}")
+
+        visiting, done = set(), set()
+
+        def visit(name: str, path: List[str]) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Aşama grafiğinde döngü: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dep in self._stages[name][1]:
+                visit(dep, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self._stages:
+            visit(name, [])
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Tüm aşamaları çalıştır
+
+        Bir aşama hata fırlatırsa çalışan diğer aşamalar iptal edilir ve hata yükseltilir
+        (aşamalar kendi yedek sonuçlarını üretmekten sorumludur).
+
+        Returns:
+            Aşama adı -> sonuç
+        """
+        self._check()
+        started = time.monotonic()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str) -> Any:
+            func, deps = self._stages[name]
+            inputs = {dep: await tasks[dep] for dep in deps}
+            stage_start = time.monotonic()
+            result = func(**inputs)
+            if inspect.isawaitable(result):
+                result = await result
+            self.timings[name] = {
+                'start': round(stage_start - started, 3),
+                'seconds': round(time.monotonic() - stage_start, 3)
+            }
+            return result
+
+        for name in self._stages:
+            tasks[name] = asyncio.ensure_future(run_stage(name))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        self.timings['total'] = {'start': 0.0, 'seconds': round(time.monotonic() - started, 3)}
+        return {name: task.result() for name, task in tasks.items()}